@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Rebuild the daily analytics rollup cubes from the event store.
+"""
+import argparse
+import os
+import time
+from workspace.settings import settings
+from workspace.data.event_store import EventStore
+from workspace.data.rollups import RollupStore
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily analytics rollups")
+    parser.add_argument("--events", default=settings.EVENTS_PATH, help="Events file (JSON or Parquet)")
+    parser.add_argument("--output", default=settings.ROLLUPS_DIR, help="Directory to write the cubes to")
+    parser.add_argument("--start", default=None, help="First day to rebuild (defaults to the earliest event)")
+    parser.add_argument("--end", default=None, help="Last day to rebuild (defaults to the latest event)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--days-per-partition", type=int, default=7, help="Days aggregated per worker task")
+    args = parser.parse_args()
+
+    store = RollupStore(EventStore.from_path(args.events), args.output)
+    # Keep cubes for days outside the rebuilt range
+    store.load()
+
+    start = time.perf_counter()
+    store.refresh_segments(args.end)
+    days = store.backfill(args.start, args.end, args.workers, args.days_per_partition)
+    store.save()
+
+    print(f"Rebuilt {days} days of rollups in {time.perf_counter() - start:.2f}s "
+          f"({store.days} days stored in {args.output})")
+
+if __name__ == "__main__":
+    main()
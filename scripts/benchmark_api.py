@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark API serialization time and throughput with and without the fast JSON path.
+"""
+import argparse
+import logging
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from workspace.settings import settings
+from workspace.api.main import router
+from workspace.api.endpoints.customers import RecommendedRewardResponse, get_reward_agent
+from workspace.api.response_cache import get_recommendation_cache
+from workspace.api.serialization import serialize_rows
+
+def bench_serialization(customers: int, limit: int) -> None:
+    """Serialize recommendation payloads both ways and print the time per response."""
+    payloads = list(get_reward_agent().get_recommendations_batch(
+        [f"bench{i:07d}" for i in range(customers)], limit).values())
+    
+    for label, fast in (("Validated", False), ("Fast path", True)):
+        settings.FAST_JSON_RESPONSES = fast
+        start = time.perf_counter()
+        size = sum(len(serialize_rows(payload, RecommendedRewardResponse)) for payload in payloads)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} serialize {len(payloads)} responses ({size / len(payloads):.0f} B) "
+              f"in {elapsed:.3f}s ({elapsed / len(payloads) * 1e6:.1f} us/response)")
+
+def bench_requests(client: TestClient, requests: int, batch_customers: int, limit: int) -> None:
+    """Issue uncached single and batch recommendation requests both ways and print throughput."""
+    cache = get_recommendation_cache()
+    customer_ids = [f"bench{i:07d}" for i in range(batch_customers)]
+    
+    for label, fast in (("Validated", False), ("Fast path", True)):
+        settings.FAST_JSON_RESPONSES = fast
+        cache.invalidate_catalog()
+        start = time.perf_counter()
+        for i in range(requests):
+            client.get(f"/api/customers/bench{i:07d}/recommended_rewards", params={"limit": limit})
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} GET recommended_rewards: {requests / elapsed:,.0f} requests/s")
+        
+        start = time.perf_counter()
+        client.post("/api/customers/recommended_rewards:batch",
+                    json={"customer_ids": customer_ids, "limit": limit})
+        elapsed = time.perf_counter() - start
+        print(f"{label:<10} POST recommended_rewards:batch: {batch_customers / elapsed:,.0f} customers/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API serialization with and without the fast JSON path")
+    parser.add_argument("--customers", type=int, default=20000, help="Responses to serialize in the serialization benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Single recommendation requests to issue")
+    parser.add_argument("--batch-customers", type=int, default=50000, help="Customers in the batch request")
+    parser.add_argument("--limit", type=int, default=5, help="Recommendations per customer")
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    client = TestClient(app)
+    # Warm up the agent and routes before timing
+    client.get("/api/customers/warmup/recommended_rewards")
+    
+    bench_serialization(args.customers, args.limit)
+    bench_requests(client, args.requests, args.batch_customers, args.limit)
+
+if __name__ == "__main__":
+    main()
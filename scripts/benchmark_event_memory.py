@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Measure memory per million engagement events as dictionaries, Event objects and frames.
+"""
+import argparse
+import gc
+import json
+import logging
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from workspace.data.event_store import Event, events_to_frame
+
+EVENT_TYPES = ["email_sent", "email_open", "email_click", "reward_claim", "purchase"]
+CAMPAIGNS = ["welcome_series", "loyalty_program", "promotional", "abandoned_cart", "re-engagement"]
+
+def synthetic_payload(count: int, customers: int) -> str:
+    """Serialize events shaped like seed_data.py output, as they arrive over the wire."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    events = []
+    for i in range(count):
+        event_type = EVENT_TYPES[i % len(EVENT_TYPES)]
+        metadata = {"campaign_id": CAMPAIGNS[i % len(CAMPAIGNS)]}
+        if event_type == "purchase":
+            metadata["amount"] = float(i % 200)
+        events.append({
+            "customer_id": f"cust{i % customers:07d}",
+            "event_type": event_type,
+            "timestamp": (start + timedelta(seconds=i * 7)).isoformat(),
+            "metadata": metadata
+        })
+    return json.dumps(events)
+
+def measure(label: str, build, count: int):
+    """Report the memory retained by build() scaled to a million events."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scale = 1_000_000 / count
+    print(f"{label:<22} {retained * scale / 2**20:8.1f} MB per million "
+          f"({retained / count:6.1f} bytes/event, built in {elapsed:.2f}s)")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure engagement event memory footprint")
+    parser.add_argument("--events", type=int, default=1_000_000, help="Events to build")
+    parser.add_argument("--customers", type=int, default=100_000, help="Distinct customers in the events")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    payload = synthetic_payload(args.events, args.customers)
+    dictionaries = measure("Dictionaries", lambda: json.loads(payload), args.events)
+    compact = measure("Event objects", lambda: [Event.from_dict(event) for event in dictionaries], args.events)
+    measure("Columnar frame", lambda: events_to_frame(compact), args.events)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark event ingestion throughput, in process and through POST /api/events.
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from workspace.api.main import router
+from workspace.data.event_store import get_event_store
+from workspace.data.feature_store import get_feature_store
+from workspace.services.event_ingestion import get_event_ingestor
+
+EVENT_TYPES = ["email_sent", "email_open", "email_click", "reward_claim", "purchase"]
+
+def synthetic_events(count: int, customers: int, offset: int = 0):
+    """Build engagement events spread over customers, one second apart."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "customer_id": f"ingest{(offset + i) % customers:07d}",
+            "event_type": EVENT_TYPES[(offset + i) % len(EVENT_TYPES)],
+            "timestamp": (start + timedelta(seconds=offset + i)).isoformat(),
+            "metadata": {"campaign_id": "benchmark"}
+        }
+        for i in range(count)
+    ]
+
+def wait_until_written(target: int) -> None:
+    """Block until the shared ingestor has written target events in total."""
+    ingestor = get_event_ingestor()
+    while ingestor.ingested < target:
+        time.sleep(0.001)
+
+def bench_in_process(events: int, customers: int, request_size: int) -> None:
+    """Submit events straight to the ingestor and time until they are in the store."""
+    ingestor = get_event_ingestor()
+    payloads = [synthetic_events(request_size, customers, offset)
+                for offset in range(0, events, request_size)]
+    target = ingestor.ingested + sum(len(payload) for payload in payloads)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        ingestor.submit(payload)
+    wait_until_written(target)
+    elapsed = time.perf_counter() - start
+    print(f"In process        {events} events in {elapsed:.2f}s ({events / elapsed:,.0f} events/s, "
+          f"{ingestor.batches} batches so far)")
+
+def bench_http(client: TestClient, events: int, customers: int, request_size: int) -> None:
+    """POST arrays of events to the API and time until they are in the store."""
+    ingestor = get_event_ingestor()
+    payloads = [synthetic_events(request_size, customers, events + offset)
+                for offset in range(0, events, request_size)]
+    target = ingestor.ingested + sum(len(payload) for payload in payloads)
+
+    start = time.perf_counter()
+    for payload in payloads:
+        client.post("/api/events", json=payload)
+    wait_until_written(target)
+    elapsed = time.perf_counter() - start
+    print(f"POST /api/events  {events} events in {elapsed:.2f}s ({events / elapsed:,.0f} events/s, "
+          f"{len(payloads) / elapsed:,.0f} requests/s of {request_size})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark event ingestion throughput")
+    parser.add_argument("--events", type=int, default=200000, help="Events to ingest per run")
+    parser.add_argument("--customers", type=int, default=50000, help="Distinct customers in the events")
+    parser.add_argument("--request-size", type=int, default=1000, help="Events per submit or request")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    client = TestClient(app)
+    # Subscribe the online features so every batch also updates them
+    get_feature_store()
+
+    bench_in_process(args.events, args.customers, args.request_size)
+    bench_http(client, args.events, args.customers, args.request_size)
+    print(f"Event store holds {len(get_event_store())} events; "
+          f"online features for {len(get_feature_store())} customers")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark onboarding throughput for per-customer and bulk workflows.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from workspace.workflows.customer_onboarding import CustomerOnboardingWorkflow
+from workspace.utils.executors import shutdown_executors
+
+async def run_benchmark(customers: int, sequential_sample: int) -> None:
+    """Onboard a synthetic batch both ways and print customers per second."""
+    workflow = CustomerOnboardingWorkflow()
+    customer_ids = [f"bench{i:07d}" for i in range(customers)]
+    
+    sample = customer_ids[:sequential_sample]
+    start = time.perf_counter()
+    for customer_id in sample:
+        await workflow.execute(customer_id)
+    sequential_elapsed = time.perf_counter() - start
+    sequential_rate = len(sample) / sequential_elapsed if sample else 0.0
+    
+    start = time.perf_counter()
+    result = await workflow.execute_bulk(customer_ids)
+    bulk_elapsed = time.perf_counter() - start
+    bulk_rate = result["customer_count"] / bulk_elapsed
+    
+    print(f"Per-customer execute: {len(sample)} customers in {sequential_elapsed:.2f}s "
+          f"({sequential_rate:,.0f} customers/s)")
+    print(f"Bulk execute_bulk:    {result['customer_count']} customers in {bulk_elapsed:.2f}s "
+          f"({bulk_rate:,.0f} customers/s, {result['emails_sent']} emails sent)")
+    if sequential_rate:
+        print(f"Speedup: {bulk_rate / sequential_rate:.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark customer onboarding throughput")
+    parser.add_argument("--customers", type=int, default=20000, help="Number of customers to onboard in bulk")
+    parser.add_argument("--sequential-sample", type=int, default=500, help="Customers to onboard one at a time for comparison")
+    args = parser.parse_args()
+    
+    # Per-customer INFO logging would dominate the measurement
+    logging.disable(logging.INFO)
+    try:
+        asyncio.run(run_benchmark(args.customers, args.sequential_sample))
+    finally:
+        shutdown_executors()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark email rendering throughput with and without the fragment cache.
+"""
+import argparse
+import logging
+import time
+from workspace.services.email_rendering import EmailRenderer
+
+def synthetic_campaign(recipients: int, profiles: int, reward_sets: int):
+    """Build recipients that share a small number of content plans and reward lists."""
+    content_plans = [
+        {
+            "recommended_questions": [f"Question for profile {i}?"] if i % 2 else [],
+            "recommended_game": "Spin the Wheel" if i % 3 else None,
+            "recommended_voucher": f"{5 + i % 20}% off next purchase",
+            "newsletter_focus": "New summer collection"
+        }
+        for i in range(profiles)
+    ]
+    reward_lists = [
+        [{"reward_id": f"reward{i}_{j}", "reward_name": f"Reward {i}-{j}"} for j in range(3)]
+        for i in range(reward_sets)
+    ]
+    return (
+        [{"customer_id": f"bench{i:07d}", "name": f"Customer {i}"} for i in range(recipients)],
+        [content_plans[i % profiles] for i in range(recipients)],
+        [reward_lists[i % reward_sets] for i in range(recipients)]
+    )
+
+def run_benchmark(recipients: int, profiles: int, reward_sets: int) -> None:
+    """Render a synthetic campaign both ways and print renders per second."""
+    campaign = synthetic_campaign(recipients, profiles, reward_sets)
+    
+    for label, renderer in (("Uncached fragments", EmailRenderer(max_cached_fragments=0)),
+                            ("Cached fragments", EmailRenderer())):
+        start = time.perf_counter()
+        contents = renderer.render_batch("welcome", *campaign)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<19} {len(contents)} emails in {elapsed:.2f}s ({len(contents) / elapsed:,.0f} renders/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark email rendering throughput")
+    parser.add_argument("--recipients", type=int, default=100000, help="Number of emails to render")
+    parser.add_argument("--profiles", type=int, default=50, help="Distinct content plans in the campaign")
+    parser.add_argument("--reward-sets", type=int, default=20, help="Distinct reward lists in the campaign")
+    args = parser.parse_args()
+    
+    logging.disable(logging.INFO)
+    run_benchmark(args.recipients, args.profiles, args.reward_sets)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Shared helpers for building test data.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+def make_event(customer_id: str, event_type: str,
+               timestamp: Optional[Union[str, datetime]], **metadata) -> Dict[str, Any]:
+    """
+    Build an engagement event dictionary as produced by the loaders.
+
+    Naive datetimes are taken to be UTC.
+    """
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.isoformat() + ("Z" if timestamp.tzinfo is None else "")
+    return {
+        "customer_id": customer_id,
+        "event_type": event_type,
+        "timestamp": timestamp,
+        "metadata": metadata
+    }
@@ -0,0 +1,70 @@
+"""
+Tests for the ContentSelectionAgent.
+"""
+import pytest
+from workspace.agents.content_selection_agent import DEFAULT_BLOCKS, ContentSelectionAgent
+from workspace.settings import settings
+
+class CountingLLMService:
+    def __init__(self):
+        self.calls = []
+
+    async def generate_personalized_content(self, customer_data, content_type, context):
+        self.calls.append((context["segment"], context["journey_stage"], content_type))
+        return f"{content_type} for {context['segment']}"
+
+class FailingLLMService(CountingLLMService):
+    async def generate_personalized_content(self, customer_data, content_type, context):
+        await super().generate_personalized_content(customer_data, content_type, context)
+        return "Error generating response: 503"
+
+@pytest.mark.asyncio
+async def test_select_content_batch_respects_slots_and_caches_blocks():
+    """Test that each plan fits the slot budget and each novel block is rendered once."""
+    agent = ContentSelectionAgent()
+    agent.llm_service = CountingLLMService()
+    contexts = {
+        f"cust{i}": {
+            "journey_stage": "engaged",
+            "segment": "VIP" if i % 2 else "At Risk",
+            "profile_completion": 1.0 if i % 3 == 0 else 0.5,
+            "attributes": {"age": 30}
+        }
+        for i in range(30)
+    }
+
+    plans = await agent.select_content_batch_async(contexts, slots=2)
+    await agent.select_content_batch_async(contexts, slots=2)
+
+    for customer_id, plan in plans.items():
+        included = [plan["include_questions"], plan["include_game"], plan["include_voucher"], plan["include_newsletter"]]
+        assert sum(included) <= 2
+        if contexts[customer_id]["profile_completion"] == 1.0:
+            assert not plan["include_questions"]
+    assert plans["cust1"]["recommended_voucher"] == "voucher for VIP"
+    assert len(agent.llm_service.calls) == len(set(agent.llm_service.calls))
+    assert set(agent.llm_service.calls) == set(agent.content_blocks)
+
+@pytest.mark.asyncio
+async def test_failed_renders_keep_default_copy_and_cache_is_bounded(monkeypatch):
+    """Test that LLM error text is never cached and the block cache evicts past its size."""
+    agent = ContentSelectionAgent()
+    agent.llm_service = FailingLLMService()
+    contexts = {"cust1": {"journey_stage": "engaged", "segment": "VIP", "profile_completion": 1.0}}
+
+    plans = await agent.select_content_batch_async(contexts, slots=1)
+    rendered = len(agent.llm_service.calls)
+    await agent.select_content_batch_async(contexts, slots=1)
+
+    assert not agent.content_blocks
+    assert len(agent.llm_service.calls) == 2 * rendered
+    copy = [plans["cust1"][field] for field in ("recommended_game", "recommended_voucher", "newsletter_focus")]
+    assert rendered and all(text in (None, *DEFAULT_BLOCKS.values()) for text in copy)
+
+    monkeypatch.setattr(settings, "CONTENT_BLOCK_CACHE_SIZE", 2)
+    agent.llm_service = CountingLLMService()
+    await agent.select_content_batch_async({
+        f"cust{i}": {"journey_stage": stage, "segment": "VIP", "profile_completion": 1.0}
+        for i, stage in enumerate(["new", "engaged", "lapsed"])
+    }, slots=1)
+    assert len(agent.content_blocks) == 2
@@ -0,0 +1,88 @@
+"""
+Tests for the EngagementAnalysisAgent.
+"""
+from datetime import datetime, timezone
+import pandas as pd
+import pytest
+from workspace.data.event_store import EventStore
+from workspace.data.feature_store import OnlineFeatureStore
+from workspace.agents.engagement_analysis_agent import EngagementAnalysisAgent
+from tests.helpers import make_event
+
+@pytest.fixture
+def event_store():
+    records = []
+    # Weekly engagement over the last 90 days
+    for i in range(20):
+        records += [make_event(f"active{i}", "email_open", f"2023-{month:02d}-10T12:00:00Z") for month in (3, 4, 5)]
+        records += [make_event(f"active{i}", "email_click", f"2023-05-{day:02d}T12:00:00Z") for day in (1, 8, 15, 22, 29)]
+    # Engaged once, long ago
+    records += [make_event(f"lapsed{i}", "purchase", "2022-11-01T09:00:00Z") for i in range(15)]
+    # Only ever received emails
+    records += [make_event(f"silent{i}", "email_sent", "2023-05-20T09:00:00Z") for i in range(5)]
+    return EventStore.from_records(records)
+
+@pytest.mark.asyncio
+async def test_identify_disengaged_customers_streams_across_partitions(event_store):
+    """Test that the partitioned, chunked scan finds exactly the disengaged customers."""
+    agent = EngagementAnalysisAgent()
+
+    results = [
+        customer async for customer in agent.identify_disengaged_customers(
+            threshold=0.1, as_of=datetime(2023, 6, 1, tzinfo=timezone.utc),
+            event_store=event_store, partitions=3, chunk_customers=4
+        )
+    ]
+
+    by_id = {customer["customer_id"]: customer for customer in results}
+    assert set(by_id) == {f"lapsed{i}" for i in range(15)} | {f"silent{i}" for i in range(5)}
+    assert by_id["lapsed0"]["last_engagement_date"] == "2022-11-01"
+    assert by_id["lapsed0"]["days_since_engagement"] == 211
+    assert by_id["lapsed0"]["engagement_score"] == 0.0
+    assert by_id["silent0"]["last_engagement_date"] is None
+
+@pytest.mark.asyncio
+async def test_identify_disengaged_customers_can_stop_early(event_store):
+    """Test that abandoning the stream does not leave partition workers blocked."""
+    agent = EngagementAnalysisAgent()
+    stream = agent.identify_disengaged_customers(
+        as_of=datetime(2023, 6, 1, tzinfo=timezone.utc), event_store=event_store, partitions=2, chunk_customers=1
+    )
+
+    first = await stream.__anext__()
+    await stream.aclose()
+
+    assert first["engagement_score"] < 0.1
+
+def test_analyze_engagement_batch_matches_single_customer(event_store):
+    """Test that batch rates count sends, opens and clicks and share churn risk with the scalar path."""
+    agent = EngagementAnalysisAgent()
+    as_of = datetime(2023, 6, 1, tzinfo=timezone.utc)
+    history = [make_event("cust1", "email_sent", f"2023-05-{day:02d}T09:00:00Z") for day in (1, 8, 15, 22)]
+    history += [make_event("cust1", "email_open", "2023-05-08T10:00:00Z"),
+                make_event("cust1", "email_click", "2023-05-08T10:01:00Z")]
+    event_store.append(history)
+
+    analysis = agent.analyze_engagement_batch(event_store.scan(), as_of, customer_ids=["cust1", "silent0", "unknown"])
+    single = agent.analyze_engagement("cust1", history, as_of=as_of)
+
+    assert analysis.loc["cust1", "open_rate"] == pytest.approx(0.25)
+    assert analysis.loc["cust1", "click_rate"] == pytest.approx(1.0)
+    assert analysis.loc["silent0", "open_rate"] == 0.0
+    assert analysis.loc["unknown", "churn_risk"] == 0.5
+    assert single["engagement_metrics"]["overall_engagement"] == pytest.approx(0.625)
+    assert single["churn_risk"] == pytest.approx(
+        agent.churn_predictor.predict_churn_probability("cust1", history, as_of=as_of)
+    )
+
+def test_analyze_engagement_online_matches_batch(event_store):
+    """Test that analysis from the online feature store matches analysis from the event history."""
+    agent = EngagementAnalysisAgent()
+    as_of = datetime(2023, 6, 1, tzinfo=timezone.utc)
+    feature_store = OnlineFeatureStore.from_events(event_store.scan(), path="")
+    customer_ids = ["active0", "lapsed0", "silent0", "unknown"]
+
+    online = agent.analyze_engagement_online(customer_ids, as_of, feature_store)
+    batch = agent.analyze_engagement_batch(event_store.scan(), as_of, customer_ids=customer_ids)
+
+    pd.testing.assert_frame_equal(online, batch)
@@ -42,3 +42,11 @@ def test_recommendation_limits(limit):
     
     # Check that the number of recommendations does not exceed the limit
     assert len(recommendations) <= limit
+
+@pytest.mark.asyncio
+async def test_get_recommendations_async():
+    """Test that the async wrapper returns the same recommendations off the loop."""
+    agent = RewardMatchingAgent()
+    recommendations = await agent.get_recommendations_async("test_customer", limit=2)
+    
+    assert recommendations == agent.get_recommendations("test_customer", limit=2)
@@ -0,0 +1,59 @@
+"""
+Tests for the TimingOptimizationAgent.
+"""
+from datetime import date, datetime, timezone
+import pytest
+from workspace.data.event_store import EventStore
+from workspace.data.send_time import SendTimeHistograms
+from workspace.agents.timing_optimization_agent import TimingOptimizationAgent
+from tests.helpers import make_event
+
+@pytest.fixture
+def event_store():
+    # 2023-05-02 is a Tuesday
+    return EventStore.from_records(
+        [make_event("cust1", "email_open", f"2023-05-{day:02d}T19:15:00Z") for day in (2, 9, 16, 23)] +
+        [make_event("cust1", "purchase", "2023-05-03T08:00:00Z")] +
+        [make_event(f"other{i}", "email_click", "2023-05-05T07:30:00Z") for i in range(3)]
+    )
+
+def test_get_optimal_time_uses_histogram(event_store):
+    """Test that the optimal time is the next occurrence of the customer's busiest hour."""
+    histograms = SendTimeHistograms.from_event_store(event_store, as_of="2023-06-01")
+    agent = TimingOptimizationAgent(histograms)
+
+    timing = agent.get_optimal_time("cust1", now=datetime(2023, 6, 1, 12, 30, tzinfo=timezone.utc))
+
+    assert timing["optimal_day"] == "Tuesday"
+    assert timing["optimal_hour"] == 19
+    assert timing["optimal_datetime"].startswith("2023-06-06T19:00")
+    assert 0 < timing["confidence"] < 1
+
+def test_histograms_update_incrementally(event_store):
+    """Test that appended opens update existing and new customers' histograms."""
+    histograms = SendTimeHistograms.from_event_store(event_store, as_of="2023-06-01")
+    event_store.subscribe(histograms.update)
+
+    event_store.append([make_event("cust1", "email_open", "2023-06-02T19:05:00Z"),
+                        make_event("new1", "email_open", "2023-06-03T10:00:00Z")])
+
+    counts, prior = histograms.lookup("cust1")
+    assert counts.dtype.name == "uint16"
+    assert counts.sum() == 5
+    assert histograms.lookup("new1")[0].sum() == 1
+    assert prior.sum() == pytest.approx(1.0)
+
+def test_plan_send_slots_respects_capacity(event_store):
+    """Test that the batch planner spreads a peak-hour audience within hourly capacity."""
+    histograms = SendTimeHistograms.from_event_store(event_store, as_of="2023-06-01")
+    agent = TimingOptimizationAgent(histograms)
+    audience = ["cust1"] + [f"other{i}" for i in range(3)] + ["unknown"]
+
+    # 2023-05-05 is a Friday, when the other customers clicked at 07:00
+    plan = agent.plan_send_slots(audience, date(2023, 5, 5), hourly_capacity=2)
+
+    load = {slot["hour"]: slot["scheduled"] for slot in plan["load_profile"]}
+    assert max(load.values()) <= 2
+    assert load[7] == 2
+    assert len(plan["assignments"]) == len(audience)
+    assert not plan["unscheduled"]
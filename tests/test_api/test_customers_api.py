@@ -0,0 +1,100 @@
+"""
+Tests for the customers API endpoints.
+"""
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from workspace.api.main import router
+from workspace.api.endpoints.customers import RecommendedRewardResponse
+from workspace.settings import settings
+from workspace.api.response_cache import ResponseCache, get_recommendation_cache
+from workspace.data import loaders
+from workspace.data.event_store import get_event_store
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+client = TestClient(app)
+
+def test_recommended_rewards_batch_streams_ndjson(monkeypatch):
+    """Test that every requested customer gets one NDJSON line, across several chunks."""
+    monkeypatch.setattr(settings, "RECOMMENDATION_BATCH_CHUNK_SIZE", 3)
+    customer_ids = [f"cust{i}" for i in range(8)]
+
+    response = client.post("/api/customers/recommended_rewards:batch",
+                           json={"customer_ids": customer_ids, "limit": 2})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["customer_id"] for line in lines] == customer_ids
+    assert all(len(line["recommendations"]) <= 2 for line in lines)
+    fields = set(RecommendedRewardResponse.model_fields)
+    assert all(set(row) == fields for line in lines for row in line["recommendations"])
+
+def test_recommended_rewards_batch_rejects_empty_request():
+    """Test that an empty customer list is a validation error."""
+    response = client.post("/api/customers/recommended_rewards:batch", json={"customer_ids": []})
+
+    assert response.status_code == 422
+
+def test_recommended_rewards_revalidates_with_etag(monkeypatch):
+    """Test that repeat requests are served from the cache and invalidated by catalog and event writes."""
+    # Restore the shared reward catalog after the test creates a reward
+    monkeypatch.setattr(loaders, "_reward_catalog", loaders.get_reward_catalog())
+    cache = get_recommendation_cache()
+    url = "/api/customers/etag_cust/recommended_rewards?limit=2"
+
+    first = client.get(url)
+    etag = first.headers["etag"]
+    hits = cache.hits
+    repeat = client.get(url, headers={"If-None-Match": etag})
+
+    assert first.status_code == 200 and len(first.json()) <= 2
+    assert repeat.status_code == 304
+    assert cache.hits == hits + 1
+
+    get_event_store().append([{"customer_id": "etag_cust", "event_type": "email_open",
+                               "timestamp": "2023-06-01T10:00:00Z", "metadata": {}}])
+    assert cache.get(cache.key("etag_cust", 2)) is None
+
+    client.get(url)
+    version = cache.catalog_version
+    response = client.post("/api/rewards/", json={"name": "Free Shipping", "description": "Free shipping",
+                                                 "value": 5.0, "type": "other"})
+    assert response.status_code == 200
+    assert cache.catalog_version == version + 1
+    assert len(cache) == 0
+    assert response.json()["id"] in loaders.get_reward_catalog().ids
+
+def test_customers_cursor_pages_match_ndjson_export():
+    """Test that following cursors visits every customer once, in the same order as the stream."""
+    get_event_store().append([{"customer_id": f"page_cust{i:02d}", "event_type": "email_open",
+                               "timestamp": "2023-06-01T10:00:00Z", "metadata": {}} for i in range(25)])
+
+    paged, cursor = [], None
+    while True:
+        response = client.get("/api/customers/", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        paged += [customer["id"] for customer in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    exported = client.get("/api/customers/", params={"stream": "true"})
+
+    assert paged == sorted(set(paged))
+    assert {f"page_cust{i:02d}" for i in range(25)} <= set(paged)
+    assert [json.loads(line)["id"] for line in exported.text.splitlines()] == paged
+    assert client.get("/api/customers/", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_response_cache_skips_responses_computed_before_an_invalidation():
+    """Test that a customer update during computation keeps the stale body out of the cache."""
+    cache = ResponseCache(max_entries=10)
+    key = cache.key("race_cust", 5)
+
+    cache.invalidate_customers(["race_cust"])
+    cache.put(key, b"[]")
+
+    assert len(cache) == 0
+    assert cache.get(cache.key("race_cust", 5)) is None
+    cache.put(cache.key("race_cust", 5), b"[]")
+    assert cache.get(cache.key("race_cust", 5)) is not None
@@ -0,0 +1,84 @@
+"""
+Tests for the event ingestion API and EventIngestor.
+"""
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from workspace.api.main import router
+from workspace.data.event_store import EventStore, get_event_store
+from workspace.data.feature_store import get_feature_store
+from workspace.services.event_ingestion import EventIngestor, get_event_ingestor
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+client = TestClient(app)
+
+def test_ingest_single_and_batched_events():
+    """Test that accepted events reach the event store and the online features."""
+    feature_store = get_feature_store()
+    before = len(get_event_store())
+
+    single = client.post("/api/events", json={"customer_id": "ingest_cust", "event_type": "email_open",
+                                              "timestamp": "2023-06-01T10:00:00Z"})
+    batch = client.post("/api/events", json=[
+        {"customer_id": "ingest_cust", "event_type": "email_click", "timestamp": "2023-06-01T10:01:00Z"},
+        {"customer_id": "ingest_cust", "event_type": "purchase", "metadata": {"amount": 30.0}}
+    ])
+    get_event_ingestor().flush()
+
+    assert single.status_code == 202 and single.json()["accepted"] == 1
+    assert batch.status_code == 202 and batch.json()["accepted"] == 2
+    assert len(get_event_store()) == before + 3
+    features = feature_store.get("ingest_cust")
+    assert features["email_click_count"] == 1
+    assert features["average_purchase_value"] == 30.0
+    assert features["days_since_last_engagement"] == 0
+    assert client.post("/api/events", json=[{"event_type": "email_open"}]).status_code == 422
+
+def test_ingestor_flushes_by_size_and_time_and_rejects_overflow():
+    """Test micro-batching by batch size and flush interval, and backpressure when the buffer is full."""
+    store = EventStore()
+    ingestor = EventIngestor(store, batch_size=3, flush_interval=0.05, max_pending=4)
+    ingestor.start()
+    try:
+        ingestor.submit([{"customer_id": f"c{i}", "event_type": "email_open"} for i in range(3)])
+        ingestor.submit({"customer_id": "c3", "event_type": "email_open"})
+        deadline = time.monotonic() + 2
+        while len(store) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert len(store) == 4
+        assert ingestor.batches == 2
+        try:
+            ingestor.submit([{"customer_id": "c", "event_type": "email_open"}] * 5)
+            assert False, "Expected BufferError"
+        except BufferError:
+            pass
+    finally:
+        ingestor.stop()
+
+class FlakyEventStore(EventStore):
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def append(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("store unavailable")
+        return super().append(events)
+
+def test_ingestor_retries_failed_writes():
+    """Test that a failed batch write is retried before the batch is dropped."""
+    events = [{"customer_id": "c1", "event_type": "email_open"}] * 2
+    recovered = EventIngestor(FlakyEventStore(failures=1), write_retries=1)
+    recovered.submit(events)
+
+    assert recovered.flush() == 2
+    assert len(recovered.event_store) == 2 and recovered.failed == 0
+
+    dropped = EventIngestor(FlakyEventStore(failures=2), write_retries=1)
+    dropped.submit(events)
+
+    assert dropped.flush() == 0
+    assert dropped.failed == 2
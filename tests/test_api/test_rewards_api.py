@@ -0,0 +1,23 @@
+"""
+Tests for the rewards API endpoints.
+"""
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from workspace.api.main import router
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+client = TestClient(app)
+
+def test_rewards_paginate_with_type_filter():
+    """Test cursor pages, type filtering and the NDJSON export of the reward catalog."""
+    first = client.get("/api/rewards/", params={"limit": 1})
+    second = client.get("/api/rewards/", params={"limit": 1, "cursor": first.headers["x-next-cursor"]})
+    vouchers = client.get("/api/rewards/", params={"type": "voucher"})
+    exported = client.get("/api/rewards/", params={"stream": "true"})
+
+    assert [reward["id"] for reward in first.json() + second.json()] == ["reward1", "reward2"]
+    assert [reward["type"] for reward in vouchers.json()] == ["voucher"]
+    assert "x-next-cursor" not in vouchers.headers
+    assert [json.loads(line)["id"] for line in exported.text.splitlines()] == ["reward1", "reward2"]
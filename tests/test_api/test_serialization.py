@@ -0,0 +1,44 @@
+"""
+Tests for the fast JSON serialization helpers.
+"""
+import json
+import numpy as np
+import pytest
+from pydantic import BaseModel, ValidationError
+from workspace.settings import settings
+from workspace.api.serialization import dumps, project, response_rows, serialize_ndjson, serialize_rows
+
+class ItemResponse(BaseModel):
+    id: str
+    score: float
+
+def test_fast_path_matches_validated_path(monkeypatch):
+    """Test that both paths produce the same documents, dropping fields outside the model."""
+    rows = [{"id": "a", "score": np.float64(0.25), "internal": "x"}, {"id": "b", "score": 1.5}]
+
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    fast = serialize_rows(rows, ItemResponse)
+    fast_lines = serialize_ndjson(rows, ItemResponse)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    validated = serialize_rows(rows, ItemResponse)
+
+    assert json.loads(fast) == json.loads(validated) == [{"id": "a", "score": 0.25}, {"id": "b", "score": 1.5}]
+    assert [json.loads(line) for line in fast_lines.splitlines()] == json.loads(fast)
+    assert json.loads(dumps({"counts": np.arange(3)})) == {"counts": [0, 1, 2]}
+
+def test_project_rejects_rows_missing_required_fields():
+    """Test that projection fails on a missing required field rather than emitting null."""
+    with pytest.raises(ValueError, match="score"):
+        project([{"id": "a"}], ItemResponse)
+
+def test_response_rows_validate_unless_fast_path_is_on(monkeypatch):
+    """Test that embedded rows are validated by default and only projected on the opt-in fast path."""
+    rows = [{"id": "a", "score": "high"}]
+
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    with pytest.raises(ValidationError):
+        response_rows(rows, ItemResponse)
+    assert response_rows([{"id": "a", "score": np.float64(0.5), "internal": 1}], ItemResponse) == [{"id": "a", "score": 0.5}]
+
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", True)
+    assert response_rows(rows, ItemResponse) == rows
@@ -0,0 +1,115 @@
+"""
+Tests for the columnar EventStore.
+"""
+import pytest
+import pandas as pd
+from workspace.data.event_store import Event, EventStore, events_to_frame
+from workspace.data.processors import CustomerDataProcessor, EngagementEventProcessor
+from tests.helpers import make_event
+
+def test_events_to_frame():
+    """Test that event dictionaries are converted to the columnar schema."""
+    frame = events_to_frame([
+        make_event("cust1", "email_open", "2023-05-01T08:45:00Z", campaign_id="welcome_series"),
+        make_event("cust1", "purchase", "2023-05-02T10:00:00", amount=25.0)
+    ])
+    
+    assert len(frame) == 2
+    assert str(frame["timestamp"].dt.tz) == "UTC"
+    assert frame["campaign_id"].iloc[0] == "welcome_series"
+    assert frame["amount"].iloc[1] == 25.0
+
+def test_compact_events_match_dictionaries():
+    """Test that Event round-trips and converts to the same frame as the dictionaries."""
+    events = [
+        make_event("cust1", "email_open", "2023-05-01T08:45:00.250Z", campaign_id="welcome_series"),
+        make_event("cust2", "purchase", "2023-05-02T10:00:00", amount=25.0)
+    ]
+    compact = [Event.from_dict(event) for event in events]
+    
+    assert compact[0].timestamp == pd.Timestamp("2023-05-01T08:45:00.250Z").value
+    assert compact[1].to_dict() == {**events[1], "timestamp": "2023-05-02T10:00:00+00:00",
+                                    "metadata": {"amount": 25.0}}
+    pd.testing.assert_frame_equal(events_to_frame(compact).astype(object), events_to_frame(events).astype(object))
+    with pytest.raises(ValueError):
+        Event.from_dict(make_event("cust1", "email_open", "not a timestamp"))
+
+def test_scan_date_range():
+    """Test that scans return only events inside the inclusive date range."""
+    store = EventStore.from_records([
+        make_event("cust1", "email_open", "2023-05-03T00:00:00Z"),
+        make_event("cust2", "email_open", "2023-05-01T00:00:00Z"),
+        make_event("cust1", "email_click", "2023-05-02T00:00:00Z"),
+        make_event("cust3", "purchase", "2023-05-04T00:00:00Z")
+    ])
+    
+    window = store.scan("2023-05-02T00:00:00Z", "2023-05-03T00:00:00Z")
+    
+    assert list(window["event_type"]) == ["email_click", "email_open"]
+    assert window["timestamp"].is_monotonic_increasing
+    assert len(store.scan()) == 4
+
+def test_append_keeps_order_and_first_seen():
+    """Test that out-of-order appends are re-sorted and first_seen is updated."""
+    store = EventStore.from_records([
+        make_event("cust1", "email_open", "2023-05-03T00:00:00Z")
+    ])
+    assert store.first_seen()["cust1"] == pd.Timestamp("2023-05-03", tz="UTC")
+    
+    store.append([
+        make_event("cust1", "purchase", "2023-05-01T00:00:00Z"),
+        make_event("cust2", "email_open", "2023-05-05T00:00:00Z")
+    ])
+    
+    assert len(store) == 3
+    assert store.customer_count == 2
+    assert store.scan()["timestamp"].is_monotonic_increasing
+    assert store.first_seen()["cust1"] == pd.Timestamp("2023-05-01", tz="UTC")
+    assert store.first_seen()["cust2"] == pd.Timestamp("2023-05-05", tz="UTC")
+
+def test_appends_drop_missing_timestamps_and_stay_scannable():
+    """Test that events without timestamps are dropped and segmented appends scan in order."""
+    store = EventStore.from_records([
+        make_event("cust1", "email_open", "2023-05-01T00:00:00Z")
+    ])
+    
+    assert store.append([
+        make_event("cust2", "email_open", None),
+        make_event("cust2", "email_open", "2023-05-02T00:00:00Z")
+    ]) == 1
+    assert len(store.scan(end="2023-05-03")) == 2
+    
+    for day in range(3, 9):
+        store.append([make_event(f"cust{day}", "email_open", f"2023-05-0{day}T00:00:00Z")])
+    store.append([make_event("cust1", "purchase", "2023-05-04T12:00:00Z")])
+    
+    window = store.scan("2023-05-02", "2023-05-05")
+    assert window["timestamp"].is_monotonic_increasing
+    assert list(window["customer_id"]) == ["cust2", "cust3", "cust4", "cust1", "cust5"]
+    assert len(store) == 9
+    assert store.customer_count == 8
+    assert list(store.customer_ids()[:2]) == ["cust1", "cust2"]
+
+def test_customer_metrics_do_not_depend_on_segment_layout():
+    """Test that churn counts customers missing from the window's segment."""
+    early = [make_event(f"cust{day}", "email_open", f"2023-04-{day}T08:00:00Z") for day in range(10, 20)]
+    late = [make_event("cust20", "email_open", "2023-05-05T08:00:00Z"),
+            make_event("cust21", "email_open", "2023-05-06T08:00:00Z")]
+    appended = EventStore.from_records(early)
+    appended.append(late)
+    
+    start = pd.Timestamp("2023-04-20", tz="UTC")
+    end = pd.Timestamp("2023-05-15", tz="UTC") - pd.Timedelta(microseconds=1)
+    processor = EngagementEventProcessor()
+    
+    def metrics(store):
+        events = store.scan(start, end)
+        previous = store.scan(start - (end - start) - pd.Timedelta(microseconds=1),
+                              start - pd.Timedelta(microseconds=1), columns=["customer_id"])
+        features = processor.customer_features(events, end, store.first_seen())
+        segments = CustomerDataProcessor().segment_customers(features)
+        return processor.customer_metrics(events, previous, features, segments, store.customer_count, start)
+    
+    assert metrics(appended) == metrics(EventStore.from_records(early + late))
+    assert metrics(appended)["churn_rate"] == 1.0
+    assert metrics(appended)["active_customers"] == 2
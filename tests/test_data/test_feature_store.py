@@ -0,0 +1,71 @@
+"""
+Tests for the online feature store.
+"""
+import time
+import pandas as pd
+from workspace.data.event_store import EventStore, events_to_frame
+from workspace.data.feature_store import OnlineFeatureStore
+from workspace.data.processors import EngagementEventProcessor
+
+AS_OF = pd.Timestamp("2023-06-01T00:00:00Z")
+
+EVENTS = [
+    {"customer_id": "cust1", "event_type": "email_sent", "timestamp": "2023-05-01T08:00:00Z", "metadata": {}},
+    {"customer_id": "cust1", "event_type": "email_open", "timestamp": "2023-05-01T08:45:00Z", "metadata": {}},
+    {"customer_id": "cust1", "event_type": "email_click", "timestamp": "2023-05-01T08:46:30Z", "metadata": {}},
+    {"customer_id": "cust2", "event_type": "purchase", "timestamp": "2023-04-10T12:00:00Z",
+     "metadata": {"amount": 40.0}},
+    {"customer_id": "cust2", "event_type": "page_view", "timestamp": "2023-05-20T12:00:00Z", "metadata": {}},
+    {"customer_id": "cust1", "event_type": "purchase", "timestamp": "2023-05-15T09:00:00Z",
+     "metadata": {"amount": 25.0}}
+]
+
+def test_bulk_build_matches_history_features():
+    """Test that stored features match the batch computation over the full history."""
+    events = EventStore.from_records(EVENTS).scan()
+    store = OnlineFeatureStore.from_events(events, path="")
+
+    online = store.features(["cust1", "cust2", "unknown"], AS_OF)
+    expected = EngagementEventProcessor().customer_features(events, AS_OF)
+    expected.index = expected.index.astype(object)
+
+    assert list(online.index) == ["cust1", "cust2"]
+    for column in ["total_events", "first_event", "last_event", "days_since_signup",
+                   "days_since_last_engagement", "email_open_count", "purchase_count"]:
+        assert online[column].tolist() == expected.loc[online.index, column].tolist()
+    assert store.get("cust2", AS_OF)["average_purchase_value"] == 40.0
+    assert store.get("unknown")["days_since_last_engagement"] is None
+
+def test_incremental_updates_and_snapshot_round_trip(tmp_path):
+    """Test that per-event and per-batch updates agree with a bulk build, and survive a snapshot."""
+    bulk = OnlineFeatureStore.from_events(events_to_frame(EVENTS), path="")
+    incremental = OnlineFeatureStore(path=str(tmp_path / "features.npz"))
+    for event in EVENTS[:3]:
+        incremental.update(event)
+    incremental.record_events(events_to_frame(EVENTS[3:]))
+
+    incremental.save()
+    restored = OnlineFeatureStore.load(str(tmp_path / "features.npz"))
+
+    for customer_id in ["cust1", "cust2"]:
+        assert incremental.get(customer_id, AS_OF) == bulk.get(customer_id, AS_OF)
+        assert restored.get(customer_id, AS_OF) == bulk.get(customer_id, AS_OF)
+    assert restored.get("cust1", AS_OF)["click_to_open_rate"] == 1.0
+    assert restored.watermark == bulk.watermark
+
+def test_snapshots_are_written_by_the_timer_thread(tmp_path):
+    """Test that appends never write snapshots themselves and the timer thread only saves changes."""
+    path = tmp_path / "features.npz"
+    store = OnlineFeatureStore(path=str(path))
+    store.start_snapshots(interval=60)
+    store.record_events(events_to_frame(EVENTS))
+    assert not path.exists()
+
+    store.stop_snapshots()
+    assert OnlineFeatureStore.load(str(path)).watermark == store.watermark
+
+    store.start_snapshots(interval=0.01)
+    path.unlink()
+    time.sleep(0.1)
+    store.stop_snapshots()
+    assert not path.exists()
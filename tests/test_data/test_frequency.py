@@ -0,0 +1,83 @@
+"""
+Tests for fatigue curves and send counters.
+"""
+from datetime import datetime, timedelta
+import pandas as pd
+from workspace.data.event_store import events_to_frame
+from workspace.data.frequency import FatigueCurves, SendCounters
+from workspace.agents.timing_optimization_agent import TimingOptimizationAgent
+from tests.helpers import make_event
+
+def send_history(customer_id: str, interval_days: int, sends: int, opens_every: int):
+    """Sends at a fixed interval, opening every opens_every-th email an hour later."""
+    start = datetime(2023, 1, 1, 9)
+    events = []
+    for i in range(sends):
+        sent_at = start + timedelta(days=i * interval_days)
+        events.append(make_event(customer_id, "email_sent", sent_at))
+        if i % opens_every == 0:
+            events.append(make_event(customer_id, "email_open", sent_at + timedelta(hours=1)))
+    return events
+
+def history_frame():
+    events = []
+    for i in range(20):
+        # Daily senders rarely open, weekly senders usually do
+        events += send_history(f"daily{i}", 1, 30, opens_every=10)
+        events += send_history(f"weekly{i}", 7, 5, opens_every=1)
+    return events_to_frame(events).sort_values("timestamp", kind="stable", ignore_index=True)
+
+def test_fatigue_curves_prefer_spaced_sends():
+    """Test that fitted curves penalize short intervals and pick a spaced one."""
+    frame = history_frame()
+    segments = pd.Series("Active", index=pd.Index(frame["customer_id"].cat.categories, dtype=object))
+
+    curves = FatigueCurves.fit(frame, segments)
+
+    active = curves.rates[1]
+    assert curves.fitted
+    assert active[0] < 0.2 < active[6]
+    assert curves.optimal_intervals(min_open_rate=0.1)[1] == 7
+
+def test_send_counters_downgrade_frequency():
+    """Test that unopened sends from history and new sends trigger a frequency downgrade."""
+    counters = SendCounters.from_events(history_frame())
+    assert counters.get("weekly0") == {"sent": 5, "unopened": 0}
+    assert counters.get("daily0")["unopened"] == 9
+
+    counters.record_events(events_to_frame([make_event("weekly0", "email_sent", datetime(2023, 2, 28, hour))
+                                            for hour in range(5)]))
+    agent = TimingOptimizationAgent(fatigue_curves=FatigueCurves(), send_counters=counters)
+    frequency = agent.get_optimal_frequency("weekly0", {"overall_engagement": 0.5})
+    assert frequency["optimal_frequency_days"] == 14
+
+    counters.record_events(events_to_frame([make_event("weekly0", "email_open", datetime(2023, 3, 1))]))
+    assert counters.get("weekly0")["unopened"] == 0
+    assert agent.get_optimal_frequency("weekly0", {"overall_engagement": 0.5})["optimal_frequency_days"] == 7
+
+def test_send_events_update_counters_like_a_rebuild():
+    """Test that email_sent events reaching subscribed counters match counters rebuilt from history."""
+    history = send_history("weekly0", 7, 5, opens_every=1)
+    later = [make_event("weekly0", "email_sent", datetime(2023, 3, day, 9)) for day in (1, 2, 3)]
+    later += [make_event("weekly0", "email_open", datetime(2023, 3, 2, 10)),
+              make_event("daily0", "email_sent", datetime(2023, 3, 3, 9))]
+
+    counters = SendCounters.from_events(events_to_frame(history))
+    counters.record_events(events_to_frame(later))
+    rebuilt = SendCounters.from_events(events_to_frame(history + later))
+
+    for customer_id in ["weekly0", "daily0"]:
+        assert counters.get(customer_id) == rebuilt.get(customer_id)
+    assert counters.get("weekly0") == {"sent": 8, "unopened": 1}
+
+def test_batch_frequencies_match_single_customer_when_unfitted():
+    """Test that batch intervals use the same engagement buckets as the scalar path."""
+    agent = TimingOptimizationAgent(fatigue_curves=FatigueCurves(), send_counters=SendCounters())
+    scores = [0.9, 0.5, 0.1]
+
+    batch = agent.get_optimal_frequencies(["a", "b", "c"], scores)
+
+    for customer_id, score in zip(["a", "b", "c"], scores):
+        single = agent.get_optimal_frequency(customer_id, {"overall_engagement": score})
+        assert batch[customer_id] == single["optimal_frequency_days"]
+    assert list(batch) == [3, 7, 14]
@@ -0,0 +1,40 @@
+"""
+Tests for optimization-opportunity mining.
+"""
+import pandas as pd
+from workspace.data.event_store import events_to_frame
+from workspace.data.opportunities import build_partitions, count_cells, rank_opportunities
+from tests.helpers import make_event
+
+def claim_journey(customer_id: str, hour: int, content_type: str, reward_id: str, converts: bool):
+    events = [
+        make_event(customer_id, "email_open", f"2023-05-01T{hour:02d}:00:00Z", content_type=content_type),
+        make_event(customer_id, "reward_claim", f"2023-05-01T{hour:02d}:30:00Z", reward_id=reward_id)
+    ]
+    if converts:
+        events.append(make_event(customer_id, "purchase", f"2023-05-02T{hour:02d}:00:00Z", amount=30.0))
+    return events
+
+def test_partitioned_counts_find_winning_cell():
+    """Test that a cell converting far above its segment is ranked with a positive interval."""
+    events = []
+    for i in range(100):
+        events += claim_journey(f"win{i}", 19, "game", "reward2", converts=i % 10 != 0)
+        events += claim_journey(f"base{i}", 8, "newsletter", "reward1", converts=i % 5 == 0)
+    frame = events_to_frame(events).sort_values("timestamp", kind="stable", ignore_index=True)
+    segments = pd.Series("Active", index=pd.Index(frame["customer_id"].cat.categories, dtype=object))
+
+    partitions, content_types, reward_types = build_partitions(
+        frame, segments, {"reward1": "discount", "reward2": "voucher"}, 3)
+    counts = [count_cells(partition) for partition in partitions]
+    trials = sum(count[0] for count in counts)
+    successes = sum(count[1] for count in counts)
+
+    assert trials.sum() == 200
+    assert successes.sum() == 110
+
+    opportunities = rank_opportunities(trials, successes, content_types, reward_types)
+    top = opportunities[0]
+    assert (top["segment"], top["content_type"], top["reward_type"], top["send_hour"]) == ("Active", "game", "voucher", 19)
+    assert top["cell_performance"] == 0.9
+    assert top["confidence_interval"][0] > 0
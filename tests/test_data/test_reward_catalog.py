@@ -0,0 +1,43 @@
+"""
+Tests for the indexed RewardCatalog.
+"""
+import numpy as np
+from workspace.data.reward_catalog import RewardCatalog
+
+REWARDS = [
+    {"id": "r3", "name": "Gift Card", "value": 25.0, "type": "gift_card", "conditions": {}},
+    {"id": "r1", "name": "10% Discount", "value": 10.0, "type": "discount", "conditions": {"min_purchase": 50.0}},
+    {"id": "r2", "name": "Free Shipping", "value": 5.0, "type": "voucher", "conditions": None},
+    {"id": "r4", "name": "Big Discount", "value": 30.0, "type": "discount",
+     "conditions": {"min_purchase": 100.0, "first_order": True}}
+]
+
+def ids(records):
+    return [record["id"] for record in records]
+
+def test_select_with_type_condition_and_field_filters():
+    """Test bitmap filters, their combination and the equality fallback for other fields."""
+    catalog = RewardCatalog(REWARDS)
+
+    assert ids(catalog.records()) == ["r1", "r2", "r3", "r4"]
+    assert ids(catalog.records(catalog.select({"type": "discount"}))) == ["r1", "r4"]
+    assert ids(catalog.records(catalog.select({"type": ["voucher", "gift_card"]}))) == ["r2", "r3"]
+    assert ids(catalog.records(catalog.select({"condition": ["min_purchase", "first_order"]}))) == ["r4"]
+    assert ids(catalog.records(catalog.select({"type": "discount", "value": 10.0}))) == ["r1"]
+    assert len(catalog.select({"type": "unknown"})) == 0
+    assert ids(catalog.page("r1", 2, {"type": ["discount", "voucher"]})) == ["r2", "r4"]
+
+def test_features_and_hot_swap_snapshots():
+    """Test precomputed features and that a new version leaves the old snapshot untouched."""
+    catalog = RewardCatalog(REWARDS)
+    features = catalog.features(catalog.select({"type": "discount"}))
+
+    np.testing.assert_allclose(features["appeal_score"], [8.0, 24.0])
+    np.testing.assert_allclose(features["min_purchase_value"], [50.0, 100.0])
+
+    updated = catalog.with_rewards([{"id": "r2", "name": "Free Shipping", "value": 7.0, "type": "discount"},
+                                    {"id": "r0", "name": "Signup Bonus", "value": 15.0, "type": "other"}])
+
+    assert updated.version == catalog.version + 1
+    assert ids(updated.records(updated.select({"type": "discount"}))) == ["r1", "r2", "r4"]
+    assert ids(catalog.records(catalog.select({"type": "discount"}))) == ["r1", "r4"]
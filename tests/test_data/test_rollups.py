@@ -0,0 +1,123 @@
+"""
+Tests for the daily analytics rollups.
+"""
+import pytest
+import pandas as pd
+from workspace.data.event_store import EventStore
+from workspace.data.processors import CustomerDataProcessor, EngagementEventProcessor
+from workspace.data.rollups import ACTIVITY_MEASURES, CUBE_MEASURES, RollupStore
+from tests.helpers import make_event
+
+@pytest.fixture
+def events():
+    return [
+        make_event("cust1", "email_open", "2023-05-01T08:00:00Z", campaign_id="welcome_series", content_type="games"),
+        make_event("cust1", "email_click", "2023-05-01T08:05:00Z", campaign_id="welcome_series", content_type="games"),
+        make_event("cust1", "reward_claim", "2023-05-01T09:00:00Z", reward_id="reward1"),
+        make_event("cust1", "purchase", "2023-05-01T10:00:00Z", amount=20.0),
+        make_event("cust2", "email_open", "2023-05-01T11:00:00Z", campaign_id="welcome_series", content_type="games"),
+        make_event("cust2", "email_open", "2023-05-02T11:00:00Z", campaign_id="welcome_series", content_type="games"),
+        make_event("cust2", "reward_claim", "2023-05-02T12:00:00Z", reward_id="reward1")
+    ]
+
+def test_backfill_builds_daily_cubes(events):
+    """Test that backfilled cubes aggregate events per day and cell."""
+    store = RollupStore(EventStore.from_records(events))
+    store.refresh_segments("2023-05-03")
+
+    assert store.backfill() == 2
+
+    cube, activity = store.cubes("2023-05-01", "2023-05-01")
+    opens = cube[cube["event_type"] == "email_open"]
+    assert opens["events"].sum() == 2
+    assert opens["customers"].sum() == 2
+    assert activity["active"].sum() == 2
+
+    claims = cube[cube["event_type"] == "reward_claim"]
+    assert claims["conversions"].sum() == 1
+
+def test_ingest_updates_touched_days(events):
+    """Test that ingesting events rebuilds only their days and keeps distinct counts exact."""
+    store = RollupStore(EventStore.from_records(events[:4]))
+    store.refresh_segments("2023-05-03")
+    store.backfill()
+
+    store.ingest(events[4:])
+
+    metrics = store.report_metrics("2023-05-01", "2023-05-02", {"reward1": "Free Shipping"})
+    assert metrics["event_count"] == len(events)
+    assert metrics["customer_metrics"]["active_customer_days"] == 3
+    assert metrics["engagement_metrics"]["email_click_rate"] == pytest.approx(1 / 3)
+
+    top = metrics["reward_metrics"]["top_performing_rewards"][0]
+    assert top["name"] == "Free Shipping"
+    assert top["claims"] == 2
+    assert top["conversion_rate"] == pytest.approx(0.5)
+
+def test_subscribed_rollups_follow_appends_and_report_customer_counts(events):
+    """Test that appends reach subscribed cubes and customer counts match the events path."""
+    event_store = EventStore.from_records(events[:4])
+    store = RollupStore(event_store)
+    store.refresh_segments("2023-05-03")
+    store.backfill()
+    store.subscribe()
+
+    event_store.append(events[4:] + [make_event("cust3", "email_open", "2023-04-30T12:00:00Z")])
+
+    metrics = store.report_metrics("2023-05-01", "2023-05-02")
+    assert metrics["event_count"] == len(events)
+
+    start, end = pd.Timestamp("2023-05-01", tz="UTC"), pd.Timestamp("2023-05-03", tz="UTC") - pd.Timedelta(microseconds=1)
+    window = event_store.scan(start, end)
+    previous = event_store.scan(start - (end - start) - pd.Timedelta(microseconds=1),
+                                start - pd.Timedelta(microseconds=1), columns=["customer_id"])
+    processor = EngagementEventProcessor()
+    features = processor.customer_features(window, end, event_store.first_seen())
+    expected = processor.customer_metrics(window, previous, features,
+                                          CustomerDataProcessor().segment_customers(features),
+                                          event_store.customer_count, start)
+    for field in ["new_customers", "active_customers", "churn_rate"]:
+        assert metrics["customer_metrics"][field] == expected[field]
+    assert metrics["customer_metrics"]["churn_rate"] == 1.0
+
+def test_batched_updates_merge_without_rescanning(events, monkeypatch):
+    """Test that later batches for a day merge into its cubes exactly without reading the day again."""
+    event_store = EventStore.from_records(events[:2])
+    store = RollupStore(event_store)
+    store.refresh_segments("2023-05-03")
+    store.subscribe()
+    event_store.append(events[2:3])
+
+    scans = []
+    scan = event_store.scan
+    monkeypatch.setattr(event_store, "scan", lambda *args, **kwargs: scans.append(args) or scan(*args, **kwargs))
+    # The purchase converts the claim merged in the previous batch
+    for event in events[3:]:
+        event_store.append([event])
+    assert len(scans) == 1
+
+    rebuilt = RollupStore(EventStore.from_records(events))
+    rebuilt.segments = store.segments
+    rebuilt.backfill()
+    for merged, expected in zip(store.cubes(), rebuilt.cubes()):
+        columns = [column for column in expected.columns if column not in CUBE_MEASURES + ACTIVITY_MEASURES]
+        merged = merged.fillna("").sort_values(columns, ignore_index=True)
+        expected = expected.fillna("").sort_values(columns, ignore_index=True)
+        pd.testing.assert_frame_equal(merged, expected, check_dtype=False)
+    assert store.cubes()[0]["conversions"].sum() == 1
+    assert store.customer_activity("2023-05-02", "2023-05-02") == rebuilt.customer_activity("2023-05-02", "2023-05-02")
+
+def test_save_and_load_keep_customer_sets(events, tmp_path):
+    """Test that loaded rollups report customer counts without the events."""
+    store = RollupStore(EventStore.from_records(events))
+    store.refresh_segments("2023-05-03")
+    store.backfill()
+    store.save(str(tmp_path))
+
+    loaded = RollupStore(EventStore(), str(tmp_path))
+    assert loaded.load()
+    assert loaded.days == 2
+    assert loaded.customer_activity("2023-05-02", "2023-05-02") == {
+        "new_customers": 0, "active_customers": 1, "churn_rate": 0.5
+    }
+    assert loaded.report_metrics()["event_count"] == len(events)
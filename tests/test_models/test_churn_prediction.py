@@ -0,0 +1,74 @@
+"""
+Tests for the ChurnPredictor model.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+import pytest
+from workspace.data.event_store import events_to_frame
+from workspace.models.churn_prediction import ChurnPredictor
+
+def make_histories(rng: random.Random, as_of: datetime, count: int = 200):
+    event_types = ["email_open", "email_click", "reward_claim", "purchase", "profile_update"]
+    histories = {}
+    for i in range(count):
+        customer_id = f"cust{i}"
+        histories[customer_id] = [
+            {
+                "customer_id": customer_id,
+                "event_type": rng.choice(event_types[:rng.randint(1, 5)]),
+                "timestamp": (as_of - timedelta(days=rng.uniform(0, 120))).isoformat().replace("+00:00", "Z"),
+                "metadata": {}
+            }
+            for _ in range(rng.randint(1, 8))
+        ]
+    return histories
+
+def test_predict_churn_batch_matches_scalar(tmp_path):
+    """Test that batch scoring reproduces the per-customer heuristic."""
+    rng = random.Random(7)
+    as_of = datetime(2023, 6, 1, 12, 0, tzinfo=timezone.utc)
+    histories = make_histories(rng, as_of)
+
+    model = ChurnPredictor(model_dir=str(tmp_path))
+    events = events_to_frame([event for history in histories.values() for event in history])
+    batch = model.predict_churn_batch(events, as_of, customer_ids=list(histories) + ["unknown"])
+
+    for customer_id, history in histories.items():
+        assert batch[customer_id] == pytest.approx(
+            model.predict_churn_probability(customer_id, history, as_of))
+    assert batch["unknown"] == 0.5
+
+def test_train_saves_versioned_model(tmp_path):
+    """Test that a trained model is saved, lazily reloaded and scored identically by both paths."""
+    rng = random.Random(11)
+    as_of = datetime(2023, 6, 1, 12, 0, tzinfo=timezone.utc)
+    histories = make_histories(rng, as_of, count=300)
+    # Customers quiet for over a month churned
+    historical_data = [
+        {
+            "customer_id": customer_id,
+            "engagement_history": history,
+            "churned": max(event["timestamp"] for event in history) < (as_of - timedelta(days=30)).isoformat()
+        }
+        for customer_id, history in histories.items()
+    ]
+
+    unattributed = {"event_type": "email_open", "timestamp": as_of.isoformat()}
+    historical_data[0]["engagement_history"] = historical_data[0]["engagement_history"] + [unattributed]
+
+    trainer = ChurnPredictor(model_dir=str(tmp_path))
+    trainer.train(historical_data, as_of)
+    trainer.train(historical_data, as_of)
+    assert trainer.model_version == 2
+    assert trainer.training_metrics["skipped_events"] == 1
+    assert trainer.training_metrics["auc"] > 0.9
+
+    model = ChurnPredictor(model_dir=str(tmp_path))
+    assert model.model_ready is False
+    events = events_to_frame([event for history in histories.values() for event in history])
+    batch = model.predict_churn_batch(events, as_of)
+
+    assert model.model_version == 2
+    for customer_id, history in list(histories.items())[:50]:
+        assert batch[customer_id] == pytest.approx(
+            model.predict_churn_probability(customer_id, history, as_of))
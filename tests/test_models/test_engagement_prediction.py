@@ -0,0 +1,28 @@
+"""
+Tests for the EngagementPredictor.
+"""
+import numpy as np
+import pytest
+from workspace.models.engagement_prediction import EngagementPredictor
+
+def test_predict_engagement_batch_matches_single_predictions():
+    """Test that the batch gather agrees with per-customer predictions, including unknown inputs."""
+    predictor = EngagementPredictor()
+    predictor.train([])
+    customers = [
+        {"segment": "VIP", "attributes": {"age": 22}},
+        {"segment": "At Risk", "attributes": {"age": 60}},
+        {"segment": "Unknown"},
+        {}
+    ]
+    content_types = ["game", "voucher", "newsletter", "survey", "poll"]
+
+    matrix = predictor.predict_engagement_batch(customers, content_types)
+
+    assert matrix.shape == (4, 5)
+    for row, customer in zip(matrix, customers):
+        single = predictor.predict_engagement("cust", content_types, customer)
+        np.testing.assert_allclose(row, [single[content_type] for content_type in content_types])
+    assert matrix[0, 0] == pytest.approx(0.6 * 1.2 * 1.2)
+    assert matrix[1, 1] == 0.95
+    assert matrix[:, 4].tolist() == [0.5] * 4
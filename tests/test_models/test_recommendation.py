@@ -97,3 +97,28 @@ def test_rule_based_recommend():
     assert recommendations[0]["rank"] == 1
     assert recommendations[1]["rank"] == 2
     assert recommendations[2]["rank"] == 3
+
+def test_recommend_batch_matches_single():
+    """Test that batch recommendations match per-customer recommendations."""
+    model = RewardRecommender()
+    
+    customers = [
+        {"id": "cust1", "name": "New Customer"},
+        {"id": "cust2", "name": "Old Customer", "created_at": "2020-01-01T00:00:00Z"}
+    ]
+    
+    available_rewards = [
+        {"id": "reward1", "name": "10% Discount", "type": "discount", "value": 10},
+        {"id": "reward2", "name": "Free Shipping", "type": "shipping", "value": 5},
+        {"id": "reward3", "name": "Signup Bonus", "type": "bonus", "value": 20}
+    ]
+    
+    batch = model.recommend_batch(customers, available_rewards, top_n=2)
+    
+    assert len(batch) == 2
+    for customer, recommendations in zip(customers, batch):
+        assert recommendations == model.recommend(customer, available_rewards, top_n=2)
+        
+    # Only the recently signed-up customer gets the signup reward first
+    assert batch[0][0]["reward_id"] == "reward3"
+    assert batch[1][0]["reward_id"] == "reward1"
@@ -0,0 +1,51 @@
+"""
+Tests for email content rendering.
+"""
+from workspace.services.email_rendering import CompiledTemplate, EmailRenderer
+
+def test_partial_keeps_unfilled_fields_and_escapes_braces():
+    """Test that static values containing braces survive a later per-recipient render."""
+    template = CompiledTemplate("<h1>{greeting}, {name}</h1>{block}")
+
+    partial = template.partial({"greeting": "Hi", "block": "<p>{not a field}</p>"})
+
+    assert partial.fields == {"name"}
+    assert partial.render({"name": "Ana"}) == "<h1>Hi, Ana</h1><p>{not a field}</p>"
+
+def test_render_batch_reuses_cached_fragments():
+    """Test that recipients sharing a content plan and rewards share one partial template."""
+    renderer = EmailRenderer()
+    content_plan = {"recommended_questions": ["Favorite category?"], "recommended_voucher": "10% off",
+                    "recommended_game": None, "newsletter_focus": None}
+    rewards = [{"reward_id": "reward1", "reward_name": "Free Shipping"}]
+    recipients = [{"customer_id": f"cust{i}", "name": f"<Customer {i}>"} for i in range(100)]
+
+    contents = renderer.render_batch("welcome", recipients, [content_plan] * 100, [rewards] * 100)
+
+    assert renderer.cached_partials == 1
+    assert "Welcome, &lt;Customer 7&gt;!" in contents[7]
+    assert "customer=cust7" in contents[7]
+    assert "Your voucher: 10% off" in contents[7] and "<li>Free Shipping</li>" in contents[7]
+    assert contents[3] == renderer.render("welcome", recipients[3], content_plan, rewards)
+
+def test_fragment_cache_evicts_least_recently_used():
+    """Test that a recently used partial survives eviction and an evicted one is rendered again."""
+    renderer = EmailRenderer(max_cached_fragments=2)
+    welcome = renderer.templates["welcome"]
+    built = []
+    partial = welcome.partial
+
+    def counting_partial(values):
+        built.append(values["rewards_block"])
+        return partial(values)
+
+    welcome.partial = counting_partial
+    recipient = {"customer_id": "cust1", "name": "Ana"}
+    rewards = {name: [{"reward_name": name}] for name in ["A", "B", "C"]}
+
+    for name in ["A", "B", "A", "C", "A", "B"]:
+        renderer.render("welcome", recipient, rewards=rewards[name])
+
+    assert renderer.cached_partials == 2
+    # FIFO eviction would drop A when C arrives and build it again
+    assert [name for block in built for name in "ABC" if f"<li>{name}</li>" in block] == ["A", "B", "C", "B"]
@@ -4,7 +4,10 @@ Tests for the Email service.
 import pytest
 from typing import Dict, Any
 from unittest.mock import patch, AsyncMock
+from workspace.data.event_store import EventStore
+from workspace.services import email_service
 from workspace.services.email_service import EmailService
+from workspace.services.event_ingestion import EventIngestor
 
 def test_initialization():
     """Test that the service initializes correctly."""
@@ -121,3 +124,14 @@ async def test_track_engagement():
             event_type="open",
             metadata={"user_agent": "test-browser"}
         )
+
+@pytest.mark.asyncio
+async def test_track_engagement_rejects_when_buffer_full(monkeypatch):
+    """Test that a full ingestion buffer gives a rejected status instead of an error."""
+    ingestor = EventIngestor(EventStore(), max_pending=1)
+    ingestor.submit({"customer_id": "c1", "event_type": "email_open"})
+    monkeypatch.setattr(email_service, "get_event_ingestor", lambda: ingestor)
+
+    response = await EmailService().track_engagement("email_1", "open", {"customer_id": "c1"})
+
+    assert response["status"] == "rejected"
@@ -0,0 +1,31 @@
+"""
+Tests for the shared executor pools.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from workspace.settings import settings
+from workspace.utils import executors
+
+class BrokenPool(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.shutdown_calls = []
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdown_calls.append((wait, cancel_futures))
+        super().shutdown(wait=wait, cancel_futures=cancel_futures)
+
+@pytest.mark.asyncio
+async def test_broken_process_pool_is_shut_down_and_replaced(monkeypatch):
+    """Test that a broken pool is shut down without waiting, dropped, and the call falls back to threads."""
+    pool = BrokenPool()
+    monkeypatch.setattr(settings, "CPU_PROCESS_WORKERS", 1)
+    monkeypatch.setattr(executors, "_process_pool", pool)
+
+    assert await executors.run_in_process(sum, [1, 2, 3]) == 6
+    assert pool.shutdown_calls == [(False, True)]
+    assert executors._process_pool is None
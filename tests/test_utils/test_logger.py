@@ -0,0 +1,29 @@
+"""
+Tests for the queue-based and sampled loggers.
+"""
+import logging
+from workspace.utils.logger import DeferredQueueHandler, SampledLogger, setup_logger, stop_logging
+
+def test_queued_records_are_written_by_the_listener(capsys):
+    """Test that %-style records are formatted off the calling thread and flushed on stop."""
+    stop_logging()
+    logger = setup_logger("tests.queued")
+    assert isinstance(logger.handlers[0], DeferredQueueHandler)
+
+    logger.info("Scored %d customers in %.1fs", 3, 0.25)
+    stop_logging()
+
+    assert "tests.queued - INFO - Scored 3 customers in 0.2s" in capsys.readouterr().out
+
+def test_sampled_logger_writes_one_in_every(caplog):
+    """Test that each message template is sampled on its own."""
+    sampled = SampledLogger(setup_logger("tests.sampled"), every=10)
+
+    with caplog.at_level(logging.INFO, logger="tests.sampled"):
+        for i in range(25):
+            sampled.info("Scoring reward %s", i)
+            sampled.info("Scoring customer %s", i)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[:2] == ["Scoring reward 0 (sampled 1 in 10)", "Scoring customer 0 (sampled 1 in 10)"]
+    assert len(messages) == 6
@@ -0,0 +1,36 @@
+"""
+Tests for the shared timestamp parsers.
+"""
+import pytest
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from workspace.data.processors import CustomerDataProcessor
+from workspace.utils.timestamps import parse_timestamp, parse_timestamps, to_epoch_ns
+
+VALUES = ["2023-05-01T08:45:00Z", "2023-05-01T10:45:00+02:00", "2023-05-01T08:45:00",
+          datetime(2023, 5, 1, 8, 45)]
+
+def test_scalar_and_vectorized_parsers_agree():
+    """Test that naive and aware inputs normalize to the same UTC instant on both paths."""
+    expected = datetime(2023, 5, 1, 8, 45, tzinfo=timezone.utc)
+
+    assert all(parse_timestamp(value) == expected for value in VALUES)
+    assert all(parse_timestamp(value).tzinfo == timezone.utc for value in VALUES)
+    parsed = parse_timestamps(VALUES + [None, "not a timestamp"])
+    assert list(parsed[:4]) == [pd.Timestamp(expected)] * 4
+    assert parsed[4:].isna().all()
+    assert to_epoch_ns(VALUES[0]) == pd.Timestamp(expected).value
+    with pytest.raises(ValueError):
+        parse_timestamp("not a timestamp")
+
+def test_extract_features_recency_with_aware_timestamps():
+    """Test that recency is computed from aware event timestamps instead of falling back."""
+    now = datetime.now(timezone.utc)
+    customer = {"id": "cust1", "created_at": (now - timedelta(days=30)).isoformat(), "attributes": {}}
+    history = [{"customer_id": "cust1", "event_type": "email_open",
+                "timestamp": (now - timedelta(days=3, hours=1)).isoformat().replace("+00:00", "Z")}]
+
+    features = CustomerDataProcessor().extract_features(customer, history)
+
+    assert features["days_since_signup"] == 30
+    assert features["days_since_last_engagement"] == 3
@@ -0,0 +1,67 @@
+"""
+Tests for the customer onboarding workflow.
+"""
+import pytest
+from workspace.data.event_store import EventStore
+from workspace.services import email_service
+from workspace.services.event_ingestion import EventIngestor
+from workspace.workflows.customer_onboarding import CustomerOnboardingWorkflow
+
+@pytest.fixture
+def ingestor(monkeypatch):
+    ingestor = EventIngestor(event_store=EventStore())
+    monkeypatch.setattr(email_service, "get_event_ingestor", lambda: ingestor)
+    return ingestor
+
+def record_content(workflow):
+    """Capture the rendered email body of every send."""
+    rendered = {}
+    render = workflow.email_service._content
+
+    def content(recipient, email_data):
+        rendered[recipient["customer_id"]] = render(recipient, email_data)
+        return rendered[recipient["customer_id"]]
+
+    workflow.email_service._content = content
+    return rendered
+
+@pytest.mark.asyncio
+async def test_bulk_onboarding_matches_single_customer(ingestor):
+    """Test that bulk onboarding gives each customer the same email and result as the scalar workflow."""
+    customer_ids = ["cust1", "cust2", "new_customer"]
+    workflow = CustomerOnboardingWorkflow()
+    rendered = record_content(workflow)
+
+    single = {customer_id: await workflow.execute(customer_id) for customer_id in customer_ids}
+    single_content = dict(rendered)
+    bulk = await workflow.execute_bulk(customer_ids)
+
+    assert bulk["customer_count"] == bulk["emails_sent"] == len(customer_ids)
+    assert [result["customer_id"] for result in bulk["results"]] == customer_ids
+    for result in bulk["results"]:
+        assert result == single[result["customer_id"]]
+    assert rendered == single_content
+
+@pytest.mark.asyncio
+async def test_bulk_campaign_sends_in_batches_and_records_sends(ingestor):
+    """Test that bulk sends go out in provider-sized batches, in order, with one send event per email."""
+    service = email_service.EmailService()
+    batches = []
+    send_batch = service._send_batch
+
+    async def counting_send_batch(emails):
+        batches.append([email_data["customer_id"] for email_data in emails])
+        return await send_batch(emails)
+
+    service._send_batch = counting_send_batch
+    emails = [{"customer_id": f"cust{i}", "content": "Hello", "campaign_id": "spring"} for i in range(7)]
+
+    results = await service.send_bulk_campaign(emails, batch_size=3)
+    ingestor.flush()
+
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [result["recipient"] for result in results] == [f"customer_cust{i}@example.com" for i in range(7)]
+    sends = ingestor.event_store.scan()
+    assert list(sends["event_type"].unique()) == ["email_sent"]
+    assert sorted(sends["customer_id"]) == [f"cust{i}" for i in range(7)]
+    assert set(sends["campaign_id"]) == {"spring"}
@@ -1,17 +1,42 @@
 """
 Agent responsible for selecting the optimal content mix for each customer.
 """
-from typing import List, Dict, Any
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from workspace.settings import settings
 from workspace.utils.logger import setup_logger
-from workspace.services.llm_service import LLMService
+from workspace.utils.executors import run_in_thread
+from workspace.services.llm_service import LLMService, is_fallback_response
+from workspace.models.engagement_prediction import EngagementPredictor, DEFAULT_AGE, DEFAULT_SEGMENT, age_bands
 
 logger = setup_logger(__name__)
 
+CONTENT_BLOCKS = ["question", "game", "voucher", "newsletter"]
+# Fallback copy for blocks not yet rendered for a segment and journey stage
+DEFAULT_BLOCKS = {
+    "question": "What's your favorite product category?",
+    "game": "Spin the Wheel",
+    "voucher": "10% off next purchase",
+    "newsletter": "New summer collection"
+}
+
+BlockKey = Tuple[str, Optional[str], str]
+
 class ContentSelectionAgent:
     """Agent that determines the optimal content for customer communications."""
     
-    def __init__(self):
+    def __init__(self, engagement_predictor: Optional[EngagementPredictor] = None):
         self.llm_service = LLMService()
+        if engagement_predictor is None:
+            # In a real implementation, would load the trained model
+            engagement_predictor = EngagementPredictor()
+            engagement_predictor.train([])
+        self.engagement_predictor = engagement_predictor
+        # Rendered content blocks by (segment, journey_stage, block type), oldest first
+        self.content_blocks: "OrderedDict[BlockKey, str]" = OrderedDict()
+        self._rendering: Dict[BlockKey, asyncio.Future] = {}
         logger.info("Content Selection Agent initialized")
     
     def select_content(self, customer_id: str, 
@@ -26,31 +51,169 @@ class ContentSelectionAgent:
         Returns:
             Content selection with rationale
         """
-        logger.info(f"Selecting content for customer {customer_id}")
-        
-        # In a real implementation:
-        # 1. Analyze customer profile and engagement history
-        # 2. Determine optimal mix of content types based on context
-        # 3. Use LLM to generate or select specific content
-        
-        # Determine content types to include
-        include_questions = context.get("profile_completion", 0) < 0.8
-        include_game = context.get("engagement_rate", 0) > 0.3
-        include_voucher = context.get("days_since_last_purchase", 0) > 30
-        include_newsletter = True
-        
-        # Mock implementation
-        content_plan = {
-            "customer_id": customer_id,
-            "include_questions": include_questions,
-            "include_game": include_game,
-            "include_voucher": include_voucher,
-            "include_newsletter": include_newsletter,
-            "recommended_questions": ["What's your favorite product category?"] if include_questions else [],
-            "recommended_game": "Spin the Wheel" if include_game else None,
-            "recommended_voucher": "10% off next purchase" if include_voucher else None,
-            "newsletter_focus": "New summer collection",
-            "rationale": "Content mix optimized based on current profile completion and engagement history"
-        }
-        
-        return content_plan
+        logger.info("Selecting content for customer %s", customer_id)
+        return self.select_content_batch({customer_id: context})[customer_id]
+    
+    def select_content_batch(self, contexts: Dict[str, Dict[str, Any]],
+                             slots: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Select content for many customers, planning each distinct profile once.
+        
+        Each profile gets the content blocks with the highest predicted
+        engagement, up to the per-email slot budget and skipping blocks below
+        MIN_ENGAGEMENT_THRESHOLD. Block copy comes from the rendered block
+        cache, with default copy for blocks that have not been rendered yet.
+        
+        Args:
+            contexts: Dictionary mapping customer ID to its context
+            slots: Content blocks per email, defaults to EMAIL_CONTENT_SLOTS
+            
+        Returns:
+            Dictionary mapping customer ID to its content plan
+        """
+        logger.info("Selecting content for %s customers", len(contexts))
+        return self._build_plans(contexts, *self._content_mix(contexts, slots))
+    
+    async def select_content_batch_async(self, contexts: Dict[str, Dict[str, Any]],
+                                         slots: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Select content for many customers, rendering novel content blocks first.
+        
+        The LLM is called once for each (segment, journey_stage, block type)
+        that some customer was assigned and that is not in the cache yet.
+        
+        Args:
+            contexts: Dictionary mapping customer ID to its context
+            slots: Content blocks per email, defaults to EMAIL_CONTENT_SLOTS
+            
+        Returns:
+            Dictionary mapping customer ID to its content plan
+        """
+        logger.info("Selecting content for %s customers", len(contexts))
+        mix = await run_in_thread(self._content_mix, contexts, slots)
+        
+        profiles, _, include, _ = mix
+        await self._render_blocks({
+            (profile[0], profile[2], CONTENT_BLOCKS[block])
+            for index, profile in enumerate(profiles)
+            for block in np.flatnonzero(include[index])
+        })
+        return await run_in_thread(self._build_plans, contexts, *mix)
+    
+    def _profile_keys(self, contexts: Dict[str, Dict[str, Any]]) -> List[tuple]:
+        """Reduce each context to the inputs that drive the content mix and copy."""
+        bands = age_bands(np.fromiter(
+            (context.get("attributes", {}).get("age", DEFAULT_AGE) for context in contexts.values()),
+            dtype=float, count=len(contexts)
+        )).tolist()
+        return [
+            (
+                context.get("segment", DEFAULT_SEGMENT),
+                band,
+                context.get("journey_stage"),
+                context.get("profile_completion", 0) < 1.0
+            )
+            for context, band in zip(contexts.values(), bands)
+        ]
+    
+    def _content_mix(self, contexts: Dict[str, Dict[str, Any]],
+                     slots: Optional[int] = None) -> Tuple[List[tuple], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score content blocks for each distinct profile and pick the mix.
+        
+        Returns:
+            Tuple of (profiles, profile index per customer, block inclusion
+            matrix per profile, engagement probabilities per profile)
+        """
+        slots = settings.EMAIL_CONTENT_SLOTS if slots is None else slots
+        
+        profile_index: Dict[tuple, int] = {}
+        representatives = []
+        profile_of = np.empty(len(contexts), dtype=np.int64)
+        for position, (key, context) in enumerate(zip(self._profile_keys(contexts), contexts.values())):
+            index = profile_index.setdefault(key, len(profile_index))
+            if index == len(representatives):
+                representatives.append(context)
+            profile_of[position] = index
+            
+        probabilities = self.engagement_predictor.predict_engagement_batch(representatives, CONTENT_BLOCKS)
+        profiles = list(profile_index)
+        
+        # Questions only make sense while the profile is incomplete
+        scores = probabilities.copy()
+        scores[~np.array([profile[3] for profile in profiles], dtype=bool), CONTENT_BLOCKS.index("question")] = -np.inf
+        
+        ranked = np.argsort(-scores, axis=1, kind="stable")[:, :slots]
+        include = np.zeros(scores.shape, dtype=bool)
+        np.put_along_axis(include, ranked, True, axis=1)
+        include &= scores >= settings.MIN_ENGAGEMENT_THRESHOLD
+        
+        return profiles, profile_of, include, probabilities
+    
+    def _build_plans(self, contexts: Dict[str, Dict[str, Any]],
+                     profiles: List[tuple],
+                     profile_of: np.ndarray,
+                     include: np.ndarray,
+                     probabilities: np.ndarray) -> Dict[str, Dict[str, Any]]:
+        """Build one content plan per profile and copy it for each of its customers."""
+        plans_by_profile = []
+        for index, (segment, _, journey_stage, _) in enumerate(profiles):
+            blocks = {
+                block: self.content_blocks.get((segment, journey_stage, block), DEFAULT_BLOCKS[block])
+                for block in CONTENT_BLOCKS
+            }
+            included = dict(zip(CONTENT_BLOCKS, include[index].tolist()))
+            plans_by_profile.append({
+                "include_questions": included["question"],
+                "include_game": included["game"],
+                "include_voucher": included["voucher"],
+                "include_newsletter": included["newsletter"],
+                "recommended_questions": [blocks["question"]] if included["question"] else [],
+                "recommended_game": blocks["game"] if included["game"] else None,
+                "recommended_voucher": blocks["voucher"] if included["voucher"] else None,
+                "newsletter_focus": blocks["newsletter"] if included["newsletter"] else None,
+                "engagement_probabilities": dict(zip(CONTENT_BLOCKS, probabilities[index].tolist())),
+                "rationale": f"Content blocks with the highest predicted engagement for {segment} customers"
+            })
+            
+        content_plans = {}
+        for customer_id, index in zip(contexts, profile_of.tolist()):
+            content_plan = dict(plans_by_profile[index])
+            content_plan["customer_id"] = customer_id
+            content_plans[customer_id] = content_plan
+            
+        logger.info("Generated %s distinct content plans", len(plans_by_profile))
+        return content_plans
+    
+    async def _render_blocks(self, keys: set) -> None:
+        """Render content blocks missing from the cache, once per key even across concurrent batches."""
+        missing = [key for key in keys if key not in self.content_blocks]
+        for key in missing:
+            if key not in self._rendering:
+                self._rendering[key] = asyncio.ensure_future(self._render_block(key))
+        if missing:
+            logger.info("Rendering %s novel content blocks", len(missing))
+            await asyncio.gather(*(self._rendering[key] for key in missing))
+    
+    async def _render_block(self, key: BlockKey) -> None:
+        """
+        Generate one content block with the LLM and cache it.
+        
+        Mock and error responses are not cached, so the block keeps its default
+        copy and is rendered again by a later batch. The cache holds at most
+        CONTENT_BLOCK_CACHE_SIZE blocks, evicting the oldest rendered first.
+        """
+        segment, journey_stage, block = key
+        try:
+            content = await self.llm_service.generate_personalized_content(
+                {}, block, {"segment": segment, "journey_stage": journey_stage, "example": DEFAULT_BLOCKS[block]}
+            )
+            if is_fallback_response(content):
+                logger.warning("No content generated for %s block (%s, %s), using default copy",
+                               block, segment, journey_stage)
+                return
+            self.content_blocks[key] = content
+            while len(self.content_blocks) > settings.CONTENT_BLOCK_CACHE_SIZE:
+                self.content_blocks.popitem(last=False)
+        finally:
+            self._rendering.pop(key, None)
@@ -1,8 +1,21 @@
 """
 Agent responsible for analyzing customer engagement and optimizing strategies.
 """
-from typing import Dict, Any, List
+import asyncio
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
 from workspace.utils.logger import setup_logger
+from workspace.utils.timestamps import to_utc_timestamp
+from workspace.utils.executors import get_thread_pool, run_in_thread
+from workspace.data.event_store import EventStore, events_to_frame, get_event_store
+from workspace.data.feature_store import OnlineFeatureStore, get_feature_store
+from workspace.data.processors import (
+    EngagementEventProcessor, DAY_NS, WEEK_NS, _count_distinct_pairs, _epoch_ns
+)
 from workspace.models.churn_prediction import ChurnPredictor
 
 logger = setup_logger(__name__)
@@ -15,21 +28,32 @@ class EngagementAnalysisAgent:
         logger.info("Engagement Analysis Agent initialized")
     
     def analyze_engagement(self, customer_id: str, 
-                          engagement_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+                          engagement_history: Optional[List[Dict[str, Any]]] = None,
+                          as_of: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Analyze a customer's engagement patterns and provide insights.
         
         Args:
             customer_id: The ID of the customer
-            engagement_history: History of customer interactions
-            
+            engagement_history: Optional history of customer interactions; when
+                omitted, the customer's row in the online feature store is used
+            as_of: Optional reference time for recency, defaults to now (UTC)
+        
         Returns:
             Analysis results with engagement metrics and recommendations
         """
-        logger.info(f"Analyzing engagement for customer {customer_id}")
+        logger.info("Analyzing engagement for customer %s", customer_id)
+        
+        if engagement_history is None:
+            analysis = self.analyze_engagement_online([customer_id], as_of)
+        else:
+            events = events_to_frame(engagement_history)
+            events = events[events["timestamp"].notna().to_numpy()]
+            # The history belongs to one customer even if events omit the ID
+            events = events.assign(customer_id=pd.Categorical([customer_id] * len(events)))
+            analysis = self.analyze_engagement_batch(events, as_of)
         
-        # Calculate engagement metrics
-        if not engagement_history:
+        if not len(analysis) or not analysis["total_events"].iloc[0]:
             return {
                 "customer_id": customer_id,
                 "engagement_score": 0,
@@ -37,62 +61,281 @@ class EngagementAnalysisAgent:
                 "recommended_action": "Send welcome series",
                 "rationale": "New customer with no engagement history"
             }
-            
-        # Calculate open rate, click rate, etc.
-        total_emails = len(engagement_history)
-        opens = sum(1 for e in engagement_history if e.get("opened", False))
-        clicks = sum(1 for e in engagement_history if e.get("clicked", False))
-        
-        open_rate = opens / total_emails if total_emails > 0 else 0
-        click_rate = clicks / opens if opens > 0 else 0
-        
-        # Use churn predictor to assess risk
-        churn_risk = self.churn_predictor.predict_churn_probability(
-            customer_id, engagement_history
+        return self._analysis_record(customer_id, analysis.iloc[0])
+    
+    def analyze_engagement_batch(self, events: pd.DataFrame,
+                                 as_of: Optional[datetime] = None,
+                                 customer_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Analyze engagement for every customer in a columnar event frame at once.
+        
+        Per-customer event type counts and recency are computed in one pass
+        and shared by the engagement rates and the churn model. Open rate is
+        opens per email sent; when sends are not in the history, every email
+        the customer responded to counts as one send.
+        
+        Args:
+            events: Event frame in the event store schema
+            as_of: Optional reference time for recency, defaults to now (UTC)
+            customer_ids: Optional customers to analyze; those without events
+                get zero rates and the default churn risk of 0.5
+        
+        Returns:
+            Frame indexed by customer_id with open_rate, click_rate,
+            overall_engagement, churn_risk, total_events and recommended_action
+        """
+        as_of = to_utc_timestamp(as_of) or pd.Timestamp.now(tz="UTC")
+        features = self.churn_predictor.event_processor.customer_features(
+            events[events["timestamp"].notna().to_numpy()], as_of
         )
+        return self._analyze_features(features, customer_ids)
+    
+    def analyze_engagement_online(self, customer_ids: List[str],
+                                  as_of: Optional[datetime] = None,
+                                  feature_store: Optional[OnlineFeatureStore] = None) -> pd.DataFrame:
+        """
+        Analyze engagement from the online feature store instead of event history.
         
-        # Determine recommended action based on engagement and churn risk
-        if churn_risk > 0.7:
-            action = "Initiate re-engagement campaign with high-value incentive"
-        elif churn_risk > 0.4:
-            action = "Adjust content mix to focus on more interactive elements"
-        else:
-            action = "Continue current engagement strategy"
-            
+        Each customer's features are a row lookup, so the cost does not grow
+        with the length of their history.
+        
+        Args:
+            customer_ids: Customers to analyze; those without events get zero
+                rates and the default churn risk of 0.5
+            as_of: Optional reference time for recency, defaults to now (UTC)
+            feature_store: Optional store, defaults to the shared one
+        
+        Returns:
+            Frame indexed by customer_id, as for analyze_engagement_batch
+        """
+        feature_store = feature_store if feature_store is not None else get_feature_store()
+        return self._analyze_features(feature_store.features(customer_ids, as_of), customer_ids)
+    
+    def _analyze_features(self, features: pd.DataFrame,
+                          customer_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """Compute engagement rates, churn risk and the recommended action from per-customer features."""
+        def counts(event_type: str) -> np.ndarray:
+            column = f"{event_type}_count"
+            return features[column].to_numpy() if column in features else np.zeros(len(features), dtype=np.int64)
+        
+        sent, opens, clicks = counts("email_sent"), counts("email_open"), counts("email_click")
+        emails = np.maximum(sent, opens)
+        open_rate = np.divide(opens, emails, out=np.zeros(len(features)), where=emails > 0)
+        click_rate = np.minimum(np.divide(clicks, opens, out=np.zeros(len(features)), where=opens > 0), 1.0)
+        churn_risk = self.churn_predictor.predict_churn_from_features(features).to_numpy()
+        
+        analysis = pd.DataFrame({
+            "open_rate": open_rate,
+            "click_rate": click_rate,
+            "overall_engagement": (open_rate + click_rate) / 2,
+            "churn_risk": churn_risk,
+            "total_events": features["total_events"].to_numpy()
+        }, index=features.index.astype(object))
+        if customer_ids is not None:
+            analysis = analysis.reindex(customer_ids)
+            analysis["churn_risk"] = analysis["churn_risk"].fillna(0.5)
+            analysis = analysis.fillna(0)
+            analysis["total_events"] = analysis["total_events"].astype(np.int64)
+        
+        # Determine recommended action based on churn risk
+        analysis["recommended_action"] = np.select(
+            [analysis["churn_risk"].to_numpy() > 0.7, analysis["churn_risk"].to_numpy() > 0.4],
+            ["Initiate re-engagement campaign with high-value incentive",
+             "Adjust content mix to focus on more interactive elements"],
+            "Continue current engagement strategy"
+        )
+        return analysis
+    
+    def _analysis_record(self, customer_id: str, row: pd.Series) -> Dict[str, Any]:
+        """Format one row of analyze_engagement_batch as an analysis result."""
         return {
             "customer_id": customer_id,
             "engagement_metrics": {
-                "open_rate": open_rate,
-                "click_rate": click_rate,
-                "overall_engagement": (open_rate + click_rate) / 2
+                "open_rate": float(row["open_rate"]),
+                "click_rate": float(row["click_rate"]),
+                "overall_engagement": float(row["overall_engagement"])
             },
-            "churn_risk": churn_risk,
-            "recommended_action": action,
-            "rationale": f"Based on {total_emails} interactions with {open_rate:.2f} open rate"
+            "churn_risk": float(row["churn_risk"]),
+            "recommended_action": row["recommended_action"],
+            "rationale": f"Based on {int(row['total_events'])} interactions with {row['open_rate']:.2f} open rate"
         }
     
-    def identify_disengaged_customers(self, 
-                                     threshold: float = 0.1) -> List[Dict[str, Any]]:
+    async def analyze_engagement_async(self, customer_id: str, 
+                                      engagement_history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Run analyze_engagement on the thread pool.
+        
+        The analysis is columnar NumPy work, so a worker thread keeps it off
+        the event loop without pickling the agent to a worker process.
+        
+        Args:
+            customer_id: The ID of the customer
+            engagement_history: Optional history of customer interactions;
+                when omitted, the online feature store is used
+        
+        Returns:
+            Analysis results with engagement metrics and recommendations
+        """
+        return await run_in_thread(self.analyze_engagement, customer_id, engagement_history)
+    
+    async def identify_disengaged_customers(self, 
+                                           threshold: float = 0.1,
+                                           lookback_days: int = 90,
+                                           as_of: Optional[datetime] = None,
+                                           event_store: Optional[EventStore] = None,
+                                           partitions: Optional[int] = None,
+                                           chunk_customers: int = 50_000) -> AsyncIterator[Dict[str, Any]]:
         """
         Identify customers who are disengaged and at risk of dropping off.
         
+        The engagement score is the share of weeks in the lookback window with
+        at least one open, click, claim or purchase. Only the lookback window
+        is loaded; the last engagement of customers idle for the whole window
+        is found by scanning earlier history one window at a time, stopping
+        once each of them is resolved or their first event is reached. Window
+        events are sorted by customer once, and customers are scored in chunks
+        of consecutive customer codes sliced from that order. Partitions of the
+        customer range are scanned in parallel on the thread pool, and results
+        are yielded as soon as each chunk is scored.
+        
         Args:
             threshold: Engagement threshold below which customers are considered disengaged
-            
-        Returns:
-            List of disengaged customers with metrics and recommendations
+            lookback_days: Days of history the engagement score covers
+            as_of: Optional reference time, defaults to now (UTC)
+            event_store: Optional event store, defaults to the shared store
+            partitions: Number of partitions scanned in parallel, defaults to one per CPU
+            chunk_customers: Customers scored per chunk
+        
+        Yields:
+            Disengaged customers with metrics and recommendations
         """
-        logger.info(f"Identifying disengaged customers (threshold: {threshold})")
-        
-        # In a real implementation, would query database for customers with low engagement
-        
-        # Mock implementation
-        return [
-            {
-                "customer_id": "cust123",
-                "last_engagement_date": "2023-05-15",
-                "days_since_engagement": 30,
-                "engagement_score": 0.05,
-                "recommended_action": "Send final re-engagement email or reduce frequency"
-            }
-        ]
+        logger.info("Identifying disengaged customers (threshold: %s)", threshold)
+        
+        event_store = event_store if event_store is not None else get_event_store()
+        as_of = to_utc_timestamp(as_of) or pd.Timestamp.now(tz="UTC")
+        
+        # Customers are coded by position in the store's sorted customer IDs
+        customers = event_store.customer_ids()
+        first_seen = _epoch_ns(event_store.first_seen().reindex(customers))
+        eligible = first_seen <= as_of.value
+        window_start = as_of.value - lookback_days * DAY_NS
+        codes, timestamps = _engagement_events(event_store, customers, window_start, as_of.value)
+        
+        last = np.full(len(customers), -1, dtype=np.int64)
+        np.maximum.at(last, codes, timestamps)
+        _fill_last_engagement(event_store, customers, first_seen, last, eligible,
+                              window_start, lookback_days * DAY_NS)
+        
+        order = np.argsort(codes, kind="stable")
+        columns = {
+            "codes": codes[order],
+            "timestamps": timestamps[order],
+            "last": last,
+            "eligible": eligible
+        }
+        partitions = max(1, min(partitions or os.cpu_count() or 1, len(customers)))
+        bounds = np.linspace(0, len(customers), partitions + 1).astype(np.int64)
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * partitions)
+        stopped = threading.Event()
+        
+        def scan_partition(lo: int, hi: int) -> None:
+            try:
+                for chunk_lo in range(lo, hi, chunk_customers):
+                    if stopped.is_set():
+                        break
+                    chunk = _score_chunk(columns, chunk_lo, min(chunk_lo + chunk_customers, hi),
+                                         as_of.value, lookback_days, threshold)
+                    # Blocks the worker while the consumer is behind
+                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+            finally:
+                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+        
+        workers = [loop.run_in_executor(get_thread_pool(), scan_partition, lo, hi)
+                   for lo, hi in zip(bounds[:-1], bounds[1:])]
+        
+        remaining = partitions
+        try:
+            while remaining:
+                chunk = await queue.get()
+                if chunk is None:
+                    remaining -= 1
+                    continue
+                for code, score, last_engagement, days_since in zip(*chunk):
+                    yield {
+                        "customer_id": customers[code],
+                        "last_engagement_date": (
+                            pd.Timestamp(last_engagement, tz="UTC").date().isoformat()
+                            if last_engagement >= 0 else None
+                        ),
+                        "days_since_engagement": int(days_since) if last_engagement >= 0 else None,
+                        "engagement_score": float(score),
+                        "recommended_action": (
+                            "Send final re-engagement email or reduce frequency"
+                            if last_engagement < 0 or days_since > 60 else "Send re-engagement incentive"
+                        )
+                    }
+        finally:
+            # The consumer may stop early; unblock workers waiting on a full queue
+            stopped.set()
+            while remaining:
+                if await queue.get() is None:
+                    remaining -= 1
+        
+        # Surface worker errors
+        await asyncio.gather(*workers)
+
+def _engagement_events(event_store: EventStore, customers: np.ndarray,
+                       start_ns: int, end_ns: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the engagement events in [start_ns, end_ns] as customer codes and epoch nanoseconds.
+    
+    Codes index the store's sorted customer IDs.
+    """
+    events = event_store.scan(pd.Timestamp(start_ns, tz="UTC"), pd.Timestamp(end_ns, tz="UTC"),
+                              columns=["customer_id", "event_type", "timestamp"])
+    engaged = events["event_type"].isin(EngagementEventProcessor.ENGAGEMENT_EVENT_TYPES).to_numpy()
+    customer_ids = events["customer_id"].array
+    positions = np.searchsorted(customers, np.asarray(customer_ids.categories, dtype=object))
+    codes = positions[customer_ids.codes[engaged]].astype(np.int64)
+    return codes, _epoch_ns(events["timestamp"])[engaged]
+
+def _fill_last_engagement(event_store: EventStore, customers: np.ndarray, first_seen: np.ndarray,
+                          last: np.ndarray, eligible: np.ndarray, before_ns: int, step_ns: int) -> None:
+    """Fill in the last engagement of eligible customers with none since before_ns, one step of history at a time."""
+    unresolved = eligible & (last < 0)
+    end_ns = before_ns - 1
+    while unresolved.any() and end_ns >= first_seen[unresolved].min():
+        start_ns = end_ns - step_ns + 1
+        codes, timestamps = _engagement_events(event_store, customers, start_ns, end_ns)
+        found = np.full(len(customers), -1, dtype=np.int64)
+        np.maximum.at(found, codes, timestamps)
+        last[unresolved] = found[unresolved]
+        # Customers whose first event is in this step have no earlier history
+        unresolved &= (last < 0) & (first_seen < start_ns)
+        end_ns = start_ns - 1
+
+def _score_chunk(columns: Dict[str, np.ndarray], lo: int, hi: int, as_of_ns: int,
+                 lookback_days: int, threshold: float) -> Tuple[np.ndarray, ...]:
+    """
+    Score the customers with codes in [lo, hi) and keep the disengaged ones.
+    
+    Returns:
+        Tuple of (codes, scores, last engagement in epoch ns or -1, days since last engagement)
+    """
+    codes = columns["codes"]
+    rows = slice(*np.searchsorted(codes, [lo, hi]))
+    local = codes[rows] - lo
+    times = columns["timestamps"][rows]
+    n = hi - lo
+    
+    weeks = -(-lookback_days // 7)
+    week = np.minimum((as_of_ns - times) // WEEK_NS, weeks - 1)
+    active_weeks = _count_distinct_pairs(local, week, n, weeks)
+    scores = active_weeks / weeks
+    
+    disengaged = np.flatnonzero((scores < threshold) & columns["eligible"][lo:hi])
+    last = columns["last"][lo + disengaged]
+    days_since = (as_of_ns - last) // DAY_NS
+    return disengaged + lo, scores[disengaged], last, days_since
@@ -3,8 +3,10 @@ Agent responsible for matching customers with the most appropriate rewards.
 """
 from typing import List, Dict, Any
 from workspace.utils.logger import setup_logger
+from workspace.utils.executors import run_in_thread
 from workspace.services.llm_service import LLMService
 from workspace.models.recommendation import RewardRecommender
+from workspace.data.loaders import CustomerDataLoader, RewardDataLoader
 
 logger = setup_logger(__name__)
 
@@ -14,6 +16,8 @@ class RewardMatchingAgent:
     def __init__(self):
         self.llm_service = LLMService()
         self.recommender = RewardRecommender()
+        self.customer_loader = CustomerDataLoader()
+        self.reward_loader = RewardDataLoader()
         logger.info("Reward Matching Agent initialized")
     
     def get_recommendations(self, customer_id: str, limit: int = 5) -> List[Dict[str, Any]]:
@@ -27,33 +31,60 @@ class RewardMatchingAgent:
         Returns:
             List of recommended rewards with scores and rationale
         """
-        logger.info(f"Generating reward recommendations for customer {customer_id}")
+        logger.info("Generating reward recommendations for customer %s", customer_id)
+        return self.get_recommendations_batch([customer_id], limit)[customer_id]
+    
+    def get_recommendations_batch(self, customer_ids: List[str], 
+                                  limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get reward recommendations for many customers at once.
+        
+        Customers are loaded once and scored together against one snapshot
+        of the in-memory reward catalog, instead of once per customer.
+        
+        Args:
+            customer_ids: IDs of the customers
+            limit: Maximum number of recommendations to return per customer
+            
+        Returns:
+            Dictionary mapping customer ID to its recommended rewards
+        """
+        logger.info("Generating reward recommendations for %s customers", len(customer_ids))
+        
+        customers = self.customer_loader.load_customers(customer_ids)
+        catalog = self.reward_loader.load_catalog()
+        ranked = self.recommender.recommend_batch(customers, catalog, top_n=limit)
         
-        # In a real implementation:
-        # 1. Fetch customer data
-        # 2. Fetch available rewards
-        # 3. Use recommender model to rank rewards
-        # 4. Use LLM to generate rationale for top recommendations
+        # In a real implementation, would use the LLM to explain top recommendations
+        rationale = ("Ranked by the trained recommendation model" if self.recommender.model_ready
+                     else "Ranked by reward type and customer tenure")
         
-        # Mock implementation
-        recommendations = [
-            {
-                "customer_id": customer_id,
-                "reward_id": "reward1",
-                "reward_name": "10% Discount",
-                "score": 0.92,
-                "rationale": "Based on customer demographics and past engagement with similar offers"
-            },
-            {
-                "customer_id": customer_id,
-                "reward_id": "reward2",
-                "reward_name": "Free Shipping",
-                "score": 0.85,
-                "rationale": "Customer has abandoned cart multiple times, possibly due to shipping costs"
-            }
-        ]
+        return {
+            customer_id: [
+                {
+                    "customer_id": customer_id,
+                    "reward_id": rec["reward_id"],
+                    "reward_name": rec["reward_name"],
+                    "score": rec["score"],
+                    "rationale": rationale
+                }
+                for rec in recommendations
+            ]
+            for customer_id, recommendations in zip(customer_ids, ranked)
+        }
+    
+    async def get_recommendations_async(self, customer_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Run get_recommendations on the thread pool.
         
-        return recommendations[:limit]
+        Args:
+            customer_id: The ID of the customer
+            limit: Maximum number of recommendations to return
+            
+        Returns:
+            List of recommended rewards with scores and rationale
+        """
+        return await run_in_thread(self.get_recommendations, customer_id, limit)
         
     def train(self, historical_data: List[Dict[str, Any]]) -> None:
         """
@@ -62,5 +93,5 @@ class RewardMatchingAgent:
         Args:
             historical_data: List of customer-reward interactions with outcomes
         """
-        logger.info(f"Training reward matching model with {len(historical_data)} records")
+        logger.info("Training reward matching model with %s records", len(historical_data))
         self.recommender.train(historical_data)
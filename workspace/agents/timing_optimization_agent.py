@@ -1,8 +1,16 @@
 """
 Agent responsible for optimizing email delivery timing.
 """
-from datetime import datetime, timedelta
-from typing import Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from workspace.settings import settings
+from workspace.data.send_time import SendTimeHistograms, assign_slots, get_send_time_histograms
+from workspace.data.frequency import (
+    FatigueCurves, SendCounters, MAX_INTERVAL_DAYS, PRIOR_SENDS, SEGMENTS, get_fatigue_curves, get_send_counters
+)
+from workspace.data.rollups import NEW_CUSTOMER_SEGMENT
 from workspace.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -10,37 +18,137 @@ logger = setup_logger(__name__)
 class TimingOptimizationAgent:
     """Agent that determines the optimal timing for customer communications."""
     
-    def __init__(self):
+    def __init__(self, histograms: Optional[SendTimeHistograms] = None,
+                 fatigue_curves: Optional[FatigueCurves] = None,
+                 send_counters: Optional[SendCounters] = None):
+        self._histograms = histograms
+        self._fatigue_curves = fatigue_curves
+        self._send_counters = send_counters
         logger.info("Timing Optimization Agent initialized")
     
-    def get_optimal_time(self, customer_id: str) -> Dict[str, Any]:
+    @property
+    def histograms(self) -> SendTimeHistograms:
+        """Hour-of-week engagement histograms, built from the event store on first use."""
+        if self._histograms is None:
+            self._histograms = get_send_time_histograms()
+        return self._histograms
+    
+    @property
+    def fatigue_curves(self) -> FatigueCurves:
+        """Per-segment fatigue curves, fitted from the event store on first use."""
+        if self._fatigue_curves is None:
+            self._fatigue_curves = get_fatigue_curves()
+        return self._fatigue_curves
+    
+    @property
+    def send_counters(self) -> SendCounters:
+        """Per-customer send counters."""
+        if self._send_counters is None:
+            self._send_counters = get_send_counters()
+        return self._send_counters
+    
+    def get_optimal_time(self, customer_id: str, 
+                         now: Optional[datetime] = None) -> Dict[str, Any]:
         """
         Determine the optimal time to send an email to a customer.
         
+        Picks the hour of the week with the most opens and clicks in the
+        customer's history, smoothed towards their segment's pattern, and
+        schedules the next occurrence of that hour.
+        
         Args:
             customer_id: The ID of the customer
+            now: Optional current time, defaults to now (UTC)
             
         Returns:
             Dictionary with optimal send time and day of week
         """
-        logger.info(f"Calculating optimal send time for customer {customer_id}")
+        logger.info("Calculating optimal send time for customer %s", customer_id)
         
-        # In a real implementation:
-        # 1. Analyze customer's past engagement patterns
-        # 2. Consider timezone and typical active hours
-        # 3. Account for day of week preferences
+        slot = self.histograms.best_slot(customer_id)
         
-        # Mock implementation - would use ML model in real scenario
-        now = datetime.now()
-        suggested_time = now + timedelta(days=1, hours=4)  # tomorrow, 4 hours later
+        now = now or datetime.now(timezone.utc)
+        now = now.replace(tzinfo=timezone.utc) if now.tzinfo is None else now.astimezone(timezone.utc)
+        current_hour = now.weekday() * 24 + now.hour
+        # Next occurrence of the slot, at least one hour ahead
+        hours_ahead = (slot["hour_of_week"] - current_hour - 1) % 168 + 1
+        suggested_time = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=hours_ahead)
+        
+        if slot["events"]:
+            rationale = f"Based on {slot['events']} previous opens and clicks, weighted with the segment pattern"
+        else:
+            rationale = "No previous opens or clicks; based on the segment's engagement pattern"
         
         return {
             "customer_id": customer_id,
             "optimal_day": suggested_time.strftime("%A"),
             "optimal_hour": suggested_time.hour,
             "optimal_datetime": suggested_time.isoformat(),
-            "confidence": 0.82,
-            "rationale": "Based on previous open patterns and timezone analysis"
+            "confidence": round(slot["evidence_weight"], 2),
+            "rationale": rationale
+        }
+        
+    def plan_send_slots(self, customer_ids: List[str], 
+                        day: Optional[date] = None,
+                        hourly_capacity: Union[int, Sequence[int], None] = None) -> Dict[str, Any]:
+        """
+        Assign a day's audience to send hours under per-hour capacity limits.
+        
+        Customers are scored for each hour of the day with the same
+        histograms as get_optimal_time. Slots are then assigned greedily to
+        maximize predicted opens without exceeding the provider's hourly
+        capacity.
+        
+        Args:
+            customer_ids: The day's audience
+            day: Day to plan (UTC), defaults to today
+            hourly_capacity: Maximum sends per hour, either one limit or 24
+                per-hour limits (defaults to EMAIL_HOURLY_SEND_CAPACITY)
+            
+        Returns:
+            Dictionary with an assignments frame (customer_id, send_at, hour,
+            open_probability), the per-hour load profile, expected opens and
+            the customers that did not fit
+        """
+        logger.info("Planning send slots for %s customers", len(customer_ids))
+        
+        day = day or datetime.now(timezone.utc).date()
+        capacity = np.broadcast_to(
+            np.asarray(hourly_capacity if hourly_capacity is not None else settings.EMAIL_HOURLY_SEND_CAPACITY), 
+            (24,)
+        ).astype(np.int64)
+        
+        bins = day.weekday() * 24 + np.arange(24)
+        scores = self.histograms.slot_probabilities(customer_ids, bins)
+        hours = assign_slots(scores, capacity)
+        
+        scheduled = hours >= 0
+        open_probability = scores[np.flatnonzero(scheduled), hours[scheduled]]
+        day_start = pd.Timestamp(day, tz="UTC")
+        assignments = pd.DataFrame({
+            "customer_id": np.asarray(customer_ids, dtype=object)[scheduled],
+            "send_at": day_start + pd.to_timedelta(hours[scheduled], unit="h"),
+            "hour": hours[scheduled],
+            "open_probability": open_probability
+        })
+        
+        load = np.bincount(hours[scheduled], minlength=24)
+        expected = np.bincount(hours[scheduled], weights=open_probability, minlength=24)
+        
+        return {
+            "date": day.isoformat(),
+            "assignments": assignments,
+            "load_profile": [
+                {
+                    "hour": hour,
+                    "scheduled": int(load[hour]),
+                    "capacity": int(capacity[hour]),
+                    "expected_opens": float(expected[hour])
+                }
+                for hour in range(24)
+            ],
+            "expected_opens": float(open_probability.sum()),
+            "unscheduled": list(np.asarray(customer_ids, dtype=object)[~scheduled])
         }
         
     def get_optimal_frequency(self, customer_id: str, 
@@ -48,6 +156,10 @@ class TimingOptimizationAgent:
         """
         Determine the optimal frequency for sending emails to a customer.
         
+        Uses the fatigue curve of the customer's segment when send history is
+        available, and the customer's engagement score otherwise. The interval
+        is doubled once MAX_EMAILS_BEFORE_DOWNGRADE emails in a row went unopened.
+        
         Args:
             customer_id: The ID of the customer
             engagement_metrics: Metrics about customer engagement
@@ -55,21 +167,67 @@ class TimingOptimizationAgent:
         Returns:
             Dictionary with optimal frequency in days
         """
-        logger.info(f"Calculating optimal frequency for customer {customer_id}")
-        
-        # Analyze engagement to determine if frequency should be adjusted
-        engagement_score = engagement_metrics.get("average_engagement", 0)
+        logger.info("Calculating optimal frequency for customer %s", customer_id)
         
-        if engagement_score > 0.7:
-            days = 3  # High engagement, more frequent
-        elif engagement_score > 0.3:
-            days = 7  # Medium engagement, weekly
+        curves = self.fatigue_curves
+        if curves.fitted:
+            segment = curves.segments.get(customer_id, NEW_CUSTOMER_SEGMENT)
+            position = SEGMENTS.index(segment)
+            days = int(curves.optimal_intervals()[position])
+            segment_sends = int(curves.sends[position].sum())
+            confidence = round(segment_sends / (segment_sends + PRIOR_SENDS), 2)
+            rationale = f"Based on the fatigue curve of {segment} customers ({segment_sends} sends)"
         else:
-            days = 14  # Low engagement, less frequent
+            # Analyze engagement to determine if frequency should be adjusted
+            engagement_score = engagement_metrics.get(
+                "overall_engagement", engagement_metrics.get("average_engagement", 0))
+            
+            days = int(_engagement_intervals(np.array([engagement_score]))[0])
+            confidence = 0.75
+            rationale = f"Based on engagement score of {engagement_score}"
+            
+        unopened = self.send_counters.get(customer_id)["unopened"]
+        if unopened >= settings.MAX_EMAILS_BEFORE_DOWNGRADE:
+            days = min(days * 2, MAX_INTERVAL_DAYS)
+            rationale += f"; reduced after {unopened} unopened emails"
             
         return {
             "customer_id": customer_id,
             "optimal_frequency_days": days,
-            "confidence": 0.75,
-            "rationale": f"Based on engagement score of {engagement_score}"
+            "confidence": confidence,
+            "rationale": rationale
         }
+    
+    def get_optimal_frequencies(self, customer_ids: List[str],
+                                engagement_scores: Optional[Sequence[float]] = None) -> pd.Series:
+        """
+        Determine send intervals for many customers at once.
+        
+        Matches get_optimal_frequency customer by customer: fatigue curves
+        when fitted, engagement score buckets otherwise.
+        
+        Args:
+            customer_ids: Customers to plan for
+            engagement_scores: Optional overall engagement per customer, used
+                when the fatigue curves are unfitted; missing scores count as 0
+            
+        Returns:
+            Series of intervals in days indexed by customer ID
+        """
+        curves = self.fatigue_curves
+        if curves.fitted:
+            segments = pd.Categorical(
+                curves.segments.reindex(customer_ids).fillna(NEW_CUSTOMER_SEGMENT), categories=SEGMENTS
+            ).codes
+            days = curves.optimal_intervals()[segments]
+        else:
+            scores = np.zeros(len(customer_ids)) if engagement_scores is None else np.asarray(engagement_scores, dtype=float)
+            days = _engagement_intervals(scores)
+            
+        downgraded = self.send_counters.unopened_for(customer_ids) >= settings.MAX_EMAILS_BEFORE_DOWNGRADE
+        days = np.where(downgraded, np.minimum(days * 2, MAX_INTERVAL_DAYS), days)
+        return pd.Series(days, index=customer_ids, name="optimal_frequency_days")
+
+def _engagement_intervals(scores: np.ndarray) -> np.ndarray:
+    """Send interval in days by engagement score: 3 when high, 7 when medium, 14 when low."""
+    return np.select([scores > 0.7, scores > 0.3], [3, 7], 14)
@@ -0,0 +1,40 @@
+"""
+Analytics API endpoints.
+"""
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, List, Optional
+from workspace.workflows.analytics import AnalyticsWorkflow
+from workspace.utils.logger import setup_logger
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+_workflow: Optional[AnalyticsWorkflow] = None
+
+def get_analytics_workflow() -> AnalyticsWorkflow:
+    """Get the shared analytics workflow, created on first use."""
+    global _workflow
+    if _workflow is None:
+        _workflow = AnalyticsWorkflow()
+    return _workflow
+
+@router.get("/report")
+async def get_report(start_date: Optional[str] = None,
+                     end_date: Optional[str] = None,
+                     use_rollups: Optional[bool] = None) -> Dict[str, Any]:
+    """Get the analytics report for a date range, answered from daily rollups when available."""
+    logger.info("Generating analytics report from %s to %s", start_date, end_date)
+    try:
+        return await get_analytics_workflow().execute(start_date, end_date, use_rollups)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/opportunities")
+async def get_opportunities(start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            min_claims: int = 30,
+                            limit: int = 10) -> List[Dict[str, Any]]:
+    """Get ranked optimization opportunities across segment, content, reward type and send hour."""
+    logger.info("Identifying optimization opportunities from %s to %s", start_date, end_date)
+    return await get_analytics_workflow().identify_optimization_opportunities(
+        start_date, end_date, min_claims, limit)
@@ -1,11 +1,18 @@
 """
 Customers API endpoints.
 """
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import AsyncIterator, List, Optional
+from pydantic import BaseModel, Field
+from workspace.settings import settings
 from workspace.data.schemas import Customer, CustomerCreate
 from workspace.agents.reward_matching_agent import RewardMatchingAgent
+from workspace.api.pagination import decode_cursor, ndjson_response, page_response
+from workspace.api.response_cache import etag_matches, get_recommendation_cache
+from workspace.api.serialization import dumps, response_rows, serialize_rows
+from workspace.data.loaders import CustomerDataLoader
+from workspace.utils.executors import run_in_thread
 from workspace.utils.logger import setup_logger
 
 router = APIRouter()
@@ -29,21 +36,98 @@ class RecommendedRewardResponse(BaseModel):
     class Config:
         from_attributes = True  # Updated from orm_mode
 
+class RecommendedRewardsBatchRequest(BaseModel):
+    customer_ids: List[str] = Field(..., min_length=1, max_length=settings.RECOMMENDATION_BATCH_MAX_CUSTOMERS)
+    limit: int = Field(default=5, ge=1, le=50)
+
+_reward_agent: Optional[RewardMatchingAgent] = None
+_customer_loader: Optional[CustomerDataLoader] = None
+
+def get_customer_loader() -> CustomerDataLoader:
+    """Get the shared customer loader, created on first use."""
+    global _customer_loader
+    if _customer_loader is None:
+        _customer_loader = CustomerDataLoader()
+    return _customer_loader
+
+def get_reward_agent() -> RewardMatchingAgent:
+    """Get the shared reward matching agent, created on first use."""
+    global _reward_agent
+    if _reward_agent is None:
+        _reward_agent = RewardMatchingAgent()
+    return _reward_agent
+
 @router.get("/", response_model=List[CustomerResponse])
-async def get_customers(skip: int = 0, limit: int = 100):
-    """Get all customers."""
-    logger.info(f"Fetching customers with params: skip={skip}, limit={limit}")
-    # Implementation would retrieve customers from database
-    return []
+async def get_customers(limit: int = Query(default=100, ge=1, le=1000),
+                        cursor: Optional[str] = None,
+                        stream: bool = False):
+    """
+    Get customers ordered by ID.
+    
+    Returns one page at a time, with the cursor of the next page in the
+    X-Next-Cursor header. With stream=true, every customer after the cursor
+    is streamed as NDJSON instead, reading EXPORT_PAGE_SIZE rows at a time.
+    """
+    logger.info("Fetching customers with params: cursor=%s, limit=%s, stream=%s", cursor, limit, stream)
+    after = decode_cursor(cursor)
+    loader = get_customer_loader()
+    if stream:
+        return ndjson_response(loader.iter_customer_pages(after, settings.EXPORT_PAGE_SIZE), CustomerResponse)
+    rows = await run_in_thread(loader.load_customer_page, after, limit)
+    return page_response(rows, CustomerResponse, limit)
 
 @router.get("/{customer_id}/recommended_rewards", response_model=List[RecommendedRewardResponse])
-async def get_recommended_rewards(customer_id: str, limit: int = 5):
-    """Get recommended rewards for a specific customer."""
-    logger.info(f"Getting recommended rewards for customer {customer_id}")
+async def get_recommended_rewards(customer_id: str, limit: int = 5,
+                                  if_none_match: Optional[str] = Header(default=None)):
+    """
+    Get recommended rewards for a specific customer.
+    
+    Serialized responses are cached per (customer_id, limit, model_version,
+    catalog_version) and carry an ETag; a matching If-None-Match gets a 304.
+    """
+    logger.info("Getting recommended rewards for customer %s", customer_id)
+    
+    agent = get_reward_agent()
+    cache = get_recommendation_cache()
+    key = cache.key(customer_id, limit, model_version=agent.recommender.model_version)
+    cached = cache.get(key)
+    if cached is None:
+        recommendations = await agent.get_recommendations_async(customer_id, limit)
+        body = serialize_rows(recommendations, RecommendedRewardResponse)
+        etag = cache.put(key, body)
+    else:
+        etag, body = cached
+    
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.post("/recommended_rewards:batch")
+async def get_recommended_rewards_batch(request: RecommendedRewardsBatchRequest) -> StreamingResponse:
+    """
+    Get recommended rewards for many customers, streamed as NDJSON.
+    
+    Customers are scored in chunks of RECOMMENDATION_BATCH_CHUNK_SIZE, each in
+    one vectorized pass, and every chunk is written out before the next one is
+    scored. Each line is {"customer_id": ..., "recommendations": [...]}, with
+    recommendations validated against RecommendedRewardResponse unless
+    FAST_JSON_RESPONSES is on.
+    """
+    logger.info("Getting recommended rewards for %s customers", len(request.customer_ids))
+    agent = get_reward_agent()
+    chunk_size = settings.RECOMMENDATION_BATCH_CHUNK_SIZE
     
-    # Use the reward matching agent to get recommendations
-    # In a real implementation, this would be properly instantiated and managed
-    agent = RewardMatchingAgent()
-    recommendations = agent.get_recommendations(customer_id, limit)
+    async def lines() -> AsyncIterator[bytes]:
+        for start in range(0, len(request.customer_ids), chunk_size):
+            chunk = request.customer_ids[start:start + chunk_size]
+            recommendations = await run_in_thread(agent.get_recommendations_batch, chunk, request.limit)
+            yield b"".join(
+                dumps({
+                    "customer_id": customer_id,
+                    "recommendations": response_rows(recommendations[customer_id], RecommendedRewardResponse)
+                }) + b"\n"
+                for customer_id in chunk
+            )
     
-    return recommendations
\ No newline at end of file
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,47 @@
+"""
+Event ingestion API endpoints.
+"""
+from datetime import datetime
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List, Optional, Union
+from pydantic import BaseModel, Field
+from workspace.settings import settings
+from workspace.services.event_ingestion import get_event_ingestor
+from workspace.utils.logger import setup_logger
+
+router = APIRouter()
+logger = setup_logger(__name__)
+
+class EngagementEventIn(BaseModel):
+    customer_id: str = Field(..., min_length=1)
+    event_type: str = Field(..., min_length=1)
+    timestamp: Optional[datetime] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+class IngestResponse(BaseModel):
+    accepted: int
+    pending: int
+
+@router.post("", response_model=IngestResponse, status_code=202)
+async def ingest_events(events: Union[EngagementEventIn, List[EngagementEventIn]]):
+    """
+    Accept one engagement event or an array of them.
+    
+    Events are buffered and written to the event store in micro-batches, so
+    a 202 means the events are queued; they are visible to scans and online
+    features within INGEST_FLUSH_INTERVAL seconds. Events without a
+    timestamp are stamped on arrival.
+    """
+    if not isinstance(events, list):
+        events = [events]
+    if len(events) > settings.INGEST_MAX_REQUEST_EVENTS:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {settings.INGEST_MAX_REQUEST_EVENTS} events per request")
+    
+    ingestor = get_event_ingestor()
+    try:
+        accepted = ingestor.submit([event.model_dump() for event in events])
+    except BufferError as e:
+        logger.warning("Rejecting %s events: %s", len(events), e)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return {"accepted": accepted, "pending": ingestor.pending}
@@ -1,10 +1,16 @@
 """
 Rewards API endpoints.
 """
-from fastapi import APIRouter, HTTPException, Depends
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional
 from pydantic import BaseModel
 from workspace.data.schemas import Reward, RewardCreate, RewardUpdate
+from workspace.settings import settings
+from workspace.api.pagination import decode_cursor, ndjson_response, page_response
+from workspace.api.response_cache import get_recommendation_cache
+from workspace.data.loaders import RewardDataLoader
+from workspace.utils.executors import run_in_thread
 from workspace.utils.logger import setup_logger
 
 router = APIRouter()
@@ -20,16 +26,42 @@ class RewardResponse(BaseModel):
     class Config:
         from_attributes = True  # Updated from orm_mode
     
+_reward_loader: Optional[RewardDataLoader] = None
+
+def get_reward_loader() -> RewardDataLoader:
+    """Get the shared reward loader, created on first use."""
+    global _reward_loader
+    if _reward_loader is None:
+        _reward_loader = RewardDataLoader()
+    return _reward_loader
+
 @router.get("/", response_model=List[RewardResponse])
-async def get_rewards(skip: int = 0, limit: int = 100, type: Optional[str] = None):
-    """Get all available rewards with optional filtering."""
-    logger.info(f"Fetching rewards with params: skip={skip}, limit={limit}, type={type}")
-    # Implementation would retrieve rewards from database
-    return []
+async def get_rewards(limit: int = Query(default=100, ge=1, le=1000),
+                      cursor: Optional[str] = None,
+                      type: Optional[str] = None,
+                      stream: bool = False):
+    """
+    Get available rewards ordered by ID, with optional filtering by type.
+    
+    Returns one page at a time, with the cursor of the next page in the
+    X-Next-Cursor header. With stream=true, every matching reward after the
+    cursor is streamed as NDJSON instead.
+    """
+    logger.info("Fetching rewards with params: cursor=%s, limit=%s, type=%s, stream=%s", cursor, limit, type, stream)
+    after = decode_cursor(cursor)
+    filters = {"type": type} if type else None
+    loader = get_reward_loader()
+    if stream:
+        return ndjson_response(loader.iter_reward_pages(after, settings.EXPORT_PAGE_SIZE, filters), RewardResponse)
+    rows = await run_in_thread(loader.load_reward_page, after, limit, filters)
+    return page_response(rows, RewardResponse, limit)
 
 @router.post("/", response_model=RewardResponse)
 async def create_reward(reward: RewardCreate):
     """Create a new reward."""
-    logger.info(f"Creating new reward: {reward.name}")
-    # Implementation would create a reward in database
-    return {}
\ No newline at end of file
+    logger.info("Creating new reward: %s", reward.name)
+    record = {"id": f"reward_{uuid.uuid4().hex[:8]}", **reward.model_dump(mode="json")}
+    await run_in_thread(get_reward_loader().save_reward, record)
+    # Drop cached recommendations only after the new catalog is visible
+    get_recommendation_cache().invalidate_catalog()
+    return record
\ No newline at end of file
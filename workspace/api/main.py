@@ -2,9 +2,11 @@
 Main API router configuration.
 """
 from fastapi import APIRouter
-from workspace.api.endpoints import rewards, customers
+from workspace.api.endpoints import rewards, customers, analytics, events
 
 router = APIRouter()
 
 router.include_router(rewards.router, prefix="/rewards", tags=["Rewards"])
 router.include_router(customers.router, prefix="/customers", tags=["Customers"])
+router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+router.include_router(events.router, prefix="/events", tags=["Events"])
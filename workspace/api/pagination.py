@@ -0,0 +1,88 @@
+"""
+Cursor pagination and NDJSON streaming helpers for list endpoints.
+"""
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from workspace.api.serialization import serialize_ndjson, serialize_rows
+from workspace.utils.executors import run_in_thread
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: str) -> str:
+    """
+    Encode the last ID of a page as an opaque cursor.
+    
+    Args:
+        last_id: ID of the last record on the page
+    
+    Returns:
+        URL-safe cursor string
+    """
+    return base64.urlsafe_b64encode(json.dumps({"after": last_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    """
+    Decode a cursor back to the ID to start after.
+    
+    Args:
+        cursor: Cursor from a previous response, or None for the first page
+    
+    Returns:
+        ID to start after, or None
+    
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(payload["after"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def page_response(rows: List[Dict[str, Any]], model: Type[BaseModel], limit: int) -> Response:
+    """
+    Serialize one page as a JSON list, with the next cursor in a header.
+    
+    The X-Next-Cursor header is only set when the page is full, so a client
+    stops when it is missing.
+    
+    Args:
+        rows: Records on the page, ordered by ID
+        model: Response model used to serialize each record
+        limit: Requested page size
+    
+    Returns:
+        JSON response
+    """
+    headers = {NEXT_CURSOR_HEADER: encode_cursor(rows[-1]["id"])} if len(rows) == limit else {}
+    return Response(content=serialize_rows(rows, model), media_type="application/json", headers=headers)
+
+def ndjson_response(pages: Iterator[List[Dict[str, Any]]], model: Type[BaseModel]) -> StreamingResponse:
+    """
+    Stream records as NDJSON, serializing each page as it is read.
+    
+    Pages are pulled from the loader on the thread pool, so only one page is
+    held in memory at a time.
+    
+    Args:
+        pages: Iterator of record pages, such as a loader's iter_*_pages
+        model: Response model used to serialize each record
+    
+    Returns:
+        Streaming response with one JSON object per line
+    """
+    async def lines() -> AsyncIterator[bytes]:
+        while True:
+            page = await run_in_thread(next, pages, None)
+            if page is None:
+                return
+            yield serialize_ndjson(page, model)
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,172 @@
+"""
+In-memory cache of serialized API responses with ETags and targeted invalidation.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+import pandas as pd
+from workspace.settings import settings
+from workspace.data.event_store import get_event_store
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CachedResponse = Tuple[str, bytes]
+
+class ResponseCache:
+    """
+    LRU cache of per-customer response bodies.
+    
+    Entries are keyed by (customer_id, *params, model_version,
+    customer_version, catalog_version) and store the serialized body with its
+    ETag. A catalog write bumps catalog_version and drops every entry; a
+    customer update bumps that customer's version and drops only their
+    entries. Responses computed under an outdated version are not stored.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.catalog_version = 0
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._keys_by_customer: Dict[str, Set[tuple]] = {}
+        self._customer_versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def key(self, customer_id: str, *params, model_version: int = 0) -> tuple:
+        """
+        Build the cache key for a response.
+        
+        Args:
+            customer_id: The ID of the customer the response is for
+            params: Request parameters that change the response
+            model_version: Version of the model that produced the response
+        
+        Returns:
+            Cache key including the customer's and the catalog's current versions
+        """
+        return (customer_id, *params, model_version, self._customer_versions.get(customer_id, 0), self.catalog_version)
+    
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Key from key()
+        
+        Returns:
+            Tuple of (etag, body), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key: tuple, body: bytes) -> str:
+        """
+        Cache a serialized response.
+        
+        Args:
+            key: Key from key()
+            body: Serialized response body
+        
+        Returns:
+            The response's ETag
+        """
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        with self._lock:
+            if key[-1] != self.catalog_version or key[-2] != self._customer_versions.get(key[0], 0):
+                # The catalog or the customer changed while the response was being computed
+                return etag
+            self._entries[key] = (etag, body)
+            self._entries.move_to_end(key)
+            self._keys_by_customer.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._forget(self._entries.popitem(last=False)[0])
+        return etag
+    
+    def invalidate_catalog(self) -> None:
+        """Drop all entries after a reward catalog write."""
+        with self._lock:
+            self.catalog_version += 1
+            self._entries.clear()
+            self._keys_by_customer.clear()
+        logger.info("Response cache invalidated for catalog version %s", self.catalog_version)
+    
+    def invalidate_customers(self, customer_ids: Iterable[str]) -> None:
+        """
+        Drop the entries of customers whose features changed.
+        
+        Args:
+            customer_ids: Customers to invalidate
+        """
+        with self._lock:
+            for customer_id in customer_ids:
+                self._customer_versions[customer_id] = self._customer_versions.get(customer_id, 0) + 1
+                for key in self._keys_by_customer.pop(customer_id, ()):
+                    self._entries.pop(key, None)
+    
+    def invalidate_events(self, events: pd.DataFrame) -> None:
+        """
+        Drop the entries of customers with newly appended events.
+        
+        Can be registered with EventStore.subscribe.
+        
+        Args:
+            events: Events frame in the event store schema
+        """
+        self.invalidate_customers(pd.unique(events["customer_id"].dropna().astype(object)))
+    
+    def _forget(self, key: tuple) -> None:
+        keys = self._keys_by_customer.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_customer[key[0]]
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag, using weak comparison.
+    
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or *
+        etag: Current ETag of the resource
+    
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+_recommendation_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_recommendation_cache() -> ResponseCache:
+    """
+    Get the process-wide recommendation response cache.
+    
+    The cache subscribes to the event store, so appended events invalidate
+    the affected customers.
+    
+    Returns:
+        The shared recommendation cache
+    """
+    global _recommendation_cache
+    with _cache_lock:
+        if _recommendation_cache is None:
+            _recommendation_cache = ResponseCache()
+            get_event_store().subscribe(_recommendation_cache.invalidate_events)
+        return _recommendation_cache
@@ -0,0 +1,129 @@
+"""
+Fast JSON serialization for hot API endpoints.
+
+Endpoints opt in by serializing through these helpers instead of returning
+data for FastAPI to validate against the response_model and encode. With
+FAST_JSON_RESPONSES enabled (it is off by default), rows we built ourselves
+are projected onto the response model's fields and encoded with orjson (or
+the json module if orjson is not installed), skipping re-validation of
+values; a row missing a required field still fails. With it disabled, the
+helpers validate through Pydantic as FastAPI would.
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple, Type
+import numpy as np
+from pydantic import BaseModel, TypeAdapter
+from workspace.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+def _default(value: Any) -> Any:
+    """Encode NumPy values for the json module fallback."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode content as compact JSON.
+    
+    Args:
+        content: JSON-compatible data, which may contain NumPy values
+    
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None and settings.FAST_JSON_RESPONSES:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, separators=(",", ":"), default=_default).encode()
+
+@lru_cache(maxsize=None)
+def _fields(model: Type[BaseModel]) -> Tuple[Tuple[str, ...], FrozenSet[str], Dict[str, Any]]:
+    """Get a model's field names, required field names and defaults of optional fields."""
+    fields = model.model_fields
+    required = frozenset(name for name, field in fields.items() if field.is_required())
+    defaults = {name: field.get_default(call_default_factory=True)
+                for name, field in fields.items() if name not in required}
+    return tuple(fields), required, defaults
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+def project(rows: Iterable[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Keep only the fields of a response model, without validating values.
+    
+    Missing optional fields get their defaults.
+    
+    Args:
+        rows: Records built by our own code
+        model: Response model whose fields to keep
+    
+    Returns:
+        List of dictionaries with the model's fields
+    
+    Raises:
+        ValueError: If a row is missing a required field
+    """
+    fields, required, defaults = _fields(model)
+    projected = []
+    for row in rows:
+        missing = required.difference(row)
+        if missing:
+            raise ValueError(f"{model.__name__} row is missing required fields: {', '.join(sorted(missing))}")
+        projected.append({field: row.get(field, defaults.get(field)) for field in fields})
+    return projected
+
+def response_rows(rows: Iterable[Dict[str, Any]], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Shape records by a response model, for embedding in a larger document.
+    
+    Args:
+        rows: Records built by our own code
+        model: Response model of each record
+    
+    Returns:
+        List of JSON-compatible dictionaries with the model's fields
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return project(rows, model)
+    adapter = _list_adapter(model)
+    return adapter.dump_python(adapter.validate_python(list(rows)), mode="json")
+
+def serialize_rows(rows: List[Dict[str, Any]], model: Type[BaseModel]) -> bytes:
+    """
+    Serialize records as a JSON list shaped by a response model.
+    
+    Args:
+        rows: Records built by our own code
+        model: Response model of each record
+    
+    Returns:
+        UTF-8 encoded JSON list
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return dumps(project(rows, model))
+    adapter = _list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(rows))
+
+def serialize_ndjson(rows: List[Dict[str, Any]], model: Type[BaseModel]) -> bytes:
+    """
+    Serialize records as NDJSON lines shaped by a response model.
+    
+    Args:
+        rows: Records built by our own code
+        model: Response model of each record
+    
+    Returns:
+        UTF-8 encoded lines, each ending in a newline
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return b"".join(dumps(row) + b"\n" for row in project(rows, model))
+    return b"".join(model.model_validate(row).model_dump_json().encode() + b"\n" for row in rows)
@@ -2,18 +2,43 @@
 """
 Main entry point for the Reward Personalization Agent.
 """
+import asyncio
+from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from workspace.api.main import router as api_router
 from workspace.settings import settings
 from workspace.utils.logger import setup_logger
+from workspace.services.event_ingestion import stop_event_ingestor
+from workspace.utils.executors import run_in_thread, shutdown_executors
+from workspace.data.feature_store import stop_feature_store
+from workspace.data.frequency import get_send_counters
+from workspace.utils.metrics import loop_lag_monitor
 
 logger = setup_logger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background instrumentation and warm shared state; on shutdown flush ingested events, snapshot online features and release executor pools."""
+    loop_lag_monitor.start()
+    # Loading the send counters scans the event store, so keep it off the loop
+    warm_send_counters = asyncio.ensure_future(run_in_thread(get_send_counters))
+    yield
+    try:
+        await warm_send_counters
+    except Exception:
+        logger.exception("Warming the send counters failed")
+    finally:
+        await loop_lag_monitor.stop()
+        stop_event_ingestor()
+        stop_feature_store()
+        shutdown_executors(wait=False)
+
 app = FastAPI(
     title="Reward Personalization Agent",
     description="AI-driven reward personalization and engagement optimization",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix="/api")
@@ -23,6 +48,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "0.1.0"}
 
+@app.get("/health/loop_lag", tags=["Health"])
+async def loop_lag():
+    """Event loop lag percentiles, used to spot blocking calls on the loop."""
+    return loop_lag_monitor.snapshot()
+
 if __name__ == "__main__":
-    logger.info(f"Starting Reward Personalization Agent on port {settings.PORT}")
+    logger.info("Starting Reward Personalization Agent on port %s", settings.PORT)
     uvicorn.run("workspace.app:app", host="0.0.0.0", port=settings.PORT, reload=settings.DEBUG)
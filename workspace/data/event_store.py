@@ -0,0 +1,449 @@
+"""
+Columnar storage for customer engagement events.
+"""
+import json
+import os
+import sys
+import threading
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from workspace.settings import settings
+from workspace.utils.logger import setup_logger
+from workspace.utils.timestamps import TimeBound, parse_timestamps, to_epoch_ns, to_utc_timestamp
+
+logger = setup_logger(__name__)
+
+# Metadata fields lifted into their own columns
+METADATA_COLUMNS = ["campaign_id", "reward_id", "content_type"]
+CATEGORICAL_COLUMNS = ["customer_id", "event_type"] + METADATA_COLUMNS
+EVENT_COLUMNS = ["customer_id", "event_type", "timestamp"] + METADATA_COLUMNS + ["amount"]
+
+# Process-wide event type dictionary: Event stores the code, not the string
+_event_types: List[str] = []
+_event_type_codes: Dict[str, int] = {}
+_event_types_lock = threading.Lock()
+
+def event_type_code(event_type: str) -> int:
+    """
+    Get the interned code of an event type, registering unseen types.
+
+    Args:
+        event_type: Event type name
+
+    Returns:
+        Small integer code, stable for the life of the process
+    """
+    code = _event_type_codes.get(event_type)
+    if code is None:
+        with _event_types_lock:
+            code = _event_type_codes.get(event_type)
+            if code is None:
+                code = len(_event_types)
+                _event_types.append(event_type)
+                _event_type_codes[event_type] = code
+    return code
+
+class Event:
+    """
+    Compact engagement event for internal hot paths.
+
+    Holds the fields of the event store schema in slots, with the event type
+    as an interned code, the timestamp as UTC epoch nanoseconds and customer
+    IDs interned, so buffered events share their strings and need no
+    per-event dictionaries or timestamp strings. Convert with from_dict and
+    to_dict only where events enter or leave the service.
+    """
+
+    __slots__ = ("customer_id", "type_code", "timestamp", "amount", "campaign_id", "reward_id", "content_type")
+
+    def __init__(self, customer_id: str, event_type: str, timestamp: int,
+                 amount: Optional[float] = None,
+                 campaign_id: Optional[str] = None,
+                 reward_id: Optional[str] = None,
+                 content_type: Optional[str] = None):
+        self.customer_id = sys.intern(customer_id)
+        self.type_code = event_type_code(event_type)
+        self.timestamp = timestamp
+        self.amount = amount
+        self.campaign_id = campaign_id
+        self.reward_id = reward_id
+        self.content_type = content_type
+
+    @property
+    def event_type(self) -> str:
+        return _event_types[self.type_code]
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any], default_timestamp: Optional[int] = None) -> "Event":
+        """
+        Build an event from an engagement event dictionary.
+
+        Args:
+            event: Dictionary with customer_id, event_type, timestamp and optional metadata
+            default_timestamp: Epoch nanoseconds to use when the event has no timestamp
+
+        Returns:
+            Compact event
+
+        Raises:
+            ValueError: If the customer ID or timestamp is missing or invalid
+        """
+        customer_id = event.get("customer_id")
+        if not isinstance(customer_id, str):
+            raise ValueError(f"Invalid customer_id: {customer_id!r}")
+        timestamp = event.get("timestamp")
+        if timestamp is None:
+            if default_timestamp is None:
+                raise ValueError(f"Event for customer {customer_id} has no timestamp")
+            timestamp = default_timestamp
+        else:
+            timestamp = to_epoch_ns(timestamp)
+
+        metadata = event.get("metadata") or {}
+        amount = metadata.get("amount")
+        return cls(customer_id, event.get("event_type") or "unknown", timestamp,
+                   float(amount) if amount is not None else None,
+                   *(metadata.get(column) for column in METADATA_COLUMNS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to an engagement event dictionary with an ISO timestamp."""
+        metadata = {column: getattr(self, column) for column in METADATA_COLUMNS
+                    if getattr(self, column) is not None}
+        if self.amount is not None:
+            metadata["amount"] = self.amount
+        return {
+            "customer_id": self.customer_id,
+            "event_type": self.event_type,
+            "timestamp": pd.Timestamp(self.timestamp, tz="UTC").isoformat(),
+            "metadata": metadata
+        }
+
+def empty_events_frame() -> pd.DataFrame:
+    """Build an empty frame with the event store schema."""
+    frame = pd.DataFrame({column: pd.Categorical([]) for column in CATEGORICAL_COLUMNS})
+    frame["timestamp"] = pd.Series([], dtype="datetime64[ns, UTC]")
+    frame["amount"] = pd.Series([], dtype="float64")
+    return frame[EVENT_COLUMNS]
+
+def events_to_frame(events: Union[List[Dict[str, Any]], List[Event]]) -> pd.DataFrame:
+    """
+    Convert engagement events into the columnar event schema.
+
+    Timestamps are parsed once for the whole batch and repeated strings are
+    stored as categoricals. Lists of Event skip parsing entirely.
+
+    Args:
+        events: List of engagement events as produced by the loaders, or a
+            list of Event
+
+    Returns:
+        DataFrame with one row per event
+    """
+    if not events:
+        return empty_events_frame()
+    if isinstance(events[0], Event):
+        return _compact_events_frame(events)
+
+    columns = {column: [] for column in ["customer_id", "event_type", "timestamp"] + METADATA_COLUMNS + ["amount"]}
+    for event in events:
+        metadata = event.get("metadata") or {}
+        columns["customer_id"].append(event.get("customer_id"))
+        columns["event_type"].append(event.get("event_type", "unknown"))
+        columns["timestamp"].append(event.get("timestamp"))
+        for column in METADATA_COLUMNS:
+            columns[column].append(metadata.get(column))
+        columns["amount"].append(metadata.get("amount", np.nan))
+
+    frame = pd.DataFrame({
+        column: pd.Categorical(columns[column]) for column in CATEGORICAL_COLUMNS
+    })
+    frame["timestamp"] = parse_timestamps(columns["timestamp"])
+    frame["amount"] = pd.to_numeric(pd.Series(columns["amount"], dtype=object), errors="coerce")
+    return frame[EVENT_COLUMNS]
+
+def _compact_events_frame(events: List[Event]) -> pd.DataFrame:
+    """Convert Event objects into the columnar event schema."""
+    type_codes = np.fromiter((event.type_code for event in events), dtype=np.int64, count=len(events))
+    event_type = pd.Categorical.from_codes(type_codes, categories=pd.Index(list(_event_types), dtype=object))
+    frame = pd.DataFrame({
+        "customer_id": pd.Categorical([event.customer_id for event in events]),
+        "event_type": event_type.remove_unused_categories()
+    })
+    for column in METADATA_COLUMNS:
+        frame[column] = pd.Categorical([getattr(event, column) for event in events])
+    frame["timestamp"] = pd.to_datetime(
+        np.fromiter((event.timestamp for event in events), dtype=np.int64, count=len(events)), utc=True
+    )
+    frame["amount"] = np.array([event.amount for event in events], dtype=float)
+    return frame[EVENT_COLUMNS]
+
+def _object_categories(values: pd.Series) -> pd.Categorical:
+    """Rebuild a categorical with object-dtype categories so dictionaries can be merged."""
+    values = values.array
+    return pd.Categorical.from_codes(values.codes, categories=pd.Index(values.categories, dtype=object))
+
+def _concat(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate event frames (or column subsets of them), merging categorical dictionaries."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return empty_events_frame()
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = {}
+    for column in frames[0].columns:
+        if column in CATEGORICAL_COLUMNS:
+            combined[column] = union_categoricals([_object_categories(frame[column]) for frame in frames])
+        else:
+            combined[column] = np.concatenate([frame[column].values for frame in frames])
+    frame = pd.DataFrame(combined)
+    if "timestamp" in frame:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+    return frame
+
+class EventStore:
+    """
+    In-memory columnar event store.
+
+    Events are kept in time-ordered segments, each sorted by timestamp, so a
+    date-range scan is a binary search plus a slice per segment rather than
+    a full filter. An in-order append adds a segment and merges the newest
+    segments only while the one before is no larger, so each event is
+    copied O(log n) times over its lifetime instead of the whole store being
+    copied on every append; late events are merged into the segments they
+    overlap. Writers swap in a new tuple of segments under a lock; readers
+    work on whichever segments were current when they started.
+    """
+
+    def __init__(self, events: Optional[pd.DataFrame] = None):
+        self._lock = threading.Lock()
+        frame = self._sorted(events if events is not None else empty_events_frame())
+        self._segments: Tuple[pd.DataFrame, ...] = (frame,) if len(frame) else ()
+        self._size = len(frame)
+        # First event time per customer in epoch nanoseconds, maintained by append()
+        first_seen = self._first_event_times(frame)
+        self._first_seen_ns: Dict[str, int] = dict(zip(
+            first_seen.index, first_seen.values.astype("datetime64[ns]").view(np.int64).tolist()))
+        self._version = 0
+        self._first_seen: Optional[Tuple[int, pd.Series]] = None
+        self._customer_ids: Optional[Tuple[int, np.ndarray]] = None
+        self._listeners: List[Callable[[pd.DataFrame], None]] = []
+        logger.info("EventStore initialized with %s events", self._size)
+
+    @classmethod
+    def from_records(cls, events: List[Dict[str, Any]]) -> "EventStore":
+        """
+        Build a store from engagement event dictionaries.
+
+        Args:
+            events: List of engagement events
+
+        Returns:
+            Populated event store
+        """
+        return cls(events_to_frame(events))
+
+    @classmethod
+    def from_path(cls, path: str,
+                  start: TimeBound = None,
+                  end: TimeBound = None) -> "EventStore":
+        """
+        Load a store from a JSON (as written by seed_data.py) or Parquet file.
+
+        For Parquet files the date range is pushed down to the reader, so only
+        row groups overlapping [start, end] are read.
+
+        Args:
+            path: Path to events.json or a Parquet file
+            start: Optional inclusive lower time bound
+            end: Optional inclusive upper time bound
+
+        Returns:
+            Populated event store
+        """
+        logger.info("Loading events from %s", path)
+
+        if path.endswith(".parquet"):
+            filters = []
+            if start is not None:
+                filters.append(("timestamp", ">=", to_utc_timestamp(start)))
+            if end is not None:
+                filters.append(("timestamp", "<=", to_utc_timestamp(end)))
+            frame = pd.read_parquet(path, filters=filters or None)
+            for column in CATEGORICAL_COLUMNS:
+                frame[column] = frame[column].astype("category")
+            frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+            return cls(frame[EVENT_COLUMNS])
+
+        with open(path) as f:
+            store = cls.from_records(json.load(f))
+        if start is not None or end is not None:
+            store = cls(store.scan(start, end))
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def customer_count(self) -> int:
+        """Number of distinct customers seen by the store."""
+        return len(self._first_seen_ns)
+
+    def customer_ids(self) -> np.ndarray:
+        """
+        Get every customer ID seen by the store, sorted, for keyset pagination.
+        
+        Cached until the next append.
+        
+        Returns:
+            Sorted object array of customer IDs
+        """
+        cached = self._customer_ids
+        if cached is None or cached[0] != self._version:
+            with self._lock:
+                cached = (self._version, np.sort(np.array(list(self._first_seen_ns), dtype=object)))
+            self._customer_ids = cached
+        return cached[1]
+
+    def first_seen(self) -> pd.Series:
+        """
+        Get the time of each customer's first event.
+        
+        Maintained incrementally by append() and materialized on demand,
+        cached until the next append.
+        
+        Returns:
+            Series of UTC timestamps indexed by customer ID
+        """
+        cached = self._first_seen
+        if cached is None or cached[0] != self._version:
+            with self._lock:
+                times = np.fromiter(self._first_seen_ns.values(), dtype=np.int64, count=len(self._first_seen_ns))
+                cached = (self._version, pd.Series(
+                    pd.to_datetime(times, utc=True),
+                    index=pd.Index(list(self._first_seen_ns), dtype=object, name="customer_id"),
+                    name="timestamp"
+                ))
+            self._first_seen = cached
+        return cached[1]
+
+    def append(self, events: Union[pd.DataFrame, List[Dict[str, Any]]]) -> int:
+        """
+        Append events to the store.
+
+        Events without a timestamp are dropped. Subscribers are notified
+        after the events are stored; their errors are logged, not raised.
+
+        Args:
+            events: Events as a frame in the store schema or as dictionaries
+
+        Returns:
+            Number of events appended
+        """
+        if not isinstance(events, pd.DataFrame):
+            events = events_to_frame(events)
+        events = self._sorted(events[EVENT_COLUMNS])
+        if not len(events):
+            return 0
+        first_time = events["timestamp"].values[0]
+        batch_first_seen = self._first_event_times(events)
+
+        with self._lock:
+            segments = list(self._segments)
+            # Late events are merged with every segment they overlap
+            overlap = len(segments)
+            while overlap and segments[overlap - 1]["timestamp"].values[-1] > first_time:
+                overlap -= 1
+            if overlap < len(segments):
+                segments[overlap:] = [self._sorted(_concat(segments[overlap:] + [events]))]
+            else:
+                segments.append(events)
+            while len(segments) > 1 and len(segments[-2]) <= len(segments[-1]):
+                segments[-2:] = [_concat(segments[-2:]).reset_index(drop=True)]
+            self._segments = tuple(segments)
+            self._size += len(events)
+
+            known = self._first_seen_ns
+            times = batch_first_seen.values.astype("datetime64[ns]").view(np.int64).tolist()
+            for customer_id, first in zip(batch_first_seen.index, times):
+                if first < known.get(customer_id, first + 1):
+                    known[customer_id] = first
+            self._version += 1
+
+        # The events are stored by now, so a failing subscriber must not fail the append
+        for listener in self._listeners:
+            try:
+                listener(events)
+            except Exception:
+                logger.exception("Event store subscriber %r failed", listener)
+        return len(events)
+
+    def subscribe(self, listener: Callable[[pd.DataFrame], None]) -> None:
+        """
+        Register a callback that receives every appended batch of events.
+
+        Args:
+            listener: Callable taking the appended events frame
+        """
+        self._listeners.append(listener)
+
+    def scan(self, start: TimeBound = None,
+             end: TimeBound = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Return the events with timestamps in [start, end].
+
+        Args:
+            start: Optional inclusive lower time bound
+            end: Optional inclusive upper time bound
+            columns: Optional subset of columns to return
+
+        Returns:
+            Frame of matching events, sorted by timestamp
+        """
+        start = None if start is None else to_utc_timestamp(start).to_datetime64()
+        end = None if end is None else to_utc_timestamp(end).to_datetime64()
+
+        windows = []
+        for segment in self._segments:
+            timestamps = segment["timestamp"].values
+            lo = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            hi = len(segment) if end is None else np.searchsorted(timestamps, end, side="right")
+            if lo < hi:
+                window = segment.iloc[lo:hi]
+                windows.append(window[columns] if columns is not None else window)
+
+        if not windows:
+            empty = empty_events_frame()
+            return empty[columns] if columns is not None else empty
+        return _concat(windows)
+
+    def _first_event_times(self, frame: pd.DataFrame) -> pd.Series:
+        first_seen = frame.groupby("customer_id", observed=True)["timestamp"].min()
+        first_seen.index = first_seen.index.astype(object)
+        return first_seen
+
+    def _sorted(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.dropna(subset=["timestamp"])
+        if frame["timestamp"].is_monotonic_increasing:
+            return frame.reset_index(drop=True)
+        return frame.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+_event_store: Optional[EventStore] = None
+_event_store_lock = threading.Lock()
+
+def get_event_store() -> EventStore:
+    """
+    Get the process-wide event store, loading it from EVENTS_PATH on first use.
+
+    Returns:
+        The shared event store (empty if no events file exists)
+    """
+    global _event_store
+    with _event_store_lock:
+        if _event_store is None:
+            path = settings.EVENTS_PATH
+            _event_store = EventStore.from_path(path) if os.path.exists(path) else EventStore()
+        return _event_store
@@ -0,0 +1,352 @@
+"""
+Online feature store: per-customer running aggregates updated as events arrive.
+"""
+import os
+import threading
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
+import pandas as pd
+from workspace.settings import settings
+from workspace.data.event_store import Event, TimeBound, get_event_store, to_utc_timestamp
+from workspace.data.processors import DAY_NS, _epoch_ns, _from_epoch_ns
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Event types with their own counter; other types only count towards total_events
+FEATURE_EVENT_TYPES = ["email_sent", "email_open", "email_click", "reward_claim", "purchase"]
+NO_EVENT = np.iinfo(np.int64).min
+
+# One 48-byte record per customer
+FEATURE_DTYPE = np.dtype([
+    ("first_event", np.int64),
+    ("last_event", np.int64),
+    ("total_events", np.uint32),
+    ("type_counts", np.uint32, (len(FEATURE_EVENT_TYPES),)),
+    ("purchase_amount", np.float64)
+])
+
+class OnlineFeatureStore:
+    """
+    Per-customer running aggregates in one NumPy structured array.
+
+    Each customer has a fixed-size record of first/last event time (epoch
+    nanoseconds), event counts and total purchase amount, found through a
+    dictionary from customer ID to row. Every event updates its customer's
+    record in place, so serving-time features are a row lookup instead of a
+    replay of the customer's history. Snapshots are written to disk with the
+    time of the newest event applied, so a restart only replays later events
+    (events older than that which arrive after a snapshot are not replayed).
+    Periodic snapshots run on their own timer thread (start_snapshots), never
+    on the event store's write path.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = settings.FEATURE_STORE_PATH if path is None else path
+        self.rows: Dict[str, int] = {}
+        self.records = np.zeros(0, dtype=FEATURE_DTYPE)
+        # Time of the newest event applied, in epoch nanoseconds
+        self.watermark = NO_EVENT
+        self._type_index = {event_type: i for i, event_type in enumerate(FEATURE_EVENT_TYPES)}
+        self._lock = threading.Lock()
+        # Update counter, to skip snapshots when nothing changed
+        self._version = 0
+        self._saved_version = 0
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop_snapshots = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_events(cls, events: pd.DataFrame, path: Optional[str] = None) -> "OnlineFeatureStore":
+        """
+        Build the store in bulk from an event history.
+
+        Args:
+            events: Event frame in the event store schema
+            path: Optional snapshot path, defaults to FEATURE_STORE_PATH
+
+        Returns:
+            Populated feature store
+        """
+        store = cls(path)
+        store.record_events(events)
+        logger.info("Built online features for %s customers from %s events", len(store), len(events))
+        return store
+
+    def update(self, event: Union[Event, Dict[str, Any]]) -> None:
+        """
+        Apply one engagement event in O(1).
+
+        Args:
+            event: Event, or engagement event dictionary with customer_id,
+                event_type, timestamp and optional metadata (dictionaries
+                without a valid customer ID or timestamp are ignored)
+        """
+        if not isinstance(event, Event):
+            try:
+                event = Event.from_dict(event)
+            except ValueError:
+                return
+        timestamp = event.timestamp
+        event_type = event.event_type
+        type_index = self._type_index.get(event_type)
+
+        with self._lock:
+            row = self._row(event.customer_id)
+            records = self.records
+            if records["total_events"][row] == 0 or timestamp < records["first_event"][row]:
+                records["first_event"][row] = timestamp
+            records["last_event"][row] = max(records["last_event"][row], timestamp)
+            records["total_events"][row] += 1
+            if type_index is not None:
+                records["type_counts"][row, type_index] += 1
+            if event_type == "purchase":
+                records["purchase_amount"][row] += event.amount or 0.0
+            self.watermark = max(self.watermark, timestamp)
+            self._version += 1
+
+    def record_events(self, events: pd.DataFrame) -> None:
+        """
+        Apply a batch of events, aggregating per customer before touching the records.
+
+        Can be registered with EventStore.subscribe.
+
+        Args:
+            events: Events frame in the event store schema
+        """
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        timestamps = _epoch_ns(events["timestamp"])
+        valid = (codes >= 0) & (timestamps != NO_EVENT)
+        if not valid.any():
+            return
+        codes, timestamps = codes[valid], timestamps[valid]
+        categories = events["customer_id"].cat.categories
+        n_customers = len(categories)
+
+        totals = np.bincount(codes, minlength=n_customers)
+        present = np.flatnonzero(totals)
+        first_event = np.full(n_customers, np.iinfo(np.int64).max)
+        np.minimum.at(first_event, codes, timestamps)
+        last_event = np.full(n_customers, NO_EVENT)
+        np.maximum.at(last_event, codes, timestamps)
+
+        event_types = events["event_type"].cat.categories
+        type_positions = np.array([self._type_index.get(event_type, -1) for event_type in event_types], dtype=np.int64)
+        type_codes = events["event_type"].cat.codes.to_numpy()[valid]
+        position = np.where(type_codes >= 0, type_positions[type_codes] if len(type_positions) else -1, -1)
+        counted = position >= 0
+        n_types = len(FEATURE_EVENT_TYPES)
+        type_counts = np.bincount(
+            codes[counted] * n_types + position[counted], minlength=n_customers * n_types
+        ).reshape(n_customers, n_types)
+
+        is_purchase = counted & (position == self._type_index["purchase"])
+        amounts = np.nan_to_num(events["amount"].to_numpy(dtype=float)[valid])
+        purchase_amount = np.bincount(codes[is_purchase], weights=amounts[is_purchase], minlength=n_customers)
+
+        with self._lock:
+            rows = np.array([self._row(customer_id) for customer_id in categories[present]], dtype=np.int64)
+            records = self.records
+            new = records["total_events"][rows] == 0
+            records["first_event"][rows] = np.where(
+                new, first_event[present], np.minimum(records["first_event"][rows], first_event[present]))
+            records["last_event"][rows] = np.maximum(records["last_event"][rows], last_event[present])
+            records["total_events"][rows] += totals[present].astype(np.uint32)
+            records["type_counts"][rows] += type_counts[present].astype(np.uint32)
+            records["purchase_amount"][rows] += purchase_amount[present]
+            self.watermark = max(self.watermark, int(timestamps.max()))
+            self._version += 1
+
+    def get(self, customer_id: str, as_of: TimeBound = None) -> Dict[str, Any]:
+        """
+        Read a customer's features.
+
+        Args:
+            customer_id: The ID of the customer
+            as_of: Optional reference time for recency, defaults to now (UTC)
+
+        Returns:
+            Dictionary with total_events, one <event_type>_count per counted
+            type, click_to_open_rate, average_purchase_value and
+            days_since_last_engagement (None for customers without events)
+        """
+        row = self.rows.get(customer_id)
+        record = self.records[row] if row is not None else np.zeros((), dtype=FEATURE_DTYPE)
+        features = {"customer_id": customer_id, "total_events": int(record["total_events"])}
+        for event_type, count in zip(FEATURE_EVENT_TYPES, record["type_counts"].tolist()):
+            features[f"{event_type}_count"] = count
+
+        opens, purchases = features["email_open_count"], features["purchase_count"]
+        features["click_to_open_rate"] = features["email_click_count"] / opens if opens > 0 else 0.0
+        features["average_purchase_value"] = float(record["purchase_amount"]) / purchases if purchases > 0 else 0.0
+        features["days_since_last_engagement"] = (
+            (_as_of_ns(as_of) - int(record["last_event"])) // DAY_NS if row is not None else None
+        )
+        return features
+
+    def features(self, customer_ids: List[str], as_of: TimeBound = None) -> pd.DataFrame:
+        """
+        Read features for many customers with one gather.
+
+        Args:
+            customer_ids: Customers to look up; those without events are left out
+            as_of: Optional reference time for recency, defaults to now (UTC)
+
+        Returns:
+            Frame indexed by customer_id with the columns of
+            EngagementEventProcessor.customer_features (the customer's first
+            event stands in for signup_at)
+        """
+        found = [(customer_id, self.rows[customer_id]) for customer_id in customer_ids
+                 if customer_id in self.rows]
+        index = pd.Index([customer_id for customer_id, _ in found], dtype=object, name="customer_id")
+        records = self.records[np.array([row for _, row in found], dtype=np.int64)]
+        as_of_ns = _as_of_ns(as_of)
+
+        features = pd.DataFrame({
+            "total_events": records["total_events"].astype(np.int64),
+            "first_event": _from_epoch_ns(records["first_event"]),
+            "last_event": _from_epoch_ns(records["last_event"]),
+            "signup_at": _from_epoch_ns(records["first_event"])
+        }, index=index)
+        for position, event_type in enumerate(FEATURE_EVENT_TYPES):
+            features[f"{event_type}_count"] = records["type_counts"][:, position].astype(np.int64)
+        features["days_since_signup"] = (as_of_ns - records["first_event"]) // DAY_NS
+        features["days_since_last_engagement"] = (as_of_ns - records["last_event"]) // DAY_NS
+        return features
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        Write a snapshot, replacing the previous one atomically.
+
+        Args:
+            path: Target file, defaults to the store's path
+        """
+        path = path or self.path
+        with self._lock:
+            records = self.records[:len(self.rows)].copy()
+            customer_ids = np.array(list(self.rows), dtype=str)
+            watermark = self.watermark
+            version = self._version
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(f, records=records, customer_ids=customer_ids, watermark=np.int64(watermark))
+        os.replace(temporary, path)
+        self._saved_version = version
+        logger.info("Saved online features for %s customers to %s", len(records), path)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["OnlineFeatureStore"]:
+        """
+        Load a snapshot written by save().
+
+        Args:
+            path: Snapshot file, defaults to FEATURE_STORE_PATH
+
+        Returns:
+            Populated feature store, or None if no snapshot exists
+        """
+        store = cls(path)
+        if not store.path or not os.path.exists(store.path):
+            return None
+
+        with np.load(store.path) as snapshot:
+            store.records = snapshot["records"]
+            store.rows = {customer_id: row for row, customer_id in enumerate(snapshot["customer_ids"].tolist())}
+            store.watermark = int(snapshot["watermark"])
+        logger.info("Loaded online features for %s customers from %s", len(store), store.path)
+        return store
+
+    def start_snapshots(self, interval: Optional[float] = None) -> None:
+        """
+        Start a timer thread that writes a snapshot every interval seconds if the store changed.
+
+        Args:
+            interval: Seconds between snapshots, defaults to FEATURE_SNAPSHOT_INTERVAL
+        """
+        interval = settings.FEATURE_SNAPSHOT_INTERVAL if interval is None else interval
+        if not self.path or interval <= 0:
+            return
+        if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+            self._stop_snapshots.clear()
+            self._snapshot_thread = threading.Thread(
+                target=self._run_snapshots, args=(interval,), name="feature-snapshots", daemon=True
+            )
+            self._snapshot_thread.start()
+
+    def stop_snapshots(self) -> None:
+        """Stop the snapshot thread, writing a final snapshot if the store changed."""
+        self._stop_snapshots.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+            self._snapshot_if_changed()
+
+    def _run_snapshots(self, interval: float) -> None:
+        while not self._stop_snapshots.wait(interval):
+            self._snapshot_if_changed()
+
+    def _snapshot_if_changed(self) -> None:
+        if self._version == self._saved_version:
+            return
+        try:
+            self.save()
+        except Exception as e:
+            logger.error("Failed to snapshot online features: %s", e)
+
+    def _row(self, customer_id: str) -> int:
+        """Get a customer's row, growing the records for unseen customers."""
+        row = self.rows.get(customer_id)
+        if row is not None:
+            return row
+
+        row = len(self.rows)
+        if row >= len(self.records):
+            capacity = max(2 * len(self.records), 1024)
+            self.records = np.concatenate([self.records, np.zeros(capacity - len(self.records), dtype=FEATURE_DTYPE)])
+        self.rows[customer_id] = row
+        return row
+
+def _as_of_ns(as_of: TimeBound) -> int:
+    """Convert a reference time to epoch nanoseconds, defaulting to now."""
+    return (to_utc_timestamp(as_of) or pd.Timestamp.now(tz="UTC")).as_unit("ns").value
+
+_feature_store: Optional[OnlineFeatureStore] = None
+_feature_store_lock = threading.Lock()
+
+def get_feature_store() -> OnlineFeatureStore:
+    """
+    Get the process-wide online feature store.
+
+    Starts from the snapshot at FEATURE_STORE_PATH if there is one and
+    replays only newer events from the event store, otherwise builds from
+    the full history. The store then subscribes to the event store, so
+    appended events update it, and starts its snapshot thread.
+
+    Returns:
+        The shared online feature store
+    """
+    global _feature_store
+    with _feature_store_lock:
+        if _feature_store is None:
+            event_store = get_event_store()
+            store = OnlineFeatureStore.load()
+            if store is None:
+                store = OnlineFeatureStore.from_events(event_store.scan())
+            else:
+                start = pd.Timestamp(store.watermark + 1, tz="UTC") if store.watermark != NO_EVENT else None
+                store.record_events(event_store.scan(start))
+            event_store.subscribe(store.record_events)
+            store.start_snapshots()
+            _feature_store = store
+        return _feature_store
+
+def stop_feature_store() -> None:
+    """Stop the shared feature store's snapshot thread, writing a final snapshot, if it was started."""
+    with _feature_store_lock:
+        if _feature_store is not None:
+            _feature_store.stop_snapshots()
@@ -0,0 +1,308 @@
+"""
+Email frequency policy: per-segment fatigue curves and per-customer send counters.
+"""
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from workspace.settings import settings
+from workspace.data.event_store import get_event_store
+from workspace.data.processors import EngagementEventProcessor, DAY_NS, _epoch_ns
+from workspace.data.rollups import NEW_CUSTOMER_SEGMENT, segment_snapshot
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SEGMENTS = EngagementEventProcessor.SEGMENTS
+SEND_EVENT_TYPE = "email_sent"
+RESPONSE_EVENT_TYPES = ["email_open", "email_click"]
+# Longest send interval considered, in days
+MAX_INTERVAL_DAYS = 28
+# Weight of the segment's overall open rate when smoothing each interval's rate, in sends
+PRIOR_SENDS = 20.0
+MAX_UNOPENED = np.iinfo(np.uint8).max
+
+class FatigueCurves:
+    """
+    Open rate as a function of days since the previous send, per segment.
+
+    A send counts as opened when the customer opens or clicks before their
+    next send, within response_window_days.
+    """
+
+    def __init__(self, rates: Optional[np.ndarray] = None,
+                 sends: Optional[np.ndarray] = None,
+                 segments: Optional[pd.Series] = None):
+        self.rates = rates if rates is not None else np.zeros((len(SEGMENTS), MAX_INTERVAL_DAYS))
+        self.sends = sends if sends is not None else np.zeros((len(SEGMENTS), MAX_INTERVAL_DAYS), dtype=np.int64)
+        self.segments = segments if segments is not None else pd.Series(dtype=object)
+
+    @property
+    def fitted(self) -> bool:
+        """Whether any send history was available to fit the curves."""
+        return bool(self.sends.any())
+
+    @classmethod
+    def fit(cls, events: pd.DataFrame,
+            segments: pd.Series,
+            response_window_days: int = 3) -> "FatigueCurves":
+        """
+        Fit fatigue curves from historical send/open sequences in bulk.
+
+        Args:
+            events: Event frame in the event store schema, sorted by timestamp
+            segments: Segment per customer ID
+            response_window_days: Days after a send in which an open counts
+
+        Returns:
+            Fitted curves
+        """
+        event_type = events["event_type"]
+        is_send = (event_type == SEND_EVENT_TYPE).to_numpy()
+        is_response = event_type.isin(RESPONSE_EVENT_TYPES).to_numpy()
+        relevant = is_send | is_response
+        if not is_send.any():
+            logger.info("No send events found, fatigue curves left unfitted")
+            return cls(segments=segments)
+
+        categories = events["customer_id"].cat.categories
+        customer = events["customer_id"].cat.codes.to_numpy().astype(np.int64)[relevant]
+        timestamp = _epoch_ns(events["timestamp"])[relevant]
+        is_send = is_send[relevant]
+
+        # Events are in time order, so a stable sort by customer orders by (customer, time)
+        order = np.argsort(customer, kind="stable")
+        customer, timestamp, is_send = customer[order], timestamp[order], is_send[order]
+        n = len(order)
+        index = np.arange(n)
+
+        sends = np.flatnonzero(is_send)
+        previous_send = np.r_[-1, sends[:-1]]
+        has_previous = (previous_send >= 0) & (customer[np.maximum(previous_send, 0)] == customer[sends])
+        interval = np.where(
+            has_previous, (timestamp[sends] - timestamp[np.maximum(previous_send, 0)]) // DAY_NS, MAX_INTERVAL_DAYS
+        )
+        interval = np.clip(interval, 1, MAX_INTERVAL_DAYS)
+
+        # First response after each send, which must come before the next send
+        next_response = np.minimum.accumulate(np.where(~is_send, index, n)[::-1])[::-1]
+        following = next_response[np.minimum(sends + 1, n - 1)]
+        following = np.where(sends + 1 < n, following, n)
+        next_send = np.r_[sends[1:], n]
+        responded = ((following < n) &
+                     (following < next_send) &
+                     (customer[np.minimum(following, n - 1)] == customer[sends]) &
+                     (timestamp[np.minimum(following, n - 1)] - timestamp[sends] <= response_window_days * DAY_NS))
+
+        segment_by_customer = pd.Categorical(
+            segments.reindex(categories).fillna(NEW_CUSTOMER_SEGMENT), categories=SEGMENTS
+        ).codes
+        cell = segment_by_customer[customer[sends]].astype(np.int64) * MAX_INTERVAL_DAYS + interval - 1
+        size = len(SEGMENTS) * MAX_INTERVAL_DAYS
+        send_counts = np.bincount(cell, minlength=size).reshape(len(SEGMENTS), MAX_INTERVAL_DAYS)
+        open_counts = np.bincount(cell[responded], minlength=size).reshape(len(SEGMENTS), MAX_INTERVAL_DAYS)
+
+        # Shrink sparse intervals towards the segment's (or overall) open rate
+        overall = open_counts.sum() / send_counts.sum()
+        segment_sends = send_counts.sum(axis=1, keepdims=True)
+        segment_rate = np.where(segment_sends > 0,
+                                open_counts.sum(axis=1, keepdims=True) / np.maximum(segment_sends, 1), overall)
+        rates = (open_counts + PRIOR_SENDS * segment_rate) / (send_counts + PRIOR_SENDS)
+
+        logger.info("Fitted fatigue curves from %s sends", len(sends))
+        return cls(rates, send_counts, segments)
+
+    def optimal_intervals(self, min_open_rate: Optional[float] = None) -> np.ndarray:
+        """
+        Pick the send interval that maximizes net opens per day for each segment.
+
+        A send is worth its open rate minus min_open_rate, so intervals whose
+        open rate is below the threshold are never chosen; segments with no
+        worthwhile interval get the longest one.
+
+        Args:
+            min_open_rate: Open rate a send must beat, defaults to MIN_ENGAGEMENT_THRESHOLD
+
+        Returns:
+            Interval in days per segment, in SEGMENTS order
+        """
+        min_open_rate = settings.MIN_ENGAGEMENT_THRESHOLD if min_open_rate is None else min_open_rate
+        days = np.arange(1, MAX_INTERVAL_DAYS + 1)
+        value = (self.rates - min_open_rate) / days
+        best = value.argmax(axis=1) + 1
+        return np.where(value.max(axis=1) > 0, best, MAX_INTERVAL_DAYS)
+
+class SendCounters:
+    """
+    Per-customer send counters in compact arrays.
+
+    Tracks total sends (uint32) and sends since the last open or click
+    (uint8, saturating), indexed through a dictionary from customer ID to row.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rows: Dict[str, int] = {}
+        self.sent = np.zeros(0, dtype=np.uint32)
+        self.unopened = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_events(cls, events: pd.DataFrame) -> "SendCounters":
+        """
+        Build counters in bulk from send, open and click history.
+
+        Args:
+            events: Event frame in the event store schema
+
+        Returns:
+            Populated counters
+        """
+        counters = cls()
+        event_type = events["event_type"]
+        is_send = (event_type == SEND_EVENT_TYPE).to_numpy()
+        if not is_send.any():
+            return counters
+
+        categories = events["customer_id"].cat.categories
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        timestamps = _epoch_ns(events["timestamp"])
+        is_response = event_type.isin(RESPONSE_EVENT_TYPES).to_numpy()
+        valid = codes >= 0
+
+        last_response = np.full(len(categories), np.iinfo(np.int64).min)
+        np.maximum.at(last_response, codes[is_response & valid], timestamps[is_response & valid])
+        sends = is_send & valid
+        sent = np.bincount(codes[sends], minlength=len(categories))
+        unanswered = sends.copy()
+        unanswered[sends] = timestamps[sends] > last_response[codes[sends]]
+        unopened = np.bincount(codes[unanswered], minlength=len(categories))
+
+        present = np.flatnonzero(sent)
+        counters.rows = {categories[code]: row for row, code in enumerate(present)}
+        counters.sent = sent[present].astype(np.uint32)
+        counters.unopened = np.minimum(unopened[present], MAX_UNOPENED).astype(np.uint8)
+        logger.info("Loaded send counters for %s customers", len(counters))
+        return counters
+
+    def record_events(self, events: pd.DataFrame) -> None:
+        """
+        Count new sends and reset the unopened counter of customers who opened or clicked.
+
+        Sends after a customer's last open or click in the batch count as
+        unopened. Registered with EventStore.subscribe, so sends submitted as
+        email_sent events reach the counters with the rest of the batch.
+
+        Args:
+            events: Events frame in the event store schema, sorted by timestamp
+        """
+        event_type = events["event_type"]
+        is_send = (event_type == SEND_EVENT_TYPE).to_numpy()
+        is_response = event_type.isin(RESPONSE_EVENT_TYPES).to_numpy()
+        if not (is_send.any() or is_response.any()):
+            return
+
+        categories = events["customer_id"].cat.categories
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        timestamps = _epoch_ns(events["timestamp"])
+        is_send = is_send & (codes >= 0)
+        is_response = is_response & (codes >= 0)
+
+        last_response = np.full(len(categories), np.iinfo(np.int64).min)
+        np.maximum.at(last_response, codes[is_response], timestamps[is_response])
+        sent = np.bincount(codes[is_send], minlength=len(categories))
+        unanswered = is_send.copy()
+        unanswered[is_send] = timestamps[is_send] > last_response[codes[is_send]]
+        unopened = np.bincount(codes[unanswered], minlength=len(categories))
+
+        with self._lock:
+            responded = [self.rows[categories[code]] for code in np.unique(codes[is_response])
+                         if categories[code] in self.rows]
+            self.unopened[responded] = 0
+            present = np.flatnonzero(sent)
+            rows = np.array([self._row(categories[code]) for code in present], dtype=np.int64)
+            self.sent[rows] += sent[present].astype(np.uint32)
+            self.unopened[rows] = np.minimum(self.unopened[rows].astype(np.int64) + unopened[present], MAX_UNOPENED)
+
+    def get(self, customer_id: str) -> Dict[str, int]:
+        """
+        Get a customer's counters.
+
+        Args:
+            customer_id: The ID of the customer
+
+        Returns:
+            Dictionary with total sends and sends since the last open
+        """
+        row = self.rows.get(customer_id)
+        if row is None:
+            return {"sent": 0, "unopened": 0}
+        return {"sent": int(self.sent[row]), "unopened": int(self.unopened[row])}
+
+    def unopened_for(self, customer_ids: List[str]) -> np.ndarray:
+        """
+        Get sends since the last open for many customers at once.
+
+        Args:
+            customer_ids: Customers to look up
+
+        Returns:
+            Array of counts, zero for unknown customers
+        """
+        rows = np.fromiter((self.rows.get(customer_id, -1) for customer_id in customer_ids),
+                           dtype=np.int64, count=len(customer_ids))
+        return np.where(rows >= 0, self.unopened[np.maximum(rows, 0)] if len(self.unopened) else 0, 0)
+
+    def _row(self, customer_id: str) -> int:
+        """Get a customer's row, growing the arrays for unseen customers."""
+        row = self.rows.get(customer_id)
+        if row is not None:
+            return row
+
+        row = len(self.rows)
+        if row >= len(self.sent):
+            capacity = max(2 * len(self.sent), 1024)
+            self.sent = np.concatenate([self.sent, np.zeros(capacity - len(self.sent), dtype=np.uint32)])
+            self.unopened = np.concatenate([self.unopened, np.zeros(capacity - len(self.unopened), dtype=np.uint8)])
+        self.rows[customer_id] = row
+        return row
+
+_fatigue_curves: Optional[FatigueCurves] = None
+_send_counters: Optional[SendCounters] = None
+_frequency_lock = threading.Lock()
+
+def get_fatigue_curves() -> FatigueCurves:
+    """
+    Get the process-wide fatigue curves, fitted from the event store on first use.
+
+    Returns:
+        The shared fatigue curves
+    """
+    global _fatigue_curves
+    with _frequency_lock:
+        if _fatigue_curves is None:
+            event_store = get_event_store()
+            _fatigue_curves = FatigueCurves.fit(event_store.scan(), segment_snapshot(event_store))
+        return _fatigue_curves
+
+def get_send_counters() -> SendCounters:
+    """
+    Get the process-wide send counters.
+
+    Counters are loaded from the event store's send history and subscribe to
+    it, so later email_sent events are counted and later opens and clicks
+    reset them. The first call scans the whole store, so call it off the
+    event loop.
+
+    Returns:
+        The shared send counters
+    """
+    global _send_counters
+    with _frequency_lock:
+        if _send_counters is None:
+            event_store = get_event_store()
+            _send_counters = SendCounters.from_events(event_store.scan())
+            event_store.subscribe(_send_counters.record_events)
+        return _send_counters
@@ -1,8 +1,12 @@
 """
 Data loading utilities.
 """
+import threading
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from workspace.data.event_store import get_event_store
+from workspace.data.reward_catalog import RewardCatalog
 from workspace.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -24,11 +28,64 @@ class CustomerDataLoader:
         Returns:
             Dictionary with customer data
         """
-        logger.info(f"Loading data for customer {customer_id}")
+        logger.info("Loading data for customer %s", customer_id)
         
         # In a real implementation, would query database
         
-        # Mock implementation
+        return self._mock_customer(customer_id)
+    
+    def load_customers(self, customer_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Load data for many customers in one call.
+        
+        Args:
+            customer_ids: IDs of the customers to load
+            
+        Returns:
+            List of customer data dictionaries, in the order of customer_ids
+        """
+        logger.info("Loading data for %s customers", len(customer_ids))
+        
+        # In a real implementation, would issue one batched database query
+        
+        return [self._mock_customer(customer_id) for customer_id in customer_ids]
+    
+    def load_customer_page(self, after: Optional[str] = None, 
+                           limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Load one page of customers ordered by ID (keyset pagination).
+        
+        Args:
+            after: Optional customer ID to start after
+            limit: Maximum number of customers to load
+            
+        Returns:
+            List of customer data dictionaries, ordered by ID
+        """
+        # In a real implementation, would query "WHERE id > :after ORDER BY id LIMIT :limit",
+        # which costs the same however deep the page is
+        
+        # Mock implementation - customer IDs come from the event store
+        customer_ids = get_event_store().customer_ids()
+        start = 0 if after is None else int(np.searchsorted(customer_ids, after, side="right"))
+        return self.load_customers(customer_ids[start:start + limit].tolist())
+    
+    def iter_customer_pages(self, after: Optional[str] = None, 
+                            page_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Walk all customers ordered by ID, one page at a time.
+        
+        Args:
+            after: Optional customer ID to start after
+            page_size: Customers per page
+            
+        Yields:
+            Pages of customer data dictionaries
+        """
+        yield from _iter_pages(self.load_customer_page, after, page_size)
+    
+    def _mock_customer(self, customer_id: str) -> Dict[str, Any]:
+        """Build the mock record returned until a database is wired in."""
         return {
             "id": customer_id,
             "email": f"customer_{customer_id}@example.com",
@@ -52,7 +109,7 @@ class CustomerDataLoader:
         Returns:
             List of engagement events
         """
-        logger.info(f"Loading engagement history for customer {customer_id}")
+        logger.info("Loading engagement history for customer %s", customer_id)
         
         # In a real implementation, would query database
         
@@ -86,22 +143,112 @@ class RewardDataLoader:
         self.db_connection = db_connection
         logger.info("RewardDataLoader initialized")
     
+    def load_catalog(self) -> RewardCatalog:
+        """
+        Get the indexed reward catalog, loading it on first use.
+        
+        Returns:
+            The current catalog snapshot
+        """
+        return get_reward_catalog(self)
+    
+    def reload_catalog(self) -> RewardCatalog:
+        """
+        Re-read the catalog from the database and swap it in.
+        
+        Returns:
+            The new catalog snapshot
+        """
+        rewards = self.fetch_rewards()
+        return _update_reward_catalog(lambda current: RewardCatalog(rewards, version=current.version + 1), self)
+    
+    def save_reward(self, reward: Dict[str, Any]) -> RewardCatalog:
+        """
+        Save a new or changed reward and swap in a catalog that includes it.
+        
+        Args:
+            reward: Reward data dictionary with an "id"
+            
+        Returns:
+            The new catalog snapshot
+        """
+        logger.info("Saving reward %s", reward['id'])
+        
+        # In a real implementation, would upsert the reward in the database
+        
+        return _update_reward_catalog(lambda current: current.with_rewards([reward]), self)
+    
+    def fetch_rewards(self) -> List[Dict[str, Any]]:
+        """
+        Read the full reward catalog from the database.
+        
+        Returns:
+            List of reward data dictionaries
+        """
+        logger.info("Fetching reward catalog")
+        
+        # In a real implementation, would query database
+        
+        # Mock implementation
+        return self._mock_rewards()
+    
     def load_rewards(self, 
                     filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Load rewards with optional filtering.
         
+        Answered from the in-memory catalog's filter bitmaps; see
+        RewardCatalog.select for the supported filters.
+        
         Args:
             filters: Optional dictionary of filters to apply
             
         Returns:
-            List of reward data dictionaries
+            List of reward data dictionaries, ordered by ID
+        """
+        catalog = self.load_catalog()
+        return catalog.records(catalog.select(filters))
+    
+    def load_reward_page(self, after: Optional[str] = None, 
+                         limit: int = 100, 
+                         filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
-        logger.info(f"Loading rewards with filters: {filters}")
+        Load one page of rewards ordered by ID (keyset pagination).
         
-        # In a real implementation, would query database with filters
+        Args:
+            after: Optional reward ID to start after
+            limit: Maximum number of rewards to load
+            filters: Optional dictionary of filters to apply
+            
+        Returns:
+            List of reward data dictionaries, ordered by ID
+        """
+        return self.load_catalog().page(after, limit, filters)
+    
+    def iter_reward_pages(self, after: Optional[str] = None, 
+                          page_size: int = 1000, 
+                          filters: Optional[Dict[str, Any]] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Walk all rewards ordered by ID, one page at a time.
         
-        # Mock implementation
+        Pages come from the catalog snapshot current when the walk starts, so
+        a concurrent catalog change does not skip or repeat rewards.
+        
+        Args:
+            after: Optional reward ID to start after
+            page_size: Rewards per page
+            filters: Optional dictionary of filters to apply
+            
+        Yields:
+            Pages of reward data dictionaries
+        """
+        catalog = self.load_catalog()
+        yield from _iter_pages(
+            lambda after, limit: catalog.page(after, limit, filters), after, page_size
+        )
+    
+    def _mock_rewards(self) -> List[Dict[str, Any]]:
+        """Build the mock catalog returned until a database is wired in."""
         return [
             {
                 "id": "reward1",
@@ -122,3 +269,52 @@ class RewardDataLoader:
                 "created_at": "2023-01-01T00:00:00Z"
             }
         ]
+
+def _iter_pages(load_page, after: Optional[str], page_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Follow a keyset-paginated loader until it runs out of records."""
+    while True:
+        page = load_page(after, page_size)
+        if not page:
+            return
+        yield page
+        if len(page) < page_size:
+            return
+        after = page[-1]["id"]
+
+_reward_catalog: Optional[RewardCatalog] = None
+_reward_catalog_lock = threading.Lock()
+
+def get_reward_catalog(loader: Optional[RewardDataLoader] = None) -> RewardCatalog:
+    """
+    Get the process-wide reward catalog, loading it on first use.
+    
+    Callers should hold on to the returned snapshot for the duration of a
+    request rather than calling this repeatedly, so they see one version.
+    
+    Args:
+        loader: Optional loader used for the first load
+    
+    Returns:
+        The current catalog snapshot
+    """
+    global _reward_catalog
+    catalog = _reward_catalog
+    if catalog is not None:
+        return catalog
+    with _reward_catalog_lock:
+        if _reward_catalog is None:
+            _reward_catalog = RewardCatalog((loader or RewardDataLoader()).fetch_rewards())
+            logger.info("Reward catalog loaded with %s rewards", len(_reward_catalog))
+        return _reward_catalog
+
+def _update_reward_catalog(build: Callable[[RewardCatalog], RewardCatalog],
+                           loader: Optional[RewardDataLoader] = None) -> RewardCatalog:
+    """Build the next catalog from the current one and swap it in atomically."""
+    global _reward_catalog
+    get_reward_catalog(loader)
+    with _reward_catalog_lock:
+        # Writers are serialized, so no update is lost; readers keep their snapshot
+        catalog = build(_reward_catalog)
+        _reward_catalog = catalog
+    logger.info("Reward catalog swapped to version %s with %s rewards", catalog.version, len(catalog))
+    return catalog
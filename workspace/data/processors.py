@@ -4,10 +4,13 @@ Data processing utilities.
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
-from workspace.utils.logger import setup_logger
+from workspace.utils.logger import SampledLogger, setup_logger
+from workspace.utils.executors import run_in_process
+from workspace.utils.timestamps import parse_timestamp, utc_now
 
 logger = setup_logger(__name__)
+# Per-customer and per-reward messages, written once per LOG_SAMPLE_EVERY calls
+item_logger = SampledLogger(logger)
 
 class CustomerDataProcessor:
     """
@@ -18,18 +21,20 @@ class CustomerDataProcessor:
         logger.info("CustomerDataProcessor initialized")
     
     def extract_features(self, customer_data: Dict[str, Any], 
-                        engagement_history: List[Dict[str, Any]]) -> Dict[str, Any]:
+                        engagement_history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         Extract features from customer data and engagement history.
         
         Args:
             customer_data: Raw customer data
-            engagement_history: List of engagement events
-            
+            engagement_history: Optional list of engagement events; when omitted,
+                engagement features are read from the online feature store
+                instead of being recomputed from the history
+        
         Returns:
             Dictionary of extracted features
         """
-        logger.info(f"Extracting features for customer {customer_data.get('id', 'unknown')}")
+        item_logger.info("Extracting features for customer %s", customer_data.get('id', 'unknown'))
         
         features = {}
         
@@ -44,13 +49,22 @@ class CustomerDataProcessor:
         features["interest_count"] = len(attributes.get("interests", []))
         
         # Calculate days since signup
-        created_at = customer_data.get("created_at", datetime.now().isoformat())
+        now = utc_now()
         try:
-            signup_date = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-            features["days_since_signup"] = (datetime.now() - signup_date).days
+            signup_date = parse_timestamp(customer_data.get("created_at"))
+            features["days_since_signup"] = (now - signup_date).days if signup_date else 0
         except (ValueError, TypeError):
             features["days_since_signup"] = 0
         
+        if engagement_history is None:
+            from workspace.data.feature_store import get_feature_store
+            
+            online = get_feature_store().get(features["customer_id"])
+            features.update({key: value for key, value in online.items() if key != "customer_id"})
+            if features["days_since_last_engagement"] is None:
+                features["days_since_last_engagement"] = features["days_since_signup"]
+            return features
+        
         # Process engagement history
         if engagement_history:
             # Count events by type
@@ -58,11 +72,11 @@ class CustomerDataProcessor:
             for event in engagement_history:
                 event_type = event.get("event_type", "unknown")
                 event_types[event_type] = event_types.get(event_type, 0) + 1
-                
+            
             features["total_events"] = len(engagement_history)
             for event_type, count in event_types.items():
                 features[f"{event_type}_count"] = count
-                
+            
             # Calculate engagement rate
             if "email_open_count" in features and "email_click_count" in features:
                 opens = features.get("email_open_count", 0)
@@ -74,13 +88,13 @@ class CustomerDataProcessor:
             
             # Calculate recency (days since last engagement)
             try:
-                timestamps = [datetime.fromisoformat(event.get("timestamp", "").replace("Z", "+00:00")) 
+                timestamps = [parse_timestamp(event["timestamp"])
                              for event in engagement_history 
-                             if "timestamp" in event]
+                             if event.get("timestamp") is not None]
                 
                 if timestamps:
                     latest_timestamp = max(timestamps)
-                    features["days_since_last_engagement"] = (datetime.now() - latest_timestamp).days
+                    features["days_since_last_engagement"] = (now - latest_timestamp).days
                 else:
                     features["days_since_last_engagement"] = features["days_since_signup"]
             except (ValueError, TypeError):
@@ -89,20 +103,37 @@ class CustomerDataProcessor:
             # No engagement history
             features["total_events"] = 0
             features["days_since_last_engagement"] = features["days_since_signup"]
-            
+        
         return features
     
+    async def extract_features_async(self, customer_data: Dict[str, Any], 
+                                    engagement_history: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Run extract_features on the process pool.
+        
+        Args:
+            customer_data: Raw customer data
+            engagement_history: Optional list of engagement events
+        
+        Returns:
+            Dictionary of extracted features
+        """
+        if engagement_history is None:
+            # An online feature read is a row lookup, not worth a process hop
+            return self.extract_features(customer_data)
+        return await run_in_process(self.extract_features, customer_data, engagement_history)
+    
     def segment_customer(self, features: Dict[str, Any]) -> str:
         """
         Assign a segment to a customer based on extracted features.
         
         Args:
             features: Extracted customer features
-            
+        
         Returns:
             Segment name
         """
-        logger.info(f"Segmenting customer {features.get('customer_id', 'unknown')}")
+        item_logger.info("Segmenting customer %s", features.get('customer_id', 'unknown'))
         
         # Simple rule-based segmentation
         
@@ -111,36 +142,68 @@ class CustomerDataProcessor:
             features.get("purchase_count", 0) > 3 and
             features.get("days_since_last_engagement", 999) < 7):
             return "VIP"
-            
+        
         # Active segment: Regular engagement
         if (features.get("total_events", 0) > 10 and 
             features.get("days_since_last_engagement", 999) < 14):
             return "Active"
-            
+        
         # Recent segment: New customers with some engagement
         if (features.get("days_since_signup", 0) < 30 and 
             features.get("total_events", 0) > 0):
             return "Recent"
-            
+        
         # At Risk segment: Declining engagement
         if (features.get("days_since_last_engagement", 0) > 30 and 
             features.get("total_events", 0) > 5):
             return "At Risk"
-            
+        
         # Standard segment: Default
         return "Standard"
     
+    def segment_customers(self, features: pd.DataFrame) -> pd.Series:
+        """
+        Assign segments to many customers at once.
+        
+        Vectorized equivalent of segment_customer over a frame with one row
+        per customer and the same feature columns.
+        
+        Args:
+            features: Extracted customer features, one row per customer
+        
+        Returns:
+            Series of segment names aligned with the features index
+        """
+        def column(name: str, default: float) -> np.ndarray:
+            if name in features:
+                return features[name].fillna(default).to_numpy()
+            return np.full(len(features), default)
+        
+        total_events = column("total_events", 0)
+        purchase_count = column("purchase_count", 0)
+        days_since_signup = column("days_since_signup", 0)
+        days_since_last_engagement = column("days_since_last_engagement", 999)
+        
+        conditions = [
+            (total_events > 20) & (purchase_count > 3) & (days_since_last_engagement < 7),
+            (total_events > 10) & (days_since_last_engagement < 14),
+            (days_since_signup < 30) & (total_events > 0),
+            (days_since_last_engagement > 30) & (total_events > 5)
+        ]
+        segments = np.select(conditions, ["VIP", "Active", "Recent", "At Risk"], default="Standard")
+        return pd.Series(segments, index=features.index, name="segment")
+    
     def normalize_features(self, features: Dict[str, Any]) -> Dict[str, Any]:
         """
         Normalize numerical features for machine learning models.
         
         Args:
             features: Raw features
-            
+        
         Returns:
             Normalized features
         """
-        logger.info(f"Normalizing features for customer {features.get('customer_id', 'unknown')}")
+        item_logger.info("Normalizing features for customer %s", features.get('customer_id', 'unknown'))
         
         normalized = features.copy()
         
@@ -157,7 +220,7 @@ class CustomerDataProcessor:
         for feature, params in normalization_params.items():
             if feature in normalized and isinstance(normalized[feature], (int, float)):
                 normalized[f"{feature}_normalized"] = (normalized[feature] - params["mean"]) / params["std"]
-                
+        
         return normalized
 
 class RewardDataProcessor:
@@ -174,11 +237,11 @@ class RewardDataProcessor:
         
         Args:
             reward_data: Raw reward data
-            
+        
         Returns:
             Dictionary of extracted features
         """
-        logger.info(f"Extracting features for reward {reward_data.get('id', 'unknown')}")
+        item_logger.info("Extracting features for reward %s", reward_data.get('id', 'unknown'))
         
         features = {}
         
@@ -200,7 +263,7 @@ class RewardDataProcessor:
         if features["has_min_purchase"]:
             # Discount appeal score for rewards with conditions
             appeal_score = appeal_score * 0.8
-            
+        
         features["appeal_score"] = appeal_score
         
         return features
@@ -213,12 +276,12 @@ class RewardDataProcessor:
         Args:
             reward_features: Extracted reward features
             customer_features: Extracted customer features
-            
+        
         Returns:
             Relevance score from 0 to 1
         """
-        logger.info(f"Calculating relevance score between reward {reward_features.get('reward_id', 'unknown')} "
-                  f"and customer {customer_features.get('customer_id', 'unknown')}")
+        item_logger.info("Calculating relevance score between reward %s and customer %s",
+                         reward_features.get('reward_id', 'unknown'), customer_features.get('customer_id', 'unknown'))
         
         # Base score
         score = 0.5
@@ -240,7 +303,7 @@ class RewardDataProcessor:
         if segment in segment_preferences and reward_type in segment_preferences[segment]:
             segment_factor = segment_preferences[segment][reward_type]
             score = score * segment_factor
-            
+        
         # Consider minimum purchase requirement
         if reward_features.get("has_min_purchase", False):
             min_purchase = reward_features.get("min_purchase_value", 0)
@@ -257,15 +320,302 @@ class RewardDataProcessor:
             else:
                 # No purchase history, slightly discount rewards with minimums
                 score = score * 0.9
-                
+        
         # Consider recency
         days_since_engagement = customer_features.get("days_since_last_engagement", 0)
         if days_since_engagement > 30:
             # For disengaged customers, higher value rewards are more appealing
             value_factor = min(1.0, reward_features.get("value", 0) / 50.0)
             score = score * (1.0 + value_factor * 0.3)
-            
+        
         # Ensure score is between 0 and 1
         score = max(0.0, min(1.0, score))
         
         return score
+
+DAY_NS = 86_400 * 10**9
+WEEK_NS = 7 * DAY_NS
+# The Unix epoch is a Thursday; shifting by three days aligns weeks to Mondays
+WEEK_OFFSET_NS = 3 * DAY_NS
+
+def _epoch_ns(timestamps: pd.Series) -> np.ndarray:
+    """Convert a UTC timestamp column to int64 nanoseconds since the epoch."""
+    return timestamps.values.astype("datetime64[ns]").view(np.int64)
+
+def _from_epoch_ns(values: np.ndarray) -> pd.DatetimeIndex:
+    """Convert int64 nanoseconds since the epoch to UTC timestamps."""
+    return pd.DatetimeIndex(values.view("datetime64[ns]")).tz_localize("UTC")
+
+def _count_distinct_pairs(groups: np.ndarray, members: np.ndarray, 
+                          n_groups: int, n_members: int, 
+                          max_bitmap: int = 64_000_000) -> np.ndarray:
+    """Count distinct members per group code, with a bitmap when it fits in memory."""
+    if n_groups * n_members <= max_bitmap:
+        seen = np.zeros(n_groups * n_members, dtype=bool)
+        seen[groups * n_members + members] = True
+        return seen.reshape(n_groups, n_members).sum(axis=1)
+    distinct = pd.unique(groups * n_members + members)
+    return np.bincount(distinct // n_members, minlength=n_groups)
+
+class EngagementEventProcessor:
+    """
+    Compute engagement, reward and customer metrics from columnar event frames.
+    
+    Frames follow the event store schema (see workspace.data.event_store).
+    Per-customer aggregates are computed over the customer_id categorical
+    codes with bincount and ufunc reductions, so cost grows with the number
+    of events rather than with per-customer Python work.
+    """
+    
+    ENGAGEMENT_EVENT_TYPES = ["email_open", "email_click", "reward_claim", "purchase"]
+    SEGMENTS = ["VIP", "Active", "Recent", "At Risk", "Standard"]
+    
+    def __init__(self):
+        logger.info("EngagementEventProcessor initialized")
+    
+    def customer_features(self, events: pd.DataFrame, 
+                          as_of: pd.Timestamp, 
+                          first_seen: Optional[pd.Series] = None) -> pd.DataFrame:
+        """
+        Extract per-customer features from an event frame.
+        
+        Args:
+            events: Event frame
+            as_of: Reference time for recency features
+            first_seen: Optional first-event time per customer across all history,
+                used as the signup time (defaults to the first event in the frame)
+        
+        Returns:
+            Frame indexed by customer_id (sharing the events' categories) with
+            the same feature names as CustomerDataProcessor.extract_features
+        """
+        categories = events["customer_id"].cat.categories
+        codes = events["customer_id"].cat.codes.to_numpy()
+        valid = codes >= 0
+        codes = codes[valid].astype(np.int64)
+        timestamps = _epoch_ns(events["timestamp"])[valid]
+        n_customers = len(categories)
+        
+        total_events = np.bincount(codes, minlength=n_customers)
+        present = np.flatnonzero(total_events)
+        
+        first_event = np.full(n_customers, np.iinfo(np.int64).max)
+        np.minimum.at(first_event, codes, timestamps)
+        last_event = np.full(n_customers, np.iinfo(np.int64).min)
+        np.maximum.at(last_event, codes, timestamps)
+        
+        event_types = events["event_type"].cat.categories
+        type_codes = events["event_type"].cat.codes.to_numpy()[valid]
+        type_counts = np.bincount(
+            codes * len(event_types) + type_codes, minlength=n_customers * len(event_types)
+        ).reshape(n_customers, len(event_types))
+        
+        signup = first_event[present]
+        if first_seen is not None:
+            known = first_seen.reindex(categories[present])
+            signup = np.where(known.notna(), _epoch_ns(known), signup)
+        
+        as_of_ns = as_of.as_unit("ns").value
+        index = pd.CategoricalIndex(
+            pd.Categorical.from_codes(present, categories=categories), name="customer_id"
+        )
+        features = pd.DataFrame({
+            "total_events": total_events[present],
+            "first_event": _from_epoch_ns(first_event[present]),
+            "last_event": _from_epoch_ns(last_event[present]),
+            "signup_at": _from_epoch_ns(signup)
+        }, index=index)
+        for position, event_type in enumerate(event_types):
+            features[f"{event_type}_count"] = type_counts[present, position]
+        
+        features["days_since_signup"] = (as_of_ns - signup) // DAY_NS
+        features["days_since_last_engagement"] = (as_of_ns - last_event[present]) // DAY_NS
+        return features
+    
+    def engagement_metrics(self, events: pd.DataFrame, customer_count: int) -> Dict[str, Any]:
+        """
+        Compute engagement rates and weekly trends.
+        
+        Args:
+            events: Event frame for the reporting window
+            customer_count: Size of the customer base used as denominator
+        
+        Returns:
+            Dictionary of engagement metrics
+        """
+        base = max(customer_count, 1)
+        n_customers = len(events["customer_id"].cat.categories)
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        event_type = events["event_type"]
+        
+        def customers_with(mask: np.ndarray) -> int:
+            mask = mask & (codes >= 0)
+            return int(np.count_nonzero(np.bincount(codes[mask], minlength=n_customers)))
+        
+        engaged = event_type.isin(self.ENGAGEMENT_EVENT_TYPES).to_numpy() & (codes >= 0)
+        is_open = (event_type == "email_open").to_numpy()
+        opens = int(is_open.sum())
+        clicks = int((event_type == "email_click").sum())
+        
+        by_content_type = {}
+        content_codes = events["content_type"].cat.codes.to_numpy()
+        tagged = content_codes >= 0
+        if tagged.any():
+            interacted = event_type.isin(["email_click", "reward_claim"]).to_numpy()[tagged]
+            content_types = events["content_type"].cat.categories
+            totals = np.bincount(content_codes[tagged], minlength=len(content_types))
+            hits = np.bincount(content_codes[tagged], weights=interacted, minlength=len(content_types))
+            by_content_type = {
+                str(content_type): float(hits[i] / totals[i])
+                for i, content_type in enumerate(content_types) if totals[i]
+            }
+        
+        # Distinct engaged customers per Monday-aligned week
+        weeks = (_epoch_ns(events["timestamp"])[engaged] + WEEK_OFFSET_NS) // WEEK_NS
+        first_week = int(weeks.min()) if len(weeks) else 0
+        n_weeks = int(weeks.max()) - first_week + 1 if len(weeks) else 0
+        weekly_counts = _count_distinct_pairs(weeks - first_week, codes[engaged], n_weeks, n_customers)
+        week_ids = np.flatnonzero(weekly_counts) + first_week
+        weekly_counts = weekly_counts[weekly_counts > 0]
+        
+        return {
+            "overall_engagement_rate": customers_with(engaged) / base,
+            "email_open_rate": customers_with(is_open) / base,
+            "email_click_rate": clicks / opens if opens > 0 else 0.0,
+            "reward_claim_rate": customers_with((event_type == "reward_claim").to_numpy()) / base,
+            "engagement_by_content_type": by_content_type,
+            "engagement_trends": [
+                {
+                    "date": pd.Timestamp(int(week) * WEEK_NS - WEEK_OFFSET_NS).date().isoformat(),
+                    "rate": int(count) / base
+                }
+                for week, count in zip(week_ids, weekly_counts)
+            ]
+        }
+    
+    def reward_metrics(self, events: pd.DataFrame, 
+                       segments: pd.Series, 
+                       reward_names: Optional[Dict[str, str]] = None, 
+                       top_n: int = 5) -> Dict[str, Any]:
+        """
+        Compute claim and conversion rates per reward and per segment.
+        
+        A claim converts when the claiming customer makes a purchase at or
+        after the claim time within the window.
+        
+        Args:
+            events: Event frame for the reporting window
+            segments: Segment per customer, as returned by segment_customers
+            reward_names: Optional mapping of reward ID to display name
+            top_n: Number of top rewards to report
+        
+        Returns:
+            Dictionary of reward metrics
+        """
+        reward_names = reward_names or {}
+        categories = events["customer_id"].cat.categories
+        n_customers = len(categories)
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        timestamps = _epoch_ns(events["timestamp"])
+        reward_codes = events["reward_id"].cat.codes.to_numpy().astype(np.int64)
+        rewards = events["reward_id"].cat.categories
+        
+        last_purchase = np.full(n_customers, np.iinfo(np.int64).min)
+        purchases = (events["event_type"] == "purchase").to_numpy() & (codes >= 0)
+        np.maximum.at(last_purchase, codes[purchases], timestamps[purchases])
+        
+        claims = (events["event_type"] == "reward_claim").to_numpy() & (reward_codes >= 0) & (codes >= 0)
+        claim_customers = codes[claims]
+        claim_rewards = reward_codes[claims]
+        converted = last_purchase[claim_customers] >= timestamps[claims]
+        
+        claim_counts = np.bincount(claim_rewards, minlength=len(rewards))
+        conversions = np.bincount(claim_rewards, weights=converted, minlength=len(rewards))
+        claimers = _count_distinct_pairs(claim_rewards, claim_customers, len(rewards), n_customers)
+        
+        active_customers = max(len(segments), 1)
+        top = np.argsort(-claim_counts, kind="stable")[:top_n]
+        top_rewards = [
+            {
+                "id": str(rewards[i]),
+                "name": reward_names.get(str(rewards[i]), str(rewards[i])),
+                "claims": int(claim_counts[i]),
+                "claim_rate": int(claimers[i]) / active_customers,
+                "conversion_rate": float(conversions[i] / claim_counts[i])
+            }
+            for i in top if claim_counts[i] > 0
+        ]
+        
+        # Segment of each claiming customer, looked up by customer code
+        segment_labels = pd.Categorical(segments.to_numpy(), categories=self.SEGMENTS)
+        segment_by_customer = np.full(n_customers, -1, dtype=np.int64)
+        if isinstance(segments.index, pd.CategoricalIndex) and segments.index.categories.equals(categories):
+            positions = segments.index.codes
+        else:
+            positions = categories.get_indexer(segments.index)
+        segment_by_customer[positions[positions >= 0]] = segment_labels.codes[positions >= 0]
+        
+        segment_sizes = np.bincount(segment_labels.codes[segment_labels.codes >= 0], minlength=len(self.SEGMENTS))
+        claim_segments = segment_by_customer[claim_customers]
+        tagged = claim_segments >= 0
+        segment_claims = np.bincount(claim_segments[tagged], minlength=len(self.SEGMENTS))
+        segment_conversions = np.bincount(claim_segments[tagged], weights=converted[tagged], minlength=len(self.SEGMENTS))
+        unique_claimers = pd.unique(claim_customers[tagged])
+        segment_claimers = np.bincount(segment_by_customer[unique_claimers], minlength=len(self.SEGMENTS))
+        
+        by_segment = {}
+        for i, segment in enumerate(self.SEGMENTS):
+            if segment_sizes[i] == 0:
+                continue
+            by_segment[segment] = {
+                "claim_rate": int(segment_claimers[i]) / int(segment_sizes[i]),
+                "conversion_rate": float(segment_conversions[i] / segment_claims[i]) if segment_claims[i] else 0.0
+            }
+        
+        return {
+            "top_performing_rewards": top_rewards,
+            "reward_performance_by_segment": by_segment
+        }
+    
+    def customer_metrics(self, events: pd.DataFrame, 
+                         previous_events: pd.DataFrame, 
+                         features: pd.DataFrame, 
+                         segments: pd.Series, 
+                         customer_count: int, 
+                         start: pd.Timestamp) -> Dict[str, Any]:
+        """
+        Compute customer base, activity, churn and segment metrics.
+        
+        Args:
+            events: Event frame for the reporting window
+            previous_events: Event frame for the window of equal length before it
+            features: Customer features for the window, from customer_features
+            segments: Segment per active customer
+            customer_count: Size of the customer base
+            start: Start of the reporting window
+        
+        Returns:
+            Dictionary of customer metrics
+        """
+        def active(frame: pd.DataFrame) -> pd.Index:
+            # The two frames may come from different store segments, so they
+            # are compared by customer ID rather than by categorical code
+            customer_ids = frame["customer_id"]
+            codes = customer_ids.cat.codes.to_numpy()
+            return customer_ids.cat.categories[pd.unique(codes[codes >= 0])]
+        
+        active_now = active(events)
+        active_before = active(previous_events)
+        previously_active = len(active_before)
+        churned = int((~active_before.isin(active_now)).sum())
+        
+        distribution = segments.value_counts(normalize=True)
+        
+        return {
+            "total_customers": customer_count,
+            "new_customers": int((features["signup_at"] >= start).sum()),
+            "active_customers": len(active_now),
+            "at_risk_customers": int((segments == "At Risk").sum()),
+            "churn_rate": churned / previously_active if previously_active else 0.0,
+            "segment_distribution": {segment: float(share) for segment, share in distribution.items()}
+        }
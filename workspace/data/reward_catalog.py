@@ -0,0 +1,209 @@
+"""
+In-memory reward catalog with precomputed feature arrays and filter bitmaps.
+"""
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+import numpy as np
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Same discount RewardDataProcessor.extract_features applies to rewards with a minimum purchase
+MIN_PURCHASE_APPEAL_FACTOR = 0.8
+MAX_CACHED_SELECTIONS = 1024
+
+class RewardCatalog:
+    """
+    Immutable, indexed snapshot of the reward catalog.
+    
+    Rewards are kept in ID order. Features are precomputed once as one array
+    per column (type_codes, value, min_purchase, appeal_score), and each
+    reward type and condition key has a boolean bitmap over the rows, so a
+    filter is a few array operations and its result is cached for the life
+    of the snapshot. A catalog is never modified in place: a change builds a
+    new catalog that replaces the shared one in a single reference swap, so
+    a request holding a catalog always sees one consistent version.
+    """
+    
+    def __init__(self, rewards: Iterable[Dict[str, Any]], version: int = 0):
+        self.rewards = sorted(rewards, key=lambda reward: reward["id"])
+        self.version = version
+        conditions = [reward.get("conditions") or {} for reward in self.rewards]
+        
+        self.ids = np.array([reward["id"] for reward in self.rewards], dtype=object)
+        self.names = np.array([reward.get("name", "") for reward in self.rewards], dtype=object)
+        types = np.array([str(reward.get("type", "unknown")) for reward in self.rewards], dtype=object)
+        self.types, type_codes = np.unique(types, return_inverse=True)
+        self.type_codes = type_codes.astype(np.int32)
+        self.value = np.array([float(reward.get("value", 0)) for reward in self.rewards])
+        self.has_min_purchase = np.array(["min_purchase" in condition for condition in conditions], dtype=bool)
+        self.min_purchase = np.array([float(condition.get("min_purchase", 0.0)) for condition in conditions])
+        self.appeal_score = np.where(self.has_min_purchase, self.value * MIN_PURCHASE_APPEAL_FACTOR, self.value)
+        
+        self._bitmaps: Dict[Tuple[str, Any], np.ndarray] = {
+            ("type", reward_type): self.type_codes == code for code, reward_type in enumerate(self.types)
+        }
+        for key in {key for condition in conditions for key in condition}:
+            self._bitmaps[("condition", key)] = np.array([key in condition for condition in conditions], dtype=bool)
+        self._selections: Dict[tuple, np.ndarray] = {}
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.rewards)
+    
+    @classmethod
+    def of(cls, rewards: Union["RewardCatalog", List[Dict[str, Any]]]) -> "RewardCatalog":
+        """
+        Get a catalog for a list of rewards, or the catalog itself.
+        
+        Args:
+            rewards: A catalog, or reward dictionaries to index
+        
+        Returns:
+            RewardCatalog over the rewards
+        """
+        return rewards if isinstance(rewards, cls) else cls(rewards)
+    
+    def select(self, filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """
+        Find the rows matching a set of filters.
+        
+        "type" matches one reward type or any of a list of types, and
+        "condition" matches rewards that have the given condition key (or all
+        of a list of keys). Any other field is compared for equality with each
+        reward's value, which is evaluated once and then cached as a bitmap.
+        
+        Args:
+            filters: Optional dictionary of filters, all of which must match
+        
+        Returns:
+            Row indices in ID order
+        """
+        key = tuple(sorted((field, _freeze(value)) for field, value in (filters or {}).items()))
+        rows = self._selections.get(key)
+        if rows is not None:
+            return rows
+        
+        mask = np.ones(len(self.rewards), dtype=bool)
+        for field, value in key:
+            mask &= self._bitmap(field, value)
+        rows = np.flatnonzero(mask)
+        with self._lock:
+            if len(self._selections) >= MAX_CACHED_SELECTIONS:
+                self._selections.clear()
+            self._selections[key] = rows
+        return rows
+    
+    def records(self, rows: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Get reward dictionaries for a set of rows.
+        
+        Args:
+            rows: Optional row indices; defaults to the whole catalog
+        
+        Returns:
+            List of reward data dictionaries
+        """
+        if rows is None:
+            return list(self.rewards)
+        return [self.rewards[row] for row in rows]
+    
+    def page(self, after: Optional[str] = None,
+             limit: int = 100,
+             filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Get one page of matching rewards ordered by ID.
+        
+        Args:
+            after: Optional reward ID to start after
+            limit: Maximum number of rewards to return
+            filters: Optional dictionary of filters, as for select()
+        
+        Returns:
+            List of reward data dictionaries, ordered by ID
+        """
+        rows = self.select(filters)
+        if after is not None:
+            position = np.searchsorted(self.ids, after, side="right")
+            rows = rows[np.searchsorted(rows, position):]
+        return self.records(rows[:limit])
+    
+    def features(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Get precomputed feature arrays, matching RewardDataProcessor.extract_features.
+        
+        Args:
+            rows: Optional row indices; defaults to the whole catalog
+        
+        Returns:
+            Dictionary of feature name to array, one entry per row
+        """
+        columns = {
+            "reward_id": self.ids,
+            "type_code": self.type_codes,
+            "value": self.value,
+            "has_min_purchase": self.has_min_purchase,
+            "min_purchase_value": self.min_purchase,
+            "appeal_score": self.appeal_score
+        }
+        return columns if rows is None else {name: column[rows] for name, column in columns.items()}
+    
+    def derived(self, name: str, compute: Callable[["RewardCatalog"], Any]) -> Any:
+        """
+        Get a value derived from the catalog, computing it once per snapshot.
+        
+        Lets models cache per-reward arrays of their own, which are dropped
+        together with the snapshot when the catalog changes.
+        
+        Args:
+            name: Cache key for the value
+            compute: Function of the catalog that computes the value
+        
+        Returns:
+            The cached value
+        """
+        if name not in self._derived:
+            value = compute(self)
+            with self._lock:
+                self._derived.setdefault(name, value)
+        return self._derived[name]
+    
+    def with_rewards(self, rewards: Iterable[Dict[str, Any]]) -> "RewardCatalog":
+        """
+        Build the next version of the catalog with rewards added or replaced.
+        
+        Args:
+            rewards: Rewards to upsert by ID
+        
+        Returns:
+            New catalog; this one is left unchanged
+        """
+        by_id = {reward["id"]: reward for reward in self.rewards}
+        by_id.update((reward["id"], reward) for reward in rewards)
+        return RewardCatalog(by_id.values(), version=self.version + 1)
+    
+    def _bitmap(self, field: str, value: Any) -> np.ndarray:
+        """Get the bitmap of rows matching one filter."""
+        if field in ("type", "condition"):
+            values = value if isinstance(value, tuple) else (value,)
+            missing = np.zeros(len(self.rewards), dtype=bool)
+            bitmaps = [self._bitmaps.get((field, str(item)), missing) for item in values]
+            if field == "type":
+                return np.logical_or.reduce([missing, *bitmaps])
+            return np.logical_and.reduce([~missing, *bitmaps])
+        
+        bitmap = self._bitmaps.get((field, value))
+        if bitmap is None:
+            bitmap = np.array([_freeze(reward.get(field)) == value for reward in self.rewards], dtype=bool)
+            with self._lock:
+                self._bitmaps[(field, value)] = bitmap
+        return bitmap
+
+def _freeze(value: Any) -> Any:
+    """Make a filter value hashable so it can be part of a cache key."""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value, key=str)) if isinstance(value, (set, frozenset)) else tuple(value)
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    return value
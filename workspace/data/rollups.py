@@ -0,0 +1,786 @@
+"""
+Daily pre-aggregated rollups (cubes) over the event store.
+
+Two cubes are kept per day:
+
+- the event cube, one row per (date, segment, campaign_id, content_type,
+  event_type, reward_id) cell with event, distinct-customer, amount and
+  same-day conversion measures;
+- the activity cube, one row per (date, segment) with distinct active,
+  engaged, opening and claiming customers.
+
+Distinct counts are exact within a day and add up to customer-days across
+days. The distinct customers active on each day are kept alongside the
+cubes, so range-wide active, new and churned customer counts come from
+those sets too. Reports built from the rollups therefore never touch raw
+events, and their cost depends on the number of days in the range, not on
+event volume.
+"""
+import bisect
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from workspace.settings import settings
+from workspace.data.event_store import EventStore, TimeBound, events_to_frame, to_utc_timestamp
+from workspace.data.processors import (
+    CustomerDataProcessor, EngagementEventProcessor, DAY_NS, WEEK_NS, WEEK_OFFSET_NS, _epoch_ns
+)
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SEGMENTS = EngagementEventProcessor.SEGMENTS
+# Customers first seen after the last segment refresh have only recent activity
+NEW_CUSTOMER_SEGMENT = "Recent"
+CUBE_DIMENSIONS = ["date", "segment", "campaign_id", "content_type", "event_type", "reward_id"]
+CELL_DIMENSIONS = CUBE_DIMENSIONS[1:]
+CUBE_MEASURES = ["events", "customers", "amount", "conversions"]
+ACTIVITY_MEASURES = ["active", "engaged", "opened", "claimed"]
+# One day's cube rows as column arrays, without the date column
+DayRows = Dict[str, np.ndarray]
+
+def _empty_cubes() -> Tuple[pd.DataFrame, pd.DataFrame]:
+    cube = pd.DataFrame({column: [] for column in CUBE_DIMENSIONS + CUBE_MEASURES})
+    cube["date"] = pd.Series([], dtype="datetime64[ns]")
+    activity = pd.DataFrame({column: [] for column in ["date", "segment"] + ACTIVITY_MEASURES})
+    activity["date"] = pd.Series([], dtype="datetime64[ns]")
+    return cube, activity
+
+def _decode(codes: np.ndarray, categories: pd.Index) -> np.ndarray:
+    """Map categorical codes back to labels, with None for missing values."""
+    labels = np.asarray(categories, dtype=object)
+    return np.where(codes >= 0, labels[np.maximum(codes, 0)] if len(labels) else None, None)
+
+def _to_dates(days: np.ndarray) -> np.ndarray:
+    return (np.asarray(days, dtype=np.int64) * DAY_NS).view("datetime64[ns]")
+
+def _days_of(frame: pd.DataFrame) -> np.ndarray:
+    return frame["date"].to_numpy().astype("datetime64[ns]").view(np.int64) // DAY_NS
+
+def _split_days(frame: pd.DataFrame) -> Dict[int, DayRows]:
+    """Split cube rows into column arrays per day."""
+    days = _days_of(frame)
+    order = np.argsort(days, kind="stable")
+    days = days[order]
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]]) if len(days) else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(days)]
+    columns = {column: frame[column].to_numpy()[order] for column in frame.columns if column != "date"}
+    return {
+        int(days[start]): {column: values[start:end] for column, values in columns.items()}
+        for start, end in zip(starts.tolist(), ends.tolist())
+    }
+
+def _stack(days: List[int], parts: List[DayRows]) -> pd.DataFrame:
+    """Concatenate the column arrays of consecutive days into one cube frame."""
+    rows = pd.DataFrame({column: np.concatenate([part[column] for part in parts]) for column in parts[0]})
+    rows.insert(0, "date", _to_dates(np.repeat(days, [len(part["segment"]) for part in parts])))
+    return rows
+
+def _event_codes(events: pd.DataFrame, segments: pd.Series) -> pd.DataFrame:
+    """
+    Encode events as integer cube coordinates.
+
+    Args:
+        events: Event frame in the event store schema
+        segments: Segment per customer ID
+
+    Returns:
+        Frame with day, segment code, dimension codes, customer code,
+        amount and epoch nanosecond timestamp per event
+    """
+    categories = events["customer_id"].cat.categories
+    codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+    segment_by_customer = pd.Categorical(
+        segments.reindex(categories).fillna(NEW_CUSTOMER_SEGMENT), categories=SEGMENTS
+    ).codes
+    segment = np.where(codes >= 0, segment_by_customer[np.maximum(codes, 0)], SEGMENTS.index(NEW_CUSTOMER_SEGMENT))
+    timestamps = _epoch_ns(events["timestamp"])
+
+    return pd.DataFrame({
+        "date": timestamps // DAY_NS,
+        "segment": segment,
+        "campaign_id": events["campaign_id"].cat.codes.to_numpy(),
+        "content_type": events["content_type"].cat.codes.to_numpy(),
+        "event_type": events["event_type"].cat.codes.to_numpy(),
+        "reward_id": events["reward_id"].cat.codes.to_numpy(),
+        "customer": codes,
+        "amount": events["amount"].to_numpy(),
+        "timestamp": timestamps
+    })
+
+def build_daily_cubes(events: pd.DataFrame,
+                      segments: pd.Series) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Aggregate events into daily event and activity cubes.
+
+    Module-level so it can run in worker processes during backfills.
+
+    Args:
+        events: Event frame in the event store schema
+        segments: Segment per customer ID
+
+    Returns:
+        Tuple of (event cube, activity cube, distinct date and customer_id
+        pairs of the customers active each day)
+    """
+    if not len(events):
+        cube, activity = _empty_cubes()
+        return cube, activity, pd.DataFrame({"date": activity["date"], "customer_id": pd.Categorical([])})
+
+    frame = _event_codes(events, segments)
+    day, timestamps = frame["date"].to_numpy(), frame["timestamp"].to_numpy()
+    codes = frame["customer"].to_numpy()
+    event_type = events["event_type"]
+
+    # A claim converts when the customer purchases later the same day
+    purchases = (event_type == "purchase").to_numpy()
+    # Missing customers (code -1) are keyed as their own customer on each day
+    day_customer = day * (len(events["customer_id"].cat.categories) + 1) + codes + 1
+    last_purchase = pd.Series(timestamps[purchases]).groupby(day_customer[purchases]).max()
+    claims = (event_type == "reward_claim").to_numpy()
+    converted = np.zeros(len(events), dtype=np.int64)
+    if claims.any() and len(last_purchase):
+        claim_last_purchase = last_purchase.reindex(day_customer[claims]).to_numpy()
+        converted[claims] = claim_last_purchase >= timestamps[claims]
+    frame["converted"] = converted
+
+    cube = frame.groupby(CUBE_DIMENSIONS, sort=False).agg(
+        events=("customer", "size"),
+        customers=("customer", "nunique"),
+        amount=("amount", "sum"),
+        conversions=("converted", "sum")
+    ).reset_index()
+    for column in ["campaign_id", "content_type", "event_type", "reward_id"]:
+        cube[column] = _decode(cube[column].to_numpy(), events[column].cat.categories)
+
+    def distinct_customers(mask: Optional[np.ndarray] = None) -> pd.Series:
+        subset = frame if mask is None else frame[mask]
+        return subset[["date", "segment", "customer"]].drop_duplicates().groupby(["date", "segment"]).size()
+
+    activity = pd.DataFrame({
+        "active": distinct_customers(),
+        "engaged": distinct_customers(event_type.isin(EngagementEventProcessor.ENGAGEMENT_EVENT_TYPES).to_numpy()),
+        "opened": distinct_customers((event_type == "email_open").to_numpy()),
+        "claimed": distinct_customers(claims)
+    }).fillna(0).astype(np.int64).reset_index()
+
+    for result in (cube, activity):
+        result["segment"] = np.asarray(SEGMENTS, dtype=object)[result["segment"].to_numpy()]
+        result["date"] = _to_dates(result["date"].to_numpy())
+
+    known = codes >= 0
+    customers = pd.DataFrame({"date": day[known], "customer": codes[known]}).drop_duplicates()
+    customers = pd.DataFrame({
+        "date": _to_dates(customers["date"].to_numpy()),
+        "customer_id": pd.Categorical.from_codes(customers["customer"].to_numpy(), events["customer_id"].cat.categories)
+    })
+
+    return cube, activity, customers
+
+def segment_snapshot(event_store: EventStore, as_of: TimeBound = None) -> pd.Series:
+    """
+    Segment every customer in an event store from their full history.
+
+    Args:
+        event_store: Store to read events from
+        as_of: Reference time for recency features, defaults to now
+
+    Returns:
+        Segment per customer ID
+    """
+    as_of = to_utc_timestamp(as_of) if as_of is not None else pd.Timestamp.now(tz="UTC")
+    events = event_store.scan(end=as_of)
+    features = EngagementEventProcessor().customer_features(events, as_of, event_store.first_seen())
+    segments = CustomerDataProcessor().segment_customers(features)
+    segments.index = segments.index.astype(object)
+    return segments
+
+def _build_partition(args: Tuple[pd.DataFrame, pd.Series]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    events, segments = args
+    return build_daily_cubes(events, segments)
+
+class _DayState:
+    """
+    Running aggregation state for one day of the cubes.
+
+    Holds what is needed to merge further events into the day without
+    reading its earlier events again: the day's cells, the (cell, customer)
+    pairs and customers already counted as distinct, and each customer's
+    last purchase and not yet converted claims.
+    """
+
+    __slots__ = ("cells", "measures", "pairs", "flags", "activity", "last_purchase", "pending")
+
+    def __init__(self):
+        # Cell key (segment, campaign_id, content_type, event_type, reward_id) -> row position
+        self.cells: Dict[Tuple, int] = {}
+        self.measures = {
+            "events": np.zeros(0, dtype=np.int64),
+            "customers": np.zeros(0, dtype=np.int64),
+            "amount": np.zeros(0, dtype=np.float64),
+            "conversions": np.zeros(0, dtype=np.int64)
+        }
+        self.pairs: set = set()
+        self.flags: Dict[str, set] = {measure: set() for measure in ACTIVITY_MEASURES}
+        self.activity = np.zeros((len(SEGMENTS), len(ACTIVITY_MEASURES)), dtype=np.int64)
+        self.last_purchase: Dict[int, int] = {}
+        # Claims (timestamp, row position) per customer without a later purchase yet
+        self.pending: Dict[int, List[Tuple[int, int]]] = {}
+
+    def cube(self) -> DayRows:
+        cells = list(zip(*self.cells))
+        rows = {dimension: np.array(labels, dtype=object) for dimension, labels in zip(CELL_DIMENSIONS, cells)}
+        return {**rows, **self.measures}
+
+    def activity_rows(self) -> DayRows:
+        active = self.activity[:, 0] > 0
+        rows = {"segment": np.asarray(SEGMENTS, dtype=object)[active]}
+        return {**rows, **{measure: self.activity[active, i] for i, measure in enumerate(ACTIVITY_MEASURES)}}
+
+class RollupStore:
+    """
+    Daily cubes over an event store, maintained incrementally.
+
+    Cube rows are kept per day. The first batch appended for a day rebuilds
+    that day once from the event store's slice; later batches are merged
+    into it through a running _DayState, so distinct-customer measures and
+    conversions stay exact and each update costs one batch plus the day's
+    cube cells. States are kept for the ROLLUP_LIVE_DAYS most recently
+    updated days.
+    """
+
+    def __init__(self, event_store: EventStore, directory: Optional[str] = None):
+        self.event_store = event_store
+        self.directory = directory
+        self.segments = pd.Series(dtype=object)
+        self.subscribed = False
+        self._lock = threading.Lock()
+        # Sorted days with rollups, and each day's cube rows
+        self._days: List[int] = []
+        self._cube_days: Dict[int, DayRows] = {}
+        self._activity_days: Dict[int, DayRows] = {}
+        # Codes of the customers active each day, in chunks, over a customer ID registry
+        self._active_days: Dict[int, List[np.ndarray]] = {}
+        self._customer_codes: Dict[str, int] = {}
+        self._first_day: Dict[int, int] = {}
+        self._new_customers: Dict[int, int] = {}
+        self._live: "OrderedDict[int, _DayState]" = OrderedDict()
+        logger.info("RollupStore initialized")
+
+    @property
+    def days(self) -> int:
+        """Number of days with rollups."""
+        return len(self._days)
+
+    def refresh_segments(self, as_of: TimeBound = None) -> pd.Series:
+        """
+        Recompute the customer segment snapshot used to label events.
+
+        Args:
+            as_of: Reference time for recency features, defaults to now
+
+        Returns:
+            Segment per customer ID
+        """
+        segments = segment_snapshot(self.event_store, as_of)
+        with self._lock:
+            self.segments = segments
+            # Running states hold cells labelled with the old segments
+            self._live.clear()
+        logger.info("Refreshed segments for %s customers", len(segments))
+        return segments
+
+    def backfill(self, start: TimeBound = None,
+                 end: TimeBound = None,
+                 workers: int = 1,
+                 days_per_partition: int = 7) -> int:
+        """
+        Rebuild cubes for every day in [start, end].
+
+        Days are split into partitions that are aggregated in parallel on a
+        process pool.
+
+        Args:
+            start: Optional first day to rebuild
+            end: Optional last day to rebuild
+            workers: Number of worker processes (1 builds in-process)
+            days_per_partition: Days aggregated per task
+
+        Returns:
+            Number of days rebuilt
+        """
+        if self.segments.empty:
+            self.refresh_segments(end)
+
+        events = self.event_store.scan(self._day_start(start), self._day_end(end))
+        if not len(events):
+            return 0
+
+        day = _epoch_ns(events["timestamp"]) // DAY_NS
+        boundaries = np.arange(day[0], day[-1] + days_per_partition + 1, days_per_partition)
+        splits = np.searchsorted(day, boundaries[1:-1])
+        partitions = [part for part in np.split(np.arange(len(events)), splits) if len(part)]
+        tasks = [(events.iloc[part[0]:part[-1] + 1], self.segments) for part in partitions]
+        logger.info("Backfilling rollups for %s days in %s partitions", len(np.unique(day)), len(tasks))
+
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_build_partition, tasks))
+        else:
+            results = [_build_partition(task) for task in tasks]
+
+        self._replace_days(results)
+        return int(len(np.unique(day)))
+
+    def subscribe(self) -> None:
+        """Merge every batch appended to the event store from now on into the cubes."""
+        if not self.subscribed:
+            self.event_store.subscribe(self.update)
+            self.subscribed = True
+
+    def ingest(self, events: Union[pd.DataFrame, List[Dict[str, Any]]]) -> int:
+        """
+        Append events to the event store and merge them into the cubes.
+
+        Args:
+            events: Events as a frame in the store schema or as dictionaries
+
+        Returns:
+            Number of events appended
+        """
+        if not isinstance(events, pd.DataFrame):
+            events = events_to_frame(events)
+        appended = self.event_store.append(events)
+        if not self.subscribed:
+            self.update(events)
+        return appended
+
+    def update(self, events: pd.DataFrame) -> int:
+        """
+        Merge newly appended events into the cubes of the days they fall on.
+
+        The events must already be in the event store, and each batch must
+        be passed once.
+
+        Args:
+            events: Newly appended events
+
+        Returns:
+            Number of days updated
+        """
+        events = events[events["timestamp"].notna()]
+        if not len(events):
+            return 0
+
+        day = _epoch_ns(events["timestamp"]) // DAY_NS
+        days = np.unique(day)
+        with self._lock:
+            for current in days.tolist():
+                state = self._live.pop(current, None)
+                if state is None:
+                    # Rebuild the day once; later batches for it are merged
+                    state = _DayState()
+                    start = pd.Timestamp(current * DAY_NS, tz="UTC")
+                    day_events = self.event_store.scan(start, start + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1))
+                    self._active_days[current] = []
+                else:
+                    day_events = events[day == current]
+                self._live[current] = state
+                self._merge_day(current, day_events, state)
+
+            while len(self._live) > settings.ROLLUP_LIVE_DAYS:
+                self._live.popitem(last=False)
+        return len(days)
+
+    def cubes(self, start: TimeBound = None,
+              end: TimeBound = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Get the event and activity cube rows for the days in [start, end].
+
+        Args:
+            start: Optional first day
+            end: Optional last day
+
+        Returns:
+            Tuple of (event cube, activity cube)
+        """
+        with self._lock:
+            days = self._days_between(start, end)
+            cubes = [self._cube_days[day] for day in days]
+            activities = [self._activity_days[day] for day in days]
+
+        if not days:
+            return _empty_cubes()
+        return _stack(days, cubes), _stack(days, activities)
+
+    def report_metrics(self, start: TimeBound = None,
+                       end: TimeBound = None,
+                       reward_names: Optional[Dict[str, str]] = None,
+                       top_n: int = 5) -> Dict[str, Any]:
+        """
+        Build report metrics by merging the daily cubes in [start, end].
+
+        Rates use customer-days (distinct customers per day, summed over days)
+        as denominators, and conversions are same-day. Distinct customers
+        over the whole range cannot be added up from daily cubes, so new,
+        active and churned customers are counted from the daily active
+        customer sets (see customer_activity).
+
+        Args:
+            start: Optional first day
+            end: Optional last day
+            reward_names: Optional mapping of reward ID to display name
+            top_n: Number of top rewards to report
+
+        Returns:
+            Dictionary with engagement_metrics, reward_metrics and customer_metrics
+        """
+        reward_names = reward_names or {}
+        cube, activity = self.cubes(start, end)
+
+        totals = activity[ACTIVITY_MEASURES].sum()
+        active_days = max(int(totals["active"]), 1)
+        events_by_type = cube.groupby("event_type")["events"].sum()
+        opens = int(events_by_type.get("email_open", 0))
+        clicks = int(events_by_type.get("email_click", 0))
+
+        tagged = cube[cube["content_type"].notna()]
+        interacted = tagged["event_type"].isin(["email_click", "reward_claim"])
+        per_content_type = tagged.groupby("content_type")["events"].sum()
+        hits = tagged[interacted].groupby("content_type")["events"].sum()
+
+        week = (activity["date"].to_numpy().view(np.int64) + WEEK_OFFSET_NS) // WEEK_NS
+        weekly = activity.groupby(week)[["engaged", "active"]].sum()
+
+        engagement_metrics = {
+            "overall_engagement_rate": int(totals["engaged"]) / active_days,
+            "email_open_rate": int(totals["opened"]) / active_days,
+            "email_click_rate": clicks / opens if opens > 0 else 0.0,
+            "reward_claim_rate": int(totals["claimed"]) / active_days,
+            "engagement_by_content_type": {
+                str(content_type): float(hits.get(content_type, 0) / count)
+                for content_type, count in per_content_type.items() if count
+            },
+            "engagement_trends": [
+                {
+                    "date": pd.Timestamp(int(week_id) * WEEK_NS - WEEK_OFFSET_NS).date().isoformat(),
+                    "rate": int(row["engaged"]) / max(int(row["active"]), 1)
+                }
+                for week_id, row in weekly.iterrows()
+            ]
+        }
+
+        claims = cube[(cube["event_type"] == "reward_claim") & cube["reward_id"].notna()]
+        per_reward = claims.groupby("reward_id")[["events", "customers", "conversions"]].sum()
+        per_reward = per_reward.sort_values("events", ascending=False, kind="stable").head(top_n)
+        per_segment_claims = claims.groupby("segment")[["events", "conversions"]].sum()
+        per_segment_activity = activity.groupby("segment")[ACTIVITY_MEASURES].sum()
+
+        reward_metrics = {
+            "top_performing_rewards": [
+                {
+                    "id": str(reward_id),
+                    "name": reward_names.get(str(reward_id), str(reward_id)),
+                    "claims": int(row["events"]),
+                    "claim_rate": int(row["customers"]) / active_days,
+                    "conversion_rate": float(row["conversions"] / row["events"])
+                }
+                for reward_id, row in per_reward.iterrows()
+            ],
+            "reward_performance_by_segment": {
+                segment: {
+                    "claim_rate": int(row["claimed"]) / max(int(row["active"]), 1),
+                    "conversion_rate": (
+                        float(per_segment_claims.loc[segment, "conversions"] / per_segment_claims.loc[segment, "events"])
+                        if segment in per_segment_claims.index else 0.0
+                    )
+                }
+                for segment, row in per_segment_activity.iterrows() if row["active"] > 0
+            }
+        }
+
+        segment_days = per_segment_activity["active"]
+        customer_metrics = {
+            "total_customers": max(len(self.segments), self.event_store.customer_count),
+            **self.customer_activity(start, end),
+            "active_customer_days": int(totals["active"]),
+            "at_risk_customers": int((self.segments == "At Risk").sum()),
+            "segment_distribution": {
+                segment: float(days / active_days) for segment, days in segment_days.items() if days > 0
+            }
+        }
+
+        return {
+            "event_count": int(cube["events"].sum()),
+            "engagement_metrics": engagement_metrics,
+            "reward_metrics": reward_metrics,
+            "customer_metrics": customer_metrics
+        }
+
+    def customer_activity(self, start: TimeBound = None,
+                          end: TimeBound = None) -> Dict[str, Any]:
+        """
+        Count new, active and churned customers for the days in [start, end].
+
+        Uses the same definitions as EngagementEventProcessor.customer_metrics,
+        at day granularity, from the customers active on each day and each
+        customer's first active day. Only days held in the rollups count.
+
+        Args:
+            start: Optional first day
+            end: Optional last day
+
+        Returns:
+            Dictionary with new_customers, active_customers and churn_rate
+            (customers active in the equally long period before start but not
+            in the range; 0.0 for an open-ended range)
+        """
+        with self._lock:
+            n_customers = len(self._customer_codes)
+            days = self._days_between(start, end)
+            active_now = [chunk for day in days for chunk in self._active_days[day]]
+            new_customers = sum(self._new_customers.get(day, 0) for day in days)
+            active_before = []
+            if start is not None and end is not None:
+                first_day = int(self._day_start(start).value // DAY_NS)
+                span = int(self._day_start(end).value // DAY_NS) - first_day + 1
+                previous_days = self._days_between(
+                    pd.Timestamp((first_day - span) * DAY_NS, tz="UTC"),
+                    pd.Timestamp((first_day - 1) * DAY_NS, tz="UTC")
+                )
+                active_before = [chunk for day in previous_days for chunk in self._active_days[day]]
+
+        def active(chunks: List[np.ndarray]) -> np.ndarray:
+            seen = np.zeros(n_customers, dtype=bool)
+            for chunk in chunks:
+                seen[chunk] = True
+            return seen
+
+        now = active(active_now)
+        before = active(active_before)
+        previously_active = int(before.sum())
+
+        return {
+            "new_customers": new_customers,
+            "active_customers": int(now.sum()),
+            "churn_rate": int((before & ~now).sum()) / previously_active if previously_active else 0.0
+        }
+
+    def save(self, directory: Optional[str] = None) -> None:
+        """
+        Persist the cubes, daily active customers and segment snapshot.
+
+        Args:
+            directory: Target directory, defaults to the store's directory
+        """
+        directory = directory or self.directory
+        os.makedirs(directory, exist_ok=True)
+        cube, activity = self.cubes()
+        with self._lock:
+            customer_ids = np.empty(len(self._customer_codes), dtype=object)
+            customer_ids[list(self._customer_codes.values())] = list(self._customer_codes)
+            chunks = {day: np.concatenate(self._active_days[day]) for day in self._days}
+        codes = np.concatenate(list(chunks.values())) if chunks else np.zeros(0, dtype=np.int64)
+        customers = pd.DataFrame({
+            "date": _to_dates(np.repeat(list(chunks), [len(chunk) for chunk in chunks.values()])),
+            "customer_id": pd.Categorical(customer_ids[codes])
+        })
+
+        cube.to_pickle(os.path.join(directory, "event_cube.pkl"))
+        activity.to_pickle(os.path.join(directory, "activity_cube.pkl"))
+        customers.to_pickle(os.path.join(directory, "active_customers.pkl"))
+        self.segments.to_pickle(os.path.join(directory, "segments.pkl"))
+        logger.info("Saved rollups for %s days to %s", self.days, directory)
+
+    def load(self, directory: Optional[str] = None) -> bool:
+        """
+        Load previously saved cubes.
+
+        Args:
+            directory: Source directory, defaults to the store's directory
+
+        Returns:
+            True if cubes were found and loaded
+        """
+        directory = directory or self.directory
+        names = ["event_cube.pkl", "activity_cube.pkl", "active_customers.pkl", "segments.pkl"]
+        paths = [os.path.join(directory, name) for name in names] if directory else []
+        if not paths or not all(os.path.exists(path) for path in paths):
+            return False
+
+        cube, activity, customers, segments = (pd.read_pickle(path) for path in paths)
+        with self._lock:
+            self.segments = segments
+            self._days, self._cube_days, self._activity_days, self._active_days = [], {}, {}, {}
+            self._customer_codes, self._live = {}, OrderedDict()
+        self._replace_days([(cube, activity, customers)])
+        logger.info("Loaded rollups for %s days from %s", self.days, directory)
+        return True
+
+    def _customer_codes_of(self, customer_ids: pd.Series) -> np.ndarray:
+        """Map a customer_id column to registry codes (-1 when missing), registering new customers."""
+        batch_codes = customer_ids.cat.codes.to_numpy()
+        categories = customer_ids.cat.categories
+        used = np.unique(batch_codes[batch_codes >= 0])
+        registry = self._customer_codes
+        # The extra slot maps missing customers (code -1) to -1
+        lookup = np.full(len(categories) + 1, -1, dtype=np.int64)
+        lookup[used] = [registry.setdefault(customer_id, len(registry)) for customer_id in categories[used]]
+        return lookup[batch_codes]
+
+    def _merge_day(self, day: int, events: pd.DataFrame, state: _DayState) -> None:
+        """Add one day's events to its running state and swap in the updated rows. Caller holds the lock."""
+        frame = _event_codes(events, self.segments)
+        frame["customer"] = self._customer_codes_of(events["customer_id"])
+        customers, timestamps = frame["customer"].to_numpy(), frame["timestamp"].to_numpy()
+
+        def cell_keys(rows: pd.DataFrame) -> List[Tuple]:
+            labels = [np.asarray(SEGMENTS, dtype=object)[rows["segment"].to_numpy()]]
+            labels += [_decode(rows[column].to_numpy(), events[column].cat.categories) for column in CELL_DIMENSIONS[1:]]
+            return list(zip(*labels))
+
+        pairs = frame.groupby(CELL_DIMENSIONS + ["customer"], sort=False).agg(
+            events=("customer", "size"),
+            amount=("amount", "sum")
+        ).reset_index()
+        positions = np.empty(len(pairs), dtype=np.int64)
+        new_pair = np.zeros(len(pairs), dtype=bool)
+        for i, (cell, customer) in enumerate(zip(cell_keys(pairs), pairs["customer"].tolist())):
+            position = state.cells.setdefault(cell, len(state.cells))
+            positions[i] = position
+            if (position, customer) not in state.pairs:
+                state.pairs.add((position, customer))
+                new_pair[i] = True
+
+        grow = len(state.cells) - len(state.measures["events"])
+        measures = {
+            measure: np.concatenate([values, np.zeros(grow, dtype=values.dtype)])
+            for measure, values in state.measures.items()
+        }
+        np.add.at(measures["events"], positions, pairs["events"].to_numpy())
+        np.add.at(measures["amount"], positions, pairs["amount"].to_numpy())
+        np.add.at(measures["customers"], positions, new_pair.astype(np.int64))
+
+        # A claim converts when the customer purchases later the same day
+        converted = []
+        purchases = (events["event_type"] == "purchase").to_numpy()
+        last_purchase = pd.Series(timestamps[purchases]).groupby(customers[purchases]).max()
+        for customer, timestamp in zip(last_purchase.index.tolist(), last_purchase.tolist()):
+            if timestamp <= state.last_purchase.get(customer, timestamp - 1):
+                continue
+            state.last_purchase[customer] = timestamp
+            waiting = state.pending.pop(customer, [])
+            converted += [position for claimed_at, position in waiting if claimed_at <= timestamp]
+            waiting = [claim for claim in waiting if claim[0] > timestamp]
+            if waiting:
+                state.pending[customer] = waiting
+        claims = (events["event_type"] == "reward_claim").to_numpy()
+        claim_positions = [state.cells[cell] for cell in cell_keys(frame[claims])]
+        for customer, timestamp, position in zip(customers[claims].tolist(), timestamps[claims].tolist(), claim_positions):
+            last = state.last_purchase.get(customer)
+            if last is not None and last >= timestamp:
+                converted.append(position)
+            else:
+                state.pending.setdefault(customer, []).append((timestamp, position))
+        np.add.at(measures["conversions"], np.asarray(converted, dtype=np.int64), 1)
+        state.measures = measures
+
+        event_type = events["event_type"]
+        masks = {
+            "active": np.ones(len(events), dtype=bool),
+            "engaged": event_type.isin(EngagementEventProcessor.ENGAGEMENT_EVENT_TYPES).to_numpy(),
+            "opened": (event_type == "email_open").to_numpy(),
+            "claimed": claims
+        }
+        newly_active = np.zeros(0, dtype=np.int64)
+        for column, measure in enumerate(ACTIVITY_MEASURES):
+            seen = state.flags[measure]
+            rows = frame.loc[masks[measure], ["customer", "segment"]].drop_duplicates("customer")
+            added = rows[np.array([customer not in seen for customer in rows["customer"].tolist()], dtype=bool)]
+            seen.update(added["customer"].tolist())
+            state.activity[:, column] += np.bincount(added["segment"].to_numpy(), minlength=len(SEGMENTS))
+            if measure == "active":
+                newly_active = added["customer"].to_numpy()
+                newly_active = newly_active[newly_active >= 0]
+
+        for customer in newly_active.tolist():
+            first_day = self._first_day.get(customer)
+            if first_day is None or day < first_day:
+                if first_day is not None:
+                    self._new_customers[first_day] -= 1
+                self._first_day[customer] = day
+                self._new_customers[day] = self._new_customers.get(day, 0) + 1
+
+        if day not in self._cube_days:
+            bisect.insort(self._days, day)
+        self._cube_days[day] = state.cube()
+        self._activity_days[day] = state.activity_rows()
+        self._active_days[day] = self._active_days.get(day, []) + [newly_active]
+
+    def _replace_days(self, results: List[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]) -> None:
+        """Swap in freshly built cube rows and active customers for the days they cover."""
+        with self._lock:
+            for cube, activity, customers in results:
+                codes = self._customer_codes_of(customers["customer_id"])
+                customer_days = _days_of(customers)
+                self._cube_days.update(_split_days(cube))
+                self._activity_days.update(_split_days(activity))
+                for day in np.unique(customer_days).tolist():
+                    self._active_days[day] = [codes[customer_days == day]]
+                    self._live.pop(day, None)
+            self._days = sorted(self._cube_days)
+            self._index_first_days()
+
+    def _index_first_days(self) -> None:
+        """Recompute each customer's first active day and the new customers per day. Caller holds the lock."""
+        days = [day for day in self._days for chunk in self._active_days[day]]
+        chunks = [chunk for day in self._days for chunk in self._active_days[day]]
+        if not chunks:
+            self._first_day, self._new_customers = {}, {}
+            return
+        first_day = pd.Series(np.repeat(days, [len(chunk) for chunk in chunks])).groupby(np.concatenate(chunks)).min()
+        self._first_day = dict(zip(first_day.index.tolist(), first_day.tolist()))
+        self._new_customers = {int(day): int(count) for day, count in first_day.value_counts().items()}
+
+    def _days_between(self, start: TimeBound, end: TimeBound) -> List[int]:
+        """Days with rollups in [start, end]. Caller holds the lock."""
+        lo = bisect.bisect_left(self._days, self._day_start(start).value // DAY_NS) if start is not None else 0
+        hi = bisect.bisect_right(self._days, self._day_start(end).value // DAY_NS) if end is not None else len(self._days)
+        return self._days[lo:hi]
+
+    def _day_start(self, value: TimeBound) -> Optional[pd.Timestamp]:
+        return to_utc_timestamp(value).floor("D") if value is not None else None
+
+    def _day_end(self, value: TimeBound) -> Optional[pd.Timestamp]:
+        if value is None:
+            return None
+        return self._day_start(value) + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+_rollup_store: Optional[RollupStore] = None
+_rollup_store_lock = threading.Lock()
+
+def get_rollup_store() -> Optional[RollupStore]:
+    """
+    Get the process-wide rollup store, if rollups have been built.
+
+    The store subscribes to the event store, so events appended after
+    loading (for example through POST /api/events) refresh their days.
+
+    Returns:
+        The shared rollup store loaded from ROLLUPS_DIR, or None if no cubes exist
+    """
+    global _rollup_store
+    from workspace.data.event_store import get_event_store
+
+    with _rollup_store_lock:
+        if _rollup_store is None:
+            store = RollupStore(get_event_store(), settings.ROLLUPS_DIR)
+            if not store.load():
+                return None
+            store.subscribe()
+            _rollup_store = store
+        return _rollup_store
@@ -0,0 +1,271 @@
+"""
+Per-customer hour-of-week engagement histograms for send-time optimization.
+"""
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from workspace.data.event_store import EventStore, TimeBound, get_event_store
+from workspace.data.processors import EngagementEventProcessor, WEEK_OFFSET_NS, _epoch_ns
+from workspace.data.rollups import NEW_CUSTOMER_SEGMENT, segment_snapshot
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SEGMENTS = EngagementEventProcessor.SEGMENTS
+HOURS_PER_WEEK = 168
+HOUR_NS = 3600 * 10**9
+SEND_TIME_EVENT_TYPES = ["email_open", "email_click"]
+# Weight of the segment prior, in pseudo-events
+PRIOR_WEIGHT = 10.0
+MAX_COUNT = np.iinfo(np.uint16).max
+
+def hour_of_week(timestamps: np.ndarray) -> np.ndarray:
+    """
+    Map epoch nanoseconds to hour-of-week bins, where bin 0 is Monday 00:00 UTC.
+
+    Args:
+        timestamps: int64 nanoseconds since the epoch
+
+    Returns:
+        Array of bins in [0, 168)
+    """
+    return ((timestamps + WEEK_OFFSET_NS) // HOUR_NS) % HOURS_PER_WEEK
+
+class SendTimeHistograms:
+    """
+    Open/click counts per customer and hour of the week.
+
+    Counts live in one (customers x 168) uint16 array that saturates
+    instead of overflowing, with a dictionary from customer ID to row so
+    a lookup is a hash probe plus a row view. Segment-level histograms act
+    as a prior for customers with few events.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = np.zeros((0, HOURS_PER_WEEK), dtype=np.uint16)
+        self.segment_of_row = np.zeros(0, dtype=np.int8)
+        self.segment_counts = np.zeros((len(SEGMENTS), HOURS_PER_WEEK))
+        self.rows: Dict[str, int] = {}
+        logger.info("SendTimeHistograms initialized")
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @classmethod
+    def from_event_store(cls, event_store: EventStore,
+                         segments: Optional[pd.Series] = None,
+                         as_of: TimeBound = None) -> "SendTimeHistograms":
+        """
+        Build histograms for every customer in an event store in one pass.
+
+        Args:
+            event_store: Store to read events from
+            segments: Optional segment per customer ID, computed from the store if omitted
+            as_of: Optional upper time bound for events and segmentation
+
+        Returns:
+            Populated histograms
+        """
+        if segments is None:
+            segments = segment_snapshot(event_store, as_of)
+        events = event_store.scan(end=as_of, columns=["customer_id", "event_type", "timestamp"])
+
+        histograms = cls()
+        categories = events["customer_id"].cat.categories
+        histograms.rows = {customer_id: row for row, customer_id in enumerate(categories)}
+        histograms.counts = np.zeros((len(categories), HOURS_PER_WEEK), dtype=np.uint16)
+        histograms.segment_of_row = pd.Categorical(
+            segments.reindex(categories).fillna(NEW_CUSTOMER_SEGMENT), categories=SEGMENTS
+        ).codes.astype(np.int8)
+        histograms._add(events)
+
+        logger.info("Built send-time histograms for %s customers", len(histograms))
+        return histograms
+
+    def update(self, events: pd.DataFrame) -> None:
+        """
+        Add newly arrived events to the histograms.
+
+        Can be registered with EventStore.subscribe. Events other than opens
+        and clicks are ignored.
+
+        Args:
+            events: Events frame in the event store schema
+        """
+        with self._lock:
+            self._add(events)
+
+    def lookup(self, customer_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a customer's histogram and their segment's prior.
+
+        Args:
+            customer_id: The ID of the customer
+
+        Returns:
+            Tuple of (counts, prior), where prior sums to 1; counts are all
+            zero for unknown customers
+        """
+        row = self.rows.get(customer_id)
+        if row is None:
+            counts = np.zeros(HOURS_PER_WEEK, dtype=np.uint16)
+            segment = SEGMENTS.index(NEW_CUSTOMER_SEGMENT)
+        else:
+            counts = self.counts[row]
+            segment = self.segment_of_row[row]
+        return counts, self._prior(segment)
+
+    def best_slot(self, customer_id: str) -> Dict[str, Any]:
+        """
+        Pick the hour of the week with the most expected engagement.
+
+        Args:
+            customer_id: The ID of the customer
+
+        Returns:
+            Dictionary with hour_of_week, event count, and the share of the
+            estimate contributed by the customer's own events
+        """
+        counts, prior = self.lookup(customer_id)
+        observed = int(counts.sum())
+        posterior = counts + PRIOR_WEIGHT * prior
+        return {
+            "hour_of_week": int(posterior.argmax()),
+            "events": observed,
+            "evidence_weight": observed / (observed + PRIOR_WEIGHT)
+        }
+
+    def slot_probabilities(self, customer_ids: List[str], bins: np.ndarray) -> np.ndarray:
+        """
+        Estimate each customer's open probability in each of the given slots.
+
+        The estimate is the smoothed share of the customer's opens and clicks
+        that fell in each hour-of-week bin.
+
+        Args:
+            customer_ids: Customers to score
+            bins: Hour-of-week bins to score
+
+        Returns:
+            float32 array of shape (len(customer_ids), len(bins))
+        """
+        rows = np.fromiter((self.rows.get(customer_id, -1) for customer_id in customer_ids),
+                           dtype=np.int64, count=len(customer_ids))
+        known = rows >= 0
+        segment = np.full(len(rows), SEGMENTS.index(NEW_CUSTOMER_SEGMENT), dtype=np.int8)
+        segment[known] = self.segment_of_row[rows[known]]
+
+        priors = np.stack([self._prior(index) for index in range(len(SEGMENTS))])[:, bins]
+        counts = np.zeros((len(rows), len(bins)), dtype=np.float32)
+        totals = np.zeros(len(rows), dtype=np.float32)
+        counts[known] = self.counts[rows[known]][:, bins]
+        totals[known] = self.counts[rows[known]].sum(axis=1, dtype=np.int64)
+
+        counts += (PRIOR_WEIGHT * priors[segment]).astype(np.float32)
+        counts /= (totals + PRIOR_WEIGHT)[:, None]
+        return counts
+
+    def _prior(self, segment: int) -> np.ndarray:
+        totals = self.segment_counts[segment]
+        if not totals.any():
+            totals = self.segment_counts.sum(axis=0)
+        total = totals.sum()
+        return totals / total if total else np.full(HOURS_PER_WEEK, 1.0 / HOURS_PER_WEEK)
+
+    def _add(self, events: pd.DataFrame) -> None:
+        """Accumulate opens and clicks into the counts, adding rows for new customers."""
+        events = events[events["event_type"].isin(SEND_TIME_EVENT_TYPES).to_numpy()]
+        events = events[events["customer_id"].notna().to_numpy()]
+        if not len(events):
+            return
+
+        categories = events["customer_id"].cat.categories
+        codes = events["customer_id"].cat.codes.to_numpy().astype(np.int64)
+        row_of_code = np.full(len(categories), -1, dtype=np.int64)
+        for code in np.flatnonzero(np.bincount(codes, minlength=len(categories))):
+            row_of_code[code] = self._row(categories[code])
+        rows = row_of_code[codes]
+        bins = hour_of_week(_epoch_ns(events["timestamp"]))
+
+        keys, added = np.unique(rows * HOURS_PER_WEEK + bins, return_counts=True)
+        flat = self.counts.reshape(-1)
+        flat[keys] = np.minimum(flat[keys].astype(np.int64) + added, MAX_COUNT)
+        np.add.at(self.segment_counts, (self.segment_of_row[keys // HOURS_PER_WEEK], keys % HOURS_PER_WEEK), added)
+
+    def _row(self, customer_id: str) -> int:
+        """Get a customer's row, growing the arrays for unseen customers."""
+        row = self.rows.get(customer_id)
+        if row is not None:
+            return row
+
+        row = len(self.rows)
+        if row >= len(self.counts):
+            capacity = max(2 * len(self.counts), 1024)
+            counts = np.zeros((capacity, HOURS_PER_WEEK), dtype=np.uint16)
+            counts[:len(self.counts)] = self.counts
+            segment_of_row = np.full(capacity, SEGMENTS.index(NEW_CUSTOMER_SEGMENT), dtype=np.int8)
+            segment_of_row[:len(self.segment_of_row)] = self.segment_of_row
+            self.counts, self.segment_of_row = counts, segment_of_row
+        self.rows[customer_id] = row
+        return row
+
+def assign_slots(scores: np.ndarray, capacity: np.ndarray) -> np.ndarray:
+    """
+    Greedily assign customers to slots under per-slot capacity limits.
+
+    In each round every unassigned customer proposes their best slot that
+    still has capacity, and each slot accepts its highest-scoring proposals
+    up to its remaining capacity. Every round either assigns everyone or
+    fills at least one slot, so there are at most as many rounds as slots.
+
+    Args:
+        scores: Array of shape (customers, slots) with the value of each assignment
+        capacity: Maximum customers per slot
+
+    Returns:
+        Slot index per customer, or -1 when capacity ran out
+    """
+    n_slots = scores.shape[1]
+    remaining = np.asarray(capacity, dtype=np.int64).copy()
+    assigned = np.full(len(scores), -1, dtype=np.int64)
+    active = np.arange(len(scores))
+
+    while len(active) and remaining.any():
+        candidate_scores = scores[active]
+        candidate_scores[:, remaining <= 0] = -np.inf
+        choice = candidate_scores.argmax(axis=1)
+        best = candidate_scores[np.arange(len(active)), choice]
+
+        # Rank proposals within each slot by score
+        order = np.lexsort((-best, choice))
+        chosen = choice[order]
+        rank = np.arange(len(order)) - np.searchsorted(chosen, np.arange(n_slots))[chosen]
+        accept = rank < remaining[chosen]
+
+        assigned[active[order[accept]]] = chosen[accept]
+        remaining -= np.bincount(chosen[accept], minlength=n_slots)
+        active = active[order[~accept]]
+
+    return assigned
+
+_histograms: Optional[SendTimeHistograms] = None
+_histograms_lock = threading.Lock()
+
+def get_send_time_histograms() -> SendTimeHistograms:
+    """
+    Get the process-wide histograms, built from the event store on first use.
+
+    The histograms subscribe to the event store, so later appends update them.
+
+    Returns:
+        The shared send-time histograms
+    """
+    global _histograms
+    with _histograms_lock:
+        if _histograms is None:
+            event_store = get_event_store()
+            _histograms = SendTimeHistograms.from_event_store(event_store)
+            event_store.subscribe(_histograms.update)
+        return _histograms
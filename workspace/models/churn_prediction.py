@@ -1,86 +1,280 @@
 """
 Model for predicting customer churn.
 """
+import glob
+import json
+import math
+import os
+import re
 import numpy as np
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from workspace.utils.logger import setup_logger
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
+from workspace.settings import settings
+from workspace.data.event_store import events_to_frame
+from workspace.data.processors import EngagementEventProcessor, DAY_NS
+from workspace.utils.logger import SampledLogger, setup_logger
+from workspace.utils.timestamps import parse_timestamp, to_utc_timestamp, utc_now
 
 logger = setup_logger(__name__)
+item_logger = SampledLogger(logger)
+
+# Model inputs, shared by the scalar and batch feature pipelines
+FEATURE_NAMES = [
+    "days_since_last_engagement",
+    "log_event_count",
+    "engagement_frequency",
+    "event_type_diversity",
+    "has_purchase",
+    "has_reward_claim"
+]
+
+ARTIFACT_PATTERN = re.compile(r"churn_model_v(\d+)\.json$")
+
+def _sigmoid(values: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-values))
+
+def _roc_auc(labels: np.ndarray, scores: np.ndarray) -> float:
+    """Area under the ROC curve from the Mann-Whitney rank statistic."""
+    positives = labels.sum()
+    negatives = len(labels) - positives
+    if not positives or not negatives:
+        return float("nan")
+    ranks = pd.Series(scores).rank().to_numpy()
+    return float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives))
 
 class ChurnPredictor:
     """Model for predicting customer churn probability."""
     
-    def __init__(self):
+    def __init__(self, model_dir: Optional[str] = None):
         self.model_ready = False
+        self.model_dir = model_dir or os.path.join(settings.MODEL_DIR, "churn")
+        self.model_version: Optional[int] = None
+        self.coefficients: Optional[np.ndarray] = None
+        self.intercept = 0.0
+        # Python floats keep the scalar dot product free of NumPy call overhead
+        self._coefficient_list: List[float] = []
+        self.training_metrics: Dict[str, Any] = {}
+        self._load_attempted = False
+        self.event_processor = EngagementEventProcessor()
         logger.info("ChurnPredictor initialized")
     
-    def train(self, historical_data: List[Dict[str, Any]]) -> None:
+    def train(self, historical_data: List[Dict[str, Any]],
+              as_of: Optional[datetime] = None) -> None:
         """
         Train the churn prediction model.
         
+        History events without a customer_id cannot be attributed and are
+        skipped; their count is logged and kept in training_metrics.
+        
         Args:
-            historical_data: List of customer engagement histories with churn outcomes
+            historical_data: List of customer engagement histories with churn outcomes,
+                each with customer_id, engagement_history and churned
+            as_of: Optional time the histories were observed at, defaults to now (UTC)
         """
-        logger.info(f"Training churn prediction model with {len(historical_data)} records")
+        logger.info("Training churn prediction model with %s records", len(historical_data))
         
-        # In a real implementation:
-        # 1. Extract features from engagement histories
-        # 2. Create target variable (churned or not)
-        # 3. Train a classification model
+        history = [event for record in historical_data for event in record.get("engagement_history", [])]
+        events = events_to_frame(history)
+        skipped = int(events["customer_id"].isna().sum())
+        if skipped:
+            logger.warning("Skipping %s of %s history events without a customer_id", skipped, len(history))
+        labels = pd.Series(
+            [bool(record["churned"]) for record in historical_data],
+            index=[record["customer_id"] for record in historical_data]
+        )
+        self.train_batch(events[events["customer_id"].notna().to_numpy()], labels, as_of)
+        self.training_metrics["skipped_events"] = skipped
+        self.save()
         
-        self.model_ready = True
         logger.info("Churn prediction model training completed")
     
-    def predict_churn_probability(self, customer_id: str, 
-                                 engagement_history: List[Dict[str, Any]]) -> float:
+    def train_batch(self, events: pd.DataFrame,
+                    labels: pd.Series,
+                    as_of: Optional[datetime] = None,
+                    l2: float = 1.0,
+                    max_iter: int = 25) -> Dict[str, Any]:
+        """
+        Fit an L2-regularized logistic regression on a columnar event frame.
+        
+        Features come from the same pipeline as predict_churn_batch and are
+        standardized for fitting. The standardization is folded back into
+        the coefficients, so inference is a plain dot product on raw features.
+        
+        The objective is the one scikit-learn's LogisticRegression minimizes
+        with C=1/l2, solved here with Newton's method: with one weight per
+        feature plus the intercept, each step is a tiny linear solve and the
+        fit converges in a few iterations. That is exact for this problem, and
+        scikit-learn stays off the import path of the serving code, which
+        does not otherwise use it.
+        
+        Args:
+            events: Event frame in the event store schema
+            labels: Churn outcome per customer ID
+            as_of: Optional time the events were observed at, defaults to now (UTC)
+            l2: L2 penalty on the (standardized) coefficients
+            max_iter: Maximum Newton iterations
+        
+        Returns:
+            Training metrics
+        """
+        features = self._batch_features(events, as_of)
+        labels = labels.reindex(features.index).dropna()
+        if labels.nunique() < 2:
+            raise ValueError("Churn training needs both churned and retained customers with events")
+        
+        X = features.loc[labels.index, FEATURE_NAMES].to_numpy(dtype=float)
+        y = labels.to_numpy(dtype=float)
+        mean, std = X.mean(axis=0), X.std(axis=0)
+        std[std == 0] = 1.0
+        Z = np.column_stack([np.ones(len(X)), (X - mean) / std])
+        
+        # Newton-Raphson; the intercept is not penalized
+        penalty = np.full(Z.shape[1], l2)
+        penalty[0] = 0.0
+        weights = np.zeros(Z.shape[1])
+        for _ in range(max_iter):
+            p = _sigmoid(Z @ weights)
+            gradient = Z.T @ (p - y) + penalty * weights
+            hessian = (Z * (p * (1 - p))[:, None]).T @ Z + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            weights -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        
+        self.coefficients = weights[1:] / std
+        self.intercept = float(weights[0] - (weights[1:] * mean / std).sum())
+        self._coefficient_list = self.coefficients.tolist()
+        self.model_ready = True
+        
+        p = np.clip(_sigmoid(X @ self.coefficients + self.intercept), 1e-12, 1 - 1e-12)
+        metrics = {
+            "samples": int(len(y)),
+            "churn_rate": float(y.mean()),
+            "log_loss": float(-(y * np.log(p) + (1 - y) * np.log(1 - p)).mean()),
+            "auc": _roc_auc(y, p)
+        }
+        self.training_metrics = metrics
+        logger.info("Fitted churn model on %s customers (AUC %.3f)", metrics['samples'], metrics['auc'])
+        return metrics
+    
+    def save(self) -> str:
+        """
+        Save the fitted model as the next versioned artifact.
+        
+        Returns:
+            Path of the written artifact
+        """
+        os.makedirs(self.model_dir, exist_ok=True)
+        version = (self._latest_version() or 0) + 1
+        path = os.path.join(self.model_dir, f"churn_model_v{version:04d}.json")
+        
+        with open(path, "w") as f:
+            json.dump({
+                "version": version,
+                "trained_at": datetime.now(timezone.utc).isoformat(),
+                "features": FEATURE_NAMES,
+                "coefficients": self.coefficients.tolist(),
+                "intercept": self.intercept,
+                "metrics": self.training_metrics
+            }, f, indent=2)
+        
+        self.model_version = version
+        logger.info("Saved churn model version %s to %s", version, path)
+        return path
+    
+    def load(self, version: Optional[int] = None) -> bool:
+        """
+        Load a saved model artifact.
+        
+        Args:
+            version: Optional version to load, defaults to the latest
+        
+        Returns:
+            True if a model was loaded
+        """
+        self._load_attempted = True
+        version = version or self._latest_version()
+        if version is None:
+            return False
+        
+        path = os.path.join(self.model_dir, f"churn_model_v{version:04d}.json")
+        with open(path) as f:
+            artifact = json.load(f)
+        if artifact["features"] != FEATURE_NAMES:
+            logger.warning("Churn model version %s uses different features, ignoring it", version)
+            return False
+        
+        self.coefficients = np.asarray(artifact["coefficients"], dtype=float)
+        self.intercept = float(artifact["intercept"])
+        self._coefficient_list = self.coefficients.tolist()
+        self.model_version = artifact["version"]
+        self.model_ready = True
+        logger.info("Loaded churn model version %s", self.model_version)
+        return True
+    
+    def predict_churn_probability(self, customer_id: str,
+                                 engagement_history: List[Dict[str, Any]],
+                                 as_of: Optional[datetime] = None) -> float:
         """
         Predict the probability of a customer churning.
         
+        Uses the trained model when one is available, and the heuristic otherwise.
+        
         Args:
             customer_id: The ID of the customer
             engagement_history: Customer's engagement history
-            
+            as_of: Optional reference time for recency, defaults to now (UTC)
+        
         Returns:
             Probability of churn (0-1)
         """
-        logger.info(f"Predicting churn probability for customer {customer_id}")
+        item_logger.info("Predicting churn probability for customer %s", customer_id)
         
         # If no engagement history, use default risk
         if not engagement_history:
             return 0.5
         
         # Extract basic features from engagement history
-        now = datetime.now()
+        now = parse_timestamp(as_of) if as_of is not None else utc_now()
         
-        # Parse timestamps in engagement history
-        events_with_dt = []
+        # Parse timestamps and count event types in one pass
+        timestamps = []
+        event_types = {}
         for event in engagement_history:
             try:
-                dt = datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00"))
-                events_with_dt.append((event, dt))
-            except (ValueError, KeyError):
-                logger.warning(f"Invalid timestamp in event: {event}")
+                timestamps.append(parse_timestamp(event["timestamp"]))
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Invalid timestamp in event: %s", event)
                 continue
+            event_type = event.get("event_type", "unknown")
+            event_types[event_type] = event_types.get(event_type, 0) + 1
         
-        if not events_with_dt:
+        if not timestamps:
             return 0.5
-            
+        
         # Get most recent event
-        most_recent_event, most_recent_dt = max(events_with_dt, key=lambda x: x[1])
+        most_recent_dt = max(timestamps)
         days_since_last_engagement = (now - most_recent_dt).days
         
         # Calculate engagement frequency
-        event_count = len(events_with_dt)
-        oldest_event, oldest_dt = min(events_with_dt, key=lambda x: x[1])
+        event_count = len(timestamps)
+        oldest_dt = min(timestamps)
         days_in_history = (most_recent_dt - oldest_dt).days + 1
         engagement_frequency = event_count / max(days_in_history, 1)
         
-        # Calculate engagement types distribution
-        event_types = {}
-        for event, _ in events_with_dt:
-            event_type = event.get("event_type", "unknown")
-            event_types[event_type] = event_types.get(event_type, 0) + 1
+        if self._ensure_model():
+            # Plain dot product over the raw features, in FEATURE_NAMES order
+            features = (
+                days_since_last_engagement,
+                math.log1p(event_count),
+                engagement_frequency,
+                len(event_types),
+                float(event_types.get("purchase", 0) > 0),
+                float(event_types.get("reward_claim", 0) > 0)
+            )
+            logit = self.intercept + sum(w * x for w, x in zip(self._coefficient_list, features))
+            return 1.0 / (1.0 + math.exp(-logit))
         
         # Simple heuristic model
         # High risk factors: inactivity, low engagement frequency
@@ -93,24 +287,129 @@ class ChurnPredictor:
             risk += 0.4
         elif days_since_last_engagement > 14:
             risk += 0.2
-            
+        
         # Risk from low engagement frequency
         if engagement_frequency < 0.05:  # Less than once per 20 days
             risk += 0.3
         elif engagement_frequency < 0.1:  # Less than once per 10 days
             risk += 0.15
-            
+        
         # Risk from limited engagement types
         if len(event_types) == 1:
             risk += 0.1
-            
+        
         # Reduce risk for high-value engagement
         if event_types.get("purchase", 0) > 0:
             risk -= 0.2
         if event_types.get("reward_claim", 0) > 0:
             risk -= 0.1
-            
+        
         # Ensure risk is between 0 and 1
         risk = max(0.0, min(0.99, risk))
         
         return risk
+    
+    def predict_churn_batch(self, events: pd.DataFrame,
+                            as_of: Optional[datetime] = None,
+                            customer_ids: Optional[List[str]] = None) -> pd.Series:
+        """
+        Predict churn probabilities for every customer in a columnar event frame.
+        
+        Applies the same model or heuristic as predict_churn_probability, with
+        the per-customer recency, frequency and event type counts computed in
+        one grouped pass over the frame.
+        
+        Args:
+            events: Event frame in the event store schema
+            as_of: Optional reference time for recency, defaults to now (UTC)
+            customer_ids: Optional customers to score; those without events get
+                the default risk of 0.5
+        
+        Returns:
+            Series of churn probabilities indexed by customer ID
+        """
+        as_of = to_utc_timestamp(as_of) or pd.Timestamp.now(tz="UTC")
+        customer_features = self.event_processor.customer_features(events[events["timestamp"].notna()], as_of)
+        return self.predict_churn_from_features(customer_features, customer_ids)
+    
+    def predict_churn_from_features(self, customer_features: pd.DataFrame,
+                                    customer_ids: Optional[List[str]] = None) -> pd.Series:
+        """
+        Predict churn probabilities from precomputed per-customer features.
+        
+        Lets callers that already ran EngagementEventProcessor.customer_features
+        score churn without another pass over the events.
+        
+        Args:
+            customer_features: Output of EngagementEventProcessor.customer_features
+            customer_ids: Optional customers to score; those without events get
+                the default risk of 0.5
+        
+        Returns:
+            Series of churn probabilities indexed by customer ID
+        """
+        features = self._churn_features(customer_features)
+        logger.info("Predicting churn probability for %s customers", len(features))
+        
+        if self._ensure_model():
+            risk = _sigmoid(features[FEATURE_NAMES].to_numpy(dtype=float) @ self.coefficients + self.intercept)
+        else:
+            days_since_last_engagement = features["days_since_last_engagement"].to_numpy()
+            engagement_frequency = features["engagement_frequency"].to_numpy()
+            
+            risk = np.select(
+                [days_since_last_engagement > 60, days_since_last_engagement > 30, days_since_last_engagement > 14],
+                [0.7, 0.4, 0.2], 0.0
+            )
+            risk = risk + np.select([engagement_frequency < 0.05, engagement_frequency < 0.1], [0.3, 0.15], 0.0)
+            risk = risk + np.where(features["event_type_diversity"].to_numpy() == 1, 0.1, 0.0)
+            risk = risk - np.where(features["has_purchase"].to_numpy() > 0, 0.2, 0.0)
+            risk = risk - np.where(features["has_reward_claim"].to_numpy() > 0, 0.1, 0.0)
+            risk = np.clip(risk, 0.0, 0.99)
+        
+        scores = pd.Series(risk, index=features.index, name="churn_probability")
+        if customer_ids is not None:
+            scores = scores.reindex(customer_ids, fill_value=0.5)
+        return scores
+    
+    def _batch_features(self, events: pd.DataFrame,
+                        as_of: Optional[datetime] = None) -> pd.DataFrame:
+        """Compute the FEATURE_NAMES columns for every customer in an event frame."""
+        as_of = to_utc_timestamp(as_of) or pd.Timestamp.now(tz="UTC")
+        
+        events = events[events["timestamp"].notna()]
+        return self._churn_features(self.event_processor.customer_features(events, as_of))
+    
+    def _churn_features(self, features: pd.DataFrame) -> pd.DataFrame:
+        """Derive the FEATURE_NAMES columns from EngagementEventProcessor.customer_features."""
+        type_counts = features[[column for column in features.columns if column.endswith("_count")]]
+        
+        def has(event_type: str) -> np.ndarray:
+            column = f"{event_type}_count"
+            return (features[column].to_numpy() > 0 if column in features
+                    else np.zeros(len(features), dtype=bool)).astype(float)
+        
+        total_events = features["total_events"].to_numpy()
+        days_in_history = (features["last_event"] - features["first_event"]).to_numpy().view(np.int64) // DAY_NS + 1
+        
+        return pd.DataFrame({
+            "days_since_last_engagement": features["days_since_last_engagement"].to_numpy(),
+            "log_event_count": np.log1p(total_events),
+            "engagement_frequency": total_events / np.maximum(days_in_history, 1),
+            "event_type_diversity": (type_counts.to_numpy() > 0).sum(axis=1),
+            "has_purchase": has("purchase"),
+            "has_reward_claim": has("reward_claim")
+        }, index=features.index.astype(object))
+    
+    def _ensure_model(self) -> bool:
+        """Lazily load the latest saved model on first use."""
+        if not self.model_ready and not self._load_attempted:
+            self.load()
+        return self.model_ready and self.coefficients is not None
+    
+    def _latest_version(self) -> Optional[int]:
+        versions = [
+            int(match.group(1)) for path in glob.glob(os.path.join(self.model_dir, "churn_model_v*.json"))
+            if (match := ARTIFACT_PATTERN.search(path))
+        ]
+        return max(versions) if versions else None
@@ -14,7 +14,7 @@ class EmbeddingModel:
         self.embedding_dim = embedding_dim
         self.customer_embeddings = {}
         self.reward_embeddings = {}
-        logger.info(f"EmbeddingModel initialized with dimension {embedding_dim}")
+        logger.info("EmbeddingModel initialized with dimension %s", embedding_dim)
     
     def generate_customer_embedding(self, customer_data: Dict[str, Any]) -> np.ndarray:
         """
@@ -27,7 +27,7 @@ class EmbeddingModel:
             Embedding vector for the customer
         """
         customer_id = customer_data.get("id", "unknown")
-        logger.info(f"Generating embedding for customer {customer_id}")
+        logger.info("Generating embedding for customer %s", customer_id)
         
         # In a real implementation:
         # 1. Extract features from customer data
@@ -53,7 +53,7 @@ class EmbeddingModel:
             Embedding vector for the reward
         """
         reward_id = reward_data.get("id", "unknown")
-        logger.info(f"Generating embedding for reward {reward_id}")
+        logger.info("Generating embedding for reward %s", reward_id)
         
         # In a real implementation:
         # 1. Extract features from reward data
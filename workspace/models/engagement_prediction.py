@@ -7,11 +7,47 @@ from workspace.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+CONTENT_TYPES = ["question", "game", "voucher", "newsletter", "survey"]
+SEGMENTS = ["VIP", "Active", "Recent", "At Risk", "Standard"]
+DEFAULT_SEGMENT = "Standard"
+
+# Customer segment factors
+SEGMENT_FACTORS = {
+    "VIP": {"question": 0.9, "game": 1.2, "voucher": 1.3, "newsletter": 1.1, "survey": 0.9},
+    "Active": {"question": 1.1, "game": 1.1, "voucher": 1.2, "newsletter": 1.0, "survey": 0.8},
+    "Recent": {"question": 1.2, "game": 1.0, "voucher": 1.1, "newsletter": 0.9, "survey": 0.7},
+    "At Risk": {"question": 0.8, "game": 0.9, "voucher": 1.4, "newsletter": 0.7, "survey": 0.5},
+    "Standard": {"question": 1.0, "game": 1.0, "voucher": 1.0, "newsletter": 1.0, "survey": 1.0}
+}
+
+# Age-based adjustments for under 25, 25 to 55, and over 55
+AGE_BAND_FACTORS = [
+    {"game": 1.2, "survey": 0.8},
+    {},
+    {"newsletter": 1.2, "game": 0.9}
+]
+DEFAULT_AGE = 35
+DEFAULT_SCORE = 0.5
+MIN_SCORE, MAX_SCORE = 0.05, 0.95
+
+def age_bands(ages: np.ndarray) -> np.ndarray:
+    """
+    Map ages to AGE_BAND_FACTORS indices.
+    
+    Args:
+        ages: Customer ages
+    
+    Returns:
+        Array of band indices
+    """
+    return np.where(ages < 25, 0, np.where(ages > 55, 2, 1))
+
 class EngagementPredictor:
     """Model for predicting customer engagement with different content types."""
     
     def __init__(self):
         self.content_type_scores = {}
+        self._build_tables()
         logger.info("EngagementPredictor initialized")
     
     def train(self, historical_data: List[Dict[str, Any]]) -> None:
@@ -21,7 +57,7 @@ class EngagementPredictor:
         Args:
             historical_data: List of content engagements with outcomes
         """
-        logger.info(f"Training engagement prediction model with {len(historical_data)} records")
+        logger.info("Training engagement prediction model with %s records", len(historical_data))
         
         # In a real implementation:
         # 1. Group engagement by content type
@@ -36,11 +72,12 @@ class EngagementPredictor:
             "newsletter": 0.3,
             "survey": 0.2
         }
+        self._build_tables()
         
         logger.info("Engagement prediction model training completed")
     
-    def predict_engagement(self, customer_id: str, 
-                          content_types: List[str], 
+    def predict_engagement(self, customer_id: str,
+                          content_types: List[str],
                           customer_data: Dict[str, Any]) -> Dict[str, float]:
         """
         Predict engagement probability for different content types.
@@ -49,48 +86,71 @@ class EngagementPredictor:
             customer_id: The ID of the customer
             content_types: List of content types to predict engagement for
             customer_data: Customer attributes and history
-            
+        
         Returns:
             Dictionary mapping content types to engagement probabilities
         """
-        logger.info(f"Predicting engagement for customer {customer_id} across {len(content_types)} content types")
+        logger.info("Predicting engagement for customer %s across %s content types", customer_id, len(content_types))
         
-        # Initialize predictions with default scores
-        predictions = {}
+        segment = self._segment_index.get(customer_data.get("segment", DEFAULT_SEGMENT),
+                                          self._segment_index[DEFAULT_SEGMENT])
+        age = customer_data.get("attributes", {}).get("age", DEFAULT_AGE)
+        row = self.probabilities[segment, age_bands(np.asarray(age))]
         
-        # Customer segment factors
-        segment_factors = {
-            "VIP": {"question": 0.9, "game": 1.2, "voucher": 1.3, "newsletter": 1.1, "survey": 0.9},
-            "Active": {"question": 1.1, "game": 1.1, "voucher": 1.2, "newsletter": 1.0, "survey": 0.8},
-            "Recent": {"question": 1.2, "game": 1.0, "voucher": 1.1, "newsletter": 0.9, "survey": 0.7},
-            "At Risk": {"question": 0.8, "game": 0.9, "voucher": 1.4, "newsletter": 0.7, "survey": 0.5},
-            "Standard": {"question": 1.0, "game": 1.0, "voucher": 1.0, "newsletter": 1.0, "survey": 1.0}
+        unknown = len(CONTENT_TYPES)
+        return {
+            content_type: float(row[self._content_index.get(content_type, unknown)])
+            for content_type in content_types
         }
+    
+    def predict_engagement_batch(self, customers: List[Dict[str, Any]],
+                                 content_types: List[str]) -> np.ndarray:
+        """
+        Predict engagement probabilities for many customers and content types at once.
         
-        # Get customer segment
-        segment = customer_data.get("segment", "Standard")
-        factors = segment_factors.get(segment, segment_factors["Standard"])
+        Args:
+            customers: Customer data dictionaries, as passed to predict_engagement
+            content_types: Content types to predict engagement for
+        
+        Returns:
+            Array of shape (len(customers), len(content_types))
+        """
+        logger.info("Predicting engagement for %s customers across %s content types", len(customers), len(content_types))
         
-        # Get demographic factors (simplified approach)
-        age = customer_data.get("attributes", {}).get("age", 35)
+        default_segment = self._segment_index[DEFAULT_SEGMENT]
+        segments = np.fromiter(
+            (self._segment_index.get(customer.get("segment", DEFAULT_SEGMENT), default_segment)
+             for customer in customers),
+            dtype=np.int64, count=len(customers)
+        )
+        ages = np.fromiter(
+            (customer.get("attributes", {}).get("age", DEFAULT_AGE) for customer in customers),
+            dtype=float, count=len(customers)
+        )
+        columns = np.array([self._content_index.get(content_type, len(CONTENT_TYPES))
+                            for content_type in content_types], dtype=np.int64)
         
-        # Age-based adjustments
-        age_factors = {}
-        if age < 25:
-            age_factors = {"game": 1.2, "survey": 0.8}
-        elif age > 55:
-            age_factors = {"newsletter": 1.2, "game": 0.9}
+        return self.probabilities[segments[:, None], age_bands(ages)[:, None], columns[None, :]]
+    
+    def _build_tables(self) -> None:
+        """
+        Precompute bounded base x segment x age-band scores as a dense tensor.
+        
+        The last content column holds the score for content types the model
+        does not know, which get the default base score and no adjustments.
+        """
+        base = np.array([self.content_type_scores.get(content_type, DEFAULT_SCORE)
+                         for content_type in CONTENT_TYPES] + [DEFAULT_SCORE])
+        segment_factors = np.array([
+            [SEGMENT_FACTORS[segment].get(content_type, 1.0) for content_type in CONTENT_TYPES] + [1.0]
+            for segment in SEGMENTS
+        ])
+        age_factors = np.array([
+            [factors.get(content_type, 1.0) for content_type in CONTENT_TYPES] + [1.0]
+            for factors in AGE_BAND_FACTORS
+        ])
         
-        # Apply base scores with adjustments
-        for content_type in content_types:
-            base_score = self.content_type_scores.get(content_type, 0.5)
-            segment_factor = factors.get(content_type, 1.0)
-            age_factor = age_factors.get(content_type, 1.0)
-            
-            # Calculate final score with some randomness
-            score = base_score * segment_factor * age_factor
-            score = min(0.95, max(0.05, score))  # Bound between 0.05 and 0.95
-            
-            predictions[content_type] = score
-            
-        return predictions
+        scores = base[None, None, :] * segment_factors[:, None, :] * age_factors[None, :, :]
+        self.probabilities = np.clip(scores, MIN_SCORE, MAX_SCORE)
+        self._segment_index = {segment: index for index, segment in enumerate(SEGMENTS)}
+        self._content_index = {content_type: index for index, content_type in enumerate(CONTENT_TYPES)}
@@ -2,7 +2,9 @@
 Models for reward recommendation.
 """
 import numpy as np
-from typing import List, Dict, Any
+import pandas as pd
+from typing import List, Dict, Any, Union
+from workspace.data.reward_catalog import RewardCatalog
 from workspace.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -12,6 +14,8 @@ class RewardRecommender:
     
     def __init__(self):
         self.model_ready = False
+        # Bumped on every training run so cached recommendations can be told apart
+        self.model_version = 0
         logger.info("RewardRecommender initialized")
     
     def train(self, historical_data: List[Dict[str, Any]]) -> None:
@@ -21,7 +25,7 @@ class RewardRecommender:
         Args:
             historical_data: List of customer-reward interactions with outcomes
         """
-        logger.info(f"Training recommendation model with {len(historical_data)} records")
+        logger.info("Training recommendation model with %s records", len(historical_data))
         
         # In a real implementation:
         # 1. Preprocess the data
@@ -29,17 +33,18 @@ class RewardRecommender:
         # 3. Train a model (collaborative filtering, content-based, etc.)
         
         self.model_ready = True
+        self.model_version += 1
         logger.info("Recommendation model training completed")
     
     def recommend(self, customer_data: Dict[str, Any], 
-                 available_rewards: List[Dict[str, Any]], 
+                 available_rewards: Union[RewardCatalog, List[Dict[str, Any]]], 
                  top_n: int = 5) -> List[Dict[str, Any]]:
         """
         Generate reward recommendations for a customer.
         
         Args:
             customer_data: Customer attributes and history
-            available_rewards: List of available rewards
+            available_rewards: Reward catalog, or a list of available rewards
             top_n: Number of top recommendations to return
             
         Returns:
@@ -50,7 +55,7 @@ class RewardRecommender:
             # Fallback to a simple rule-based approach
             return self._rule_based_recommend(customer_data, available_rewards, top_n)
         
-        logger.info(f"Generating recommendations for customer {customer_data.get('id', 'unknown')}")
+        logger.info("Generating recommendations for customer %s", customer_data.get('id', 'unknown'))
         
         # In a real implementation:
         # 1. Extract features from customer data
@@ -59,7 +64,7 @@ class RewardRecommender:
         
         # Mock implementation - random scores for demonstration
         recommendations = []
-        for reward in available_rewards:
+        for reward in RewardCatalog.of(available_rewards).rewards:
             # Generate a score between 0 and 1 (would use model prediction in real implementation)
             score = np.random.random()
             recommendations.append({
@@ -76,35 +81,95 @@ class RewardRecommender:
         
         return recommendations[:top_n]
     
+    def recommend_batch(self, customers: List[Dict[str, Any]], 
+                        available_rewards: Union[RewardCatalog, List[Dict[str, Any]]], 
+                        top_n: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Generate reward recommendations for many customers in one pass.
+        
+        Scores are computed as a customers x rewards matrix and ranked row by
+        row. Given a RewardCatalog, the per-reward arrays the rules need are
+        cached on the catalog snapshot, so the catalog is not re-processed
+        per request.
+        
+        Args:
+            customers: List of customer attributes and history
+            available_rewards: Reward catalog, or a list of available rewards
+            top_n: Number of top recommendations to return per customer
+            
+        Returns:
+            One list of recommended rewards per customer, in input order
+        """
+        catalog = RewardCatalog.of(available_rewards)
+        logger.info("Generating recommendations for %s customers against %s rewards",
+                    len(customers), len(catalog))
+        
+        if not customers or not len(catalog):
+            return [[] for _ in customers]
+            
+        if self.model_ready:
+            # Mock implementation - random scores, as in recommend()
+            scores = np.random.random((len(customers), len(catalog)))
+        else:
+            scores = self._rule_based_scores(customers, catalog)
+            
+        return self._rank(scores, catalog, top_n)
+    
     def _rule_based_recommend(self, customer_data: Dict[str, Any], 
-                             available_rewards: List[Dict[str, Any]], 
+                             available_rewards: Union[RewardCatalog, List[Dict[str, Any]]], 
                              top_n: int = 5) -> List[Dict[str, Any]]:
         """Simple rule-based recommendation fallback."""
         logger.info("Using rule-based recommendation fallback")
         
-        # Example rule: New customers get signup discounts
-        is_new_customer = True  # In real implementation, check registration date
-        
-        recommendations = []
-        for reward in available_rewards:
-            score = 0.5  # Default score
+        catalog = RewardCatalog.of(available_rewards)
+        if not len(catalog):
+            return []
             
-            # Apply rules
-            if is_new_customer and "signup" in reward.get("name", "").lower():
-                score = 0.9
-            elif "discount" in reward.get("type", "").lower():
-                score = 0.7
-            
-            recommendations.append({
-                "reward_id": reward["id"],
-                "reward_name": reward["name"],
-                "score": score,
-                "rank": 0  # Will be set after sorting
-            })
-        
-        # Sort by score and assign ranks
-        recommendations.sort(key=lambda x: x["score"], reverse=True)
-        for i, rec in enumerate(recommendations):
-            rec["rank"] = i + 1
+        scores = self._rule_based_scores([customer_data], catalog)
+        return self._rank(scores, catalog, top_n)[0]
+    
+    def _rule_based_scores(self, customers: List[Dict[str, Any]], 
+                           catalog: RewardCatalog) -> np.ndarray:
+        """Score every (customer, reward) pair with the fallback rules."""
+        # Example rule: New customers get signup discounts
+        is_new_customer = self._is_new_customer(customers)
+        is_signup, reward_scores = catalog.derived("rule_based_scores", _rule_based_reward_arrays)
+        return np.where(is_new_customer[:, None] & is_signup[None, :], 0.9, reward_scores[None, :])
+    
+    def _is_new_customer(self, customers: List[Dict[str, Any]], 
+                         max_age_days: int = 30) -> np.ndarray:
+        """Flag customers who signed up recently, treating unknown signup dates as new."""
+        created_at = pd.to_datetime(
+            pd.Series([customer.get("created_at") for customer in customers], dtype=object),
+            utc=True, errors="coerce", format="ISO8601"
+        )
+        age = pd.Timestamp.now(tz="UTC") - created_at
+        return (created_at.isna() | (age < pd.Timedelta(days=max_age_days))).to_numpy()
+    
+    def _rank(self, scores: np.ndarray, 
+              catalog: RewardCatalog, 
+              top_n: int) -> List[List[Dict[str, Any]]]:
+        """Turn a customers x rewards score matrix into ranked recommendation lists."""
+        # Stable sort keeps catalog (ID) order between equal scores
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :top_n]
+        ids, names = catalog.ids, catalog.names
         
-        return recommendations[:top_n]
+        results = []
+        for row, reward_indices in enumerate(order):
+            results.append([
+                {
+                    "reward_id": ids[j],
+                    "reward_name": names[j],
+                    "score": float(scores[row, j]),
+                    "rank": rank + 1
+                }
+                for rank, j in enumerate(reward_indices)
+            ])
+        return results
+
+def _rule_based_reward_arrays(catalog: RewardCatalog):
+    """Per-reward inputs of the fallback rules: signup flags and base scores."""
+    is_signup = np.array(["signup" in str(name).lower() for name in catalog.names], dtype=bool)
+    is_discount_type = np.array(["discount" in reward_type.lower() for reward_type in catalog.types], dtype=bool)
+    reward_scores = np.where(is_discount_type[catalog.type_codes], 0.7, 0.5)
+    return is_signup, reward_scores
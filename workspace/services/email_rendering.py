@@ -0,0 +1,244 @@
+"""
+Email content rendering with compiled templates and cached static fragments.
+"""
+import html
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from workspace.settings import settings
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Email layouts; {content_block} and {rewards_block} are static fragments,
+# every other field is filled in per recipient
+TEMPLATES = {
+    "welcome": (
+        "<html><body>"
+        "<h1>Welcome, {name}!</h1>"
+        "<p>Thanks for joining our rewards program.</p>"
+        "{content_block}"
+        "{rewards_block}"
+        "<p><a href=\"https://example.com/preferences?customer={customer_id}\">Manage preferences</a></p>"
+        "</body></html>"
+    ),
+    "engagement": (
+        "<html><body>"
+        "<h1>Hi {name}, here are your rewards this week</h1>"
+        "{rewards_block}"
+        "{content_block}"
+        "<p><a href=\"https://example.com/preferences?customer={customer_id}\">Manage preferences</a></p>"
+        "</body></html>"
+    )
+}
+
+FRAGMENT_TEMPLATES = {
+    "question": "<section class=\"question\"><p>{text}</p></section>",
+    "game": "<section class=\"game\"><p>Play {text} for a chance to win bonus points.</p></section>",
+    "voucher": "<section class=\"voucher\"><p>Your voucher: {text}</p></section>",
+    "newsletter": "<section class=\"newsletter\"><p>{text}</p></section>",
+    "rewards": "<section class=\"rewards\"><h2>Recommended for you</h2><ul>{items}</ul></section>",
+    "reward_item": "<li>{reward_name}</li>"
+}
+
+class CompiledTemplate:
+    """
+    A str.format template parsed once into literal text and named fields.
+    
+    render() fills the field slots of the parsed pieces and joins them, so
+    the template is never re-parsed per call. partial() substitutes a subset
+    of the fields and returns another compiled template, so static parts can
+    be rendered once and reused. Fields must be plain names, without
+    conversions or format specs.
+    """
+    
+    _formatter = string.Formatter()
+    
+    def __init__(self, source: str):
+        self.source = source
+        parts: List[Optional[str]] = []
+        slots: List[Tuple[int, str]] = []
+        for literal, field, format_spec, conversion in self._formatter.parse(source):
+            if literal:
+                parts.append(literal)
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise ValueError(f"Templates must use plain named fields only, got {{{field}}}")
+            slots.append((len(parts), field))
+            parts.append(None)
+        self._parts = parts
+        self._slots = slots
+        self.fields = frozenset(field for _, field in slots)
+    
+    def render(self, values: Dict[str, Any]) -> str:
+        """
+        Interpolate all fields.
+        
+        Args:
+            values: Value per field name
+        
+        Returns:
+            Rendered text
+        """
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = str(values[field])
+        return "".join(parts)
+    
+    def partial(self, values: Dict[str, Any]) -> "CompiledTemplate":
+        """
+        Substitute the given fields and keep the rest as placeholders.
+        
+        Args:
+            values: Value per field name for the fields to fill in
+        
+        Returns:
+            Compiled template with the remaining fields
+        """
+        parts = self._parts.copy()
+        for index, field in self._slots:
+            parts[index] = str(values[field]) if field in values else None
+        slots = dict(self._slots)
+        return CompiledTemplate("".join(
+            "{" + slots[index] + "}" if part is None else _escape_braces(part)
+            for index, part in enumerate(parts)
+        ))
+
+def _escape_braces(text: str) -> str:
+    return text.replace("{", "{{").replace("}", "}}")
+
+class EmailRenderer:
+    """
+    Renders email content from compiled templates.
+    
+    The content block and reward list are the same for every customer with
+    the same content plan and rewards, so they are rendered once and baked
+    into a partial template per (template, content, rewards), kept in a
+    least-recently-used cache. Each recipient then costs one render over
+    their own fields.
+    """
+    
+    def __init__(self, templates: Optional[Dict[str, str]] = None,
+                 max_cached_fragments: Optional[int] = None):
+        self.templates = {name: CompiledTemplate(source) for name, source in (templates or TEMPLATES).items()}
+        self.fragments = {name: CompiledTemplate(source) for name, source in FRAGMENT_TEMPLATES.items()}
+        self.max_cached_fragments = (settings.EMAIL_FRAGMENT_CACHE_SIZE if max_cached_fragments is None
+                                     else max_cached_fragments)
+        self._partials: "OrderedDict[tuple, CompiledTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+        logger.info("EmailRenderer initialized with %s templates", len(self.templates))
+    
+    @property
+    def cached_partials(self) -> int:
+        """Number of partial templates in the fragment cache."""
+        return len(self._partials)
+    
+    def render(self, template_name: str,
+               recipient: Dict[str, Any],
+               content_plan: Optional[Dict[str, Any]] = None,
+               rewards: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Render one email.
+        
+        Args:
+            template_name: Name of a registered template
+            recipient: Per-recipient fields such as customer_id and name
+            content_plan: Optional content plan from ContentSelectionAgent
+            rewards: Optional recommended rewards
+        
+        Returns:
+            Rendered HTML content
+        """
+        partial = self._partial(template_name, content_plan, rewards)
+        return partial.render({key: html.escape(str(value)) for key, value in recipient.items()})
+    
+    def render_batch(self, template_name: str,
+                     recipients: List[Dict[str, Any]],
+                     content_plans: Optional[List[Optional[Dict[str, Any]]]] = None,
+                     rewards: Optional[List[Optional[List[Dict[str, Any]]]]] = None) -> List[str]:
+        """
+        Render one email per recipient.
+        
+        Args:
+            template_name: Name of a registered template
+            recipients: Per-recipient fields
+            content_plans: Optional content plan per recipient
+            rewards: Optional recommended rewards per recipient
+        
+        Returns:
+            Rendered HTML content per recipient, in input order
+        """
+        content_plans = content_plans or [None] * len(recipients)
+        rewards = rewards or [None] * len(recipients)
+        escape = html.escape
+        return [
+            self._partial(template_name, content_plan, recipient_rewards).render(
+                {key: escape(str(value)) for key, value in recipient.items()}
+            )
+            for recipient, content_plan, recipient_rewards in zip(recipients, content_plans, rewards)
+        ]
+    
+    def _partial(self, template_name: str,
+                 content_plan: Optional[Dict[str, Any]],
+                 rewards: Optional[List[Dict[str, Any]]]) -> CompiledTemplate:
+        """Get the template with static fragments filled in, rendering them on a cache miss."""
+        content = _content_key(content_plan)
+        reward_names = tuple(reward.get("reward_name", "") for reward in rewards or [])
+        key = (template_name, content, reward_names)
+        
+        with self._lock:
+            partial = self._partials.get(key)
+            if partial is not None:
+                self._partials.move_to_end(key)
+                return partial
+        
+        partial = self.templates[template_name].partial({
+            "content_block": self._content_block(content),
+            "rewards_block": self._rewards_block(reward_names)
+        })
+        if self.max_cached_fragments > 0:
+            with self._lock:
+                self._partials[key] = partial
+                if len(self._partials) > self.max_cached_fragments:
+                    # Evict the least recently used entry
+                    self._partials.popitem(last=False)
+        return partial
+    
+    def _content_block(self, content: Tuple[Tuple[str, str], ...]) -> str:
+        return "".join(self.fragments[block].render({"text": html.escape(text)}) for block, text in content)
+    
+    def _rewards_block(self, reward_names: Tuple[str, ...]) -> str:
+        if not reward_names:
+            return ""
+        items = "".join(self.fragments["reward_item"].render({"reward_name": html.escape(name)})
+                        for name in reward_names)
+        return self.fragments["rewards"].render({"items": items})
+
+def _content_key(content_plan: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    """Reduce a content plan to its included blocks and their copy."""
+    if not content_plan:
+        return ()
+    blocks = [("question", question) for question in content_plan.get("recommended_questions") or []]
+    for block, field in (("game", "recommended_game"), ("voucher", "recommended_voucher"),
+                         ("newsletter", "newsletter_focus")):
+        if content_plan.get(field):
+            blocks.append((block, content_plan[field]))
+    return tuple(blocks)
+
+_renderer: Optional[EmailRenderer] = None
+_renderer_lock = threading.Lock()
+
+def get_email_renderer() -> EmailRenderer:
+    """
+    Get the process-wide email renderer.
+    
+    Returns:
+        The shared renderer and its fragment cache
+    """
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = EmailRenderer()
+        return _renderer
@@ -1,17 +1,26 @@
 """
 Service for sending emails to customers.
 """
+import uuid
+from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional
 from workspace.utils.logger import setup_logger
 from workspace.settings import settings
+from workspace.data.frequency import SEND_EVENT_TYPE
+from workspace.services.email_rendering import get_email_renderer
+from workspace.services.event_ingestion import get_event_ingestor
 
 logger = setup_logger(__name__)
 
+# Provider event names mapped to event store event types
+TRACKED_EVENT_TYPES = {"open": "email_open", "click": "email_click", "sent": "email_sent"}
+
 class EmailService:
     """Service for sending emails to customers."""
     
     def __init__(self):
         self.api_key = settings.EMAIL_API_KEY
+        self.renderer = get_email_renderer()
         logger.info("EmailService initialized")
     
     async def send_email(self, 
@@ -31,13 +40,16 @@ class EmailService:
         Returns:
             Response with email ID and status
         """
-        logger.info(f"Sending email to {recipient} with subject: {subject}")
+        logger.info("Sending email to %s with subject: %s", recipient, subject)
         
         # In a real implementation, would call email service API
         
         # Mock implementation
         email_id = f"email_{hash(recipient + subject) % 10000}"
         
+        if metadata and metadata.get("customer_id"):
+            self._record_sends([metadata])
+        
         return {
             "email_id": email_id,
             "status": "sent",
@@ -59,7 +71,7 @@ class EmailService:
         Returns:
             Response with email ID and status
         """
-        logger.info(f"Sending personalized campaign to customer {customer_id}")
+        logger.info("Sending personalized campaign to customer %s", customer_id)
         
         # In a real implementation:
         # 1. Load customer data
@@ -67,12 +79,12 @@ class EmailService:
         # 3. Send email
         
         # Mock implementation
-        recipient = f"customer_{customer_id}@example.com"  # Would load from database
+        recipient = self._recipient(customer_id)
         subject = email_data.get("subject", "Your personalized rewards")
-        content = email_data.get("content", "Default email content")
+        content = self._content(recipient, email_data)
         
         response = await self.send_email(
-            recipient=recipient,
+            recipient=recipient["email"],
             subject=subject,
             content=content,
             metadata={"customer_id": customer_id, "campaign_id": email_data.get("campaign_id")}
@@ -80,6 +92,86 @@ class EmailService:
         
         return response
     
+    async def send_bulk_campaign(self, 
+                              emails: List[Dict[str, Any]], 
+                              batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Send many personalized campaign emails in provider-sized batches.
+        
+        Args:
+            emails: List of email_data dictionaries, each with a customer_id
+            batch_size: Emails per provider request, defaults to EMAIL_BULK_BATCH_SIZE
+            
+        Returns:
+            List of responses with email ID and status, in input order
+        """
+        batch_size = batch_size or settings.EMAIL_BULK_BATCH_SIZE
+        logger.info("Sending bulk campaign of %s emails in batches of %s", len(emails), batch_size)
+        
+        results = []
+        for start in range(0, len(emails), batch_size):
+            batch = emails[start:start + batch_size]
+            results.extend(await self._send_batch(batch))
+            self._record_sends(batch)
+            
+        return results
+    
+    async def _send_batch(self, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send one batch of emails with a single provider request."""
+        # In a real implementation, would call the provider's batch send API
+        
+        # Mock implementation
+        results = []
+        for email_data in emails:
+            recipient = self._recipient(email_data["customer_id"])
+            subject = email_data.get("subject", "Your personalized rewards")
+            content = self._content(recipient, email_data)  # Would be part of the provider request
+            results.append({
+                "email_id": f"email_{hash(recipient['email'] + subject) % 10000}",
+                "status": "sent",
+                "recipient": recipient["email"],
+                "subject": subject,
+                "timestamp": "2023-06-15T10:30:00Z"
+            })
+            
+        return results
+    
+    def _record_sends(self, emails: List[Dict[str, Any]]) -> None:
+        """
+        Queue an email_sent event for each email on the shared EventIngestor.
+        
+        The send counters are built from these events once they reach the
+        event store. A full ingestion buffer loses the events, not the sends.
+        """
+        try:
+            get_event_ingestor().submit([
+                {
+                    "customer_id": email_data["customer_id"],
+                    "event_type": SEND_EVENT_TYPE,
+                    "metadata": {"campaign_id": email_data.get("campaign_id")}
+                }
+                for email_data in emails
+            ])
+        except BufferError as e:
+            logger.warning("Could not record %s sends: %s", len(emails), e)
+    
+    def _recipient(self, customer_id: str) -> Dict[str, Any]:
+        """Get the per-recipient fields used for addressing and rendering."""
+        # In a real implementation, would load from database
+        return {
+            "customer_id": customer_id,
+            "email": f"customer_{customer_id}@example.com",
+            "name": f"Customer {customer_id}"
+        }
+    
+    def _content(self, recipient: Dict[str, Any], email_data: Dict[str, Any]) -> str:
+        """Render the email from its template, or use its prebuilt content."""
+        if "template" not in email_data:
+            return email_data.get("content", "Default email content")
+        return self.renderer.render(
+            email_data["template"], recipient, email_data.get("content_plan"), email_data.get("rewards")
+        )
+    
     async def track_engagement(self, 
                             email_id: str, 
                             event_type: str, 
@@ -87,25 +179,42 @@ class EmailService:
         """
         Track engagement events for sent emails.
         
+        Events are queued on the shared EventIngestor, which writes them to
+        the event store in micro-batches. Events whose metadata has no
+        customer_id cannot be attributed and are not recorded ("untracked");
+        events arriving while the ingestion buffer is full are "rejected".
+        
         Args:
             email_id: ID of the email
             event_type: Type of event (open, click, etc.)
-            metadata: Additional metadata about the event
+            metadata: Additional metadata about the event, including customer_id
             
         Returns:
             Response with event ID and status
         """
-        logger.info(f"Tracking {event_type} event for email {email_id}")
-        
-        # In a real implementation, would store event in database
+        logger.info("Tracking %s event for email %s", event_type, email_id)
         
-        # Mock implementation
-        event_id = f"event_{hash(email_id + event_type) % 10000}"
+        metadata = metadata or {}
+        event_id = f"event_{uuid.uuid4().hex[:12]}"
+        timestamp = datetime.now(timezone.utc).isoformat()
+        status = "untracked"
+        if metadata.get("customer_id"):
+            try:
+                get_event_ingestor().submit({
+                    "customer_id": metadata["customer_id"],
+                    "event_type": TRACKED_EVENT_TYPES.get(event_type, event_type),
+                    "timestamp": timestamp,
+                    "metadata": {**metadata, "email_id": email_id, "event_id": event_id}
+                })
+                status = "recorded"
+            except BufferError as e:
+                logger.warning("Could not record %s event for email %s: %s", event_type, email_id, e)
+                status = "rejected"
         
         return {
             "event_id": event_id,
             "email_id": email_id,
             "event_type": event_type,
-            "timestamp": "2023-06-15T10:35:00Z",
-            "status": "recorded"
+            "timestamp": timestamp,
+            "status": status
         }
@@ -0,0 +1,184 @@
+"""
+In-process ingestion of engagement events, micro-batched into the event store.
+"""
+import threading
+import time
+from typing import Dict, Any, List, Optional, Union
+from workspace.settings import settings
+from workspace.data.event_store import Event, EventStore, events_to_frame, get_event_store
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class EventIngestor:
+    """
+    Buffers engagement events and writes them to the event store in batches.
+    
+    submit() converts events to compact Event objects and appends them to an
+    in-memory buffer, so request handlers never wait on the store and a
+    full buffer holds no per-event dictionaries or timestamp strings. A
+    background thread flushes the buffer as one batch once it holds
+    batch_size events or flush_interval seconds after its oldest event
+    arrived, whichever comes first. Each flush is one
+    events_to_frame conversion and one EventStore.append, so the store's
+    subscribers (online features, response cache, send counters) also update
+    once per batch rather than once per event. A failed write is retried
+    write_retries times with exponential backoff before the batch is dropped
+    and counted in failed.
+    """
+    
+    def __init__(self, event_store: Optional[EventStore] = None,
+                 batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None,
+                 write_retries: Optional[int] = None):
+        self.event_store = event_store if event_store is not None else get_event_store()
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.flush_interval = settings.INGEST_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.max_pending = max_pending or settings.INGEST_MAX_PENDING
+        self.write_retries = settings.INGEST_WRITE_RETRIES if write_retries is None else write_retries
+        self.ingested = 0
+        self.batches = 0
+        self.failed = 0
+        self._buffer: List[Event] = []
+        self._oldest = 0.0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        logger.info("EventIngestor initialized with batch size %s and flush interval %ss",
+                    self.batch_size, self.flush_interval)
+    
+    @property
+    def pending(self) -> int:
+        """Number of events buffered but not yet written."""
+        return len(self._buffer)
+    
+    def submit(self, events: Union[Dict[str, Any], Event, List[Union[Dict[str, Any], Event]]]) -> int:
+        """
+        Queue one event or a list of events for the next batch.
+        
+        Events without a timestamp are stamped with the current time.
+        
+        Args:
+            events: Engagement event dictionary or Event, or a list of them
+        
+        Returns:
+            Number of events accepted
+        
+        Raises:
+            ValueError: If an event has no customer ID or an invalid timestamp;
+                none of the events are queued
+            BufferError: If accepting the events would exceed max_pending
+        """
+        if not isinstance(events, list):
+            events = [events]
+        if not events:
+            return 0
+        now = time.time_ns()
+        events = [event if isinstance(event, Event) else Event.from_dict(event, now)
+                  for event in events]
+        
+        with self._condition:
+            buffered = len(self._buffer)
+            if buffered + len(events) > self.max_pending:
+                raise BufferError(f"Ingestion buffer full ({buffered} events pending)")
+            self._buffer.extend(events)
+            if not buffered:
+                self._oldest = time.monotonic()
+            # Only wake the flusher when its wait condition changes
+            if not buffered or len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+        return len(events)
+    
+    def flush(self) -> int:
+        """
+        Write everything buffered now, on the calling thread.
+        
+        Returns:
+            Number of events written
+        """
+        with self._condition:
+            batch, self._buffer = self._buffer, []
+        return self._write(batch)
+    
+    def start(self) -> None:
+        """Start the background flusher thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="event-ingestor", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the flusher thread after writing any buffered events."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._buffer and not self._stopping:
+                    self._condition.wait()
+                deadline = self._oldest + self.flush_interval
+                while len(self._buffer) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._stopping:
+                    return
+                batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                if self._buffer:
+                    self._oldest = time.monotonic()
+            self._write(batch)
+    
+    def _write(self, batch: List[Event]) -> int:
+        """Append one batch to the event store."""
+        if not batch:
+            return 0
+        with self._write_lock:
+            for attempt in range(self.write_retries + 1):
+                try:
+                    written = self.event_store.append(events_to_frame(batch))
+                    break
+                except Exception as e:
+                    if attempt == self.write_retries:
+                        self.failed += len(batch)
+                        logger.error("Dropping %s ingested events after %s failed writes: %s",
+                                     len(batch), attempt + 1, e)
+                        return 0
+                    logger.warning("Failed to write %s ingested events, retrying: %s", len(batch), e)
+                    time.sleep(0.05 * 2 ** attempt)
+            self.ingested += written
+            self.batches += 1
+        return written
+
+_event_ingestor: Optional[EventIngestor] = None
+_event_ingestor_lock = threading.Lock()
+
+def get_event_ingestor() -> EventIngestor:
+    """
+    Get the process-wide event ingestor, starting its flusher on first use.
+    
+    Returns:
+        The shared event ingestor writing to the shared event store
+    """
+    global _event_ingestor
+    with _event_ingestor_lock:
+        if _event_ingestor is None:
+            _event_ingestor = EventIngestor()
+            _event_ingestor.start()
+        return _event_ingestor
+
+def stop_event_ingestor() -> None:
+    """Flush and stop the shared event ingestor, if it was started."""
+    global _event_ingestor
+    with _event_ingestor_lock:
+        if _event_ingestor is not None:
+            _event_ingestor.stop()
+            _event_ingestor = None
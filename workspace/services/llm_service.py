@@ -10,6 +10,14 @@ from workspace.settings import settings
 
 logger = setup_logger(__name__)
 
+# Text returned in place of generated content when the LLM is unavailable
+MOCK_RESPONSE_PREFIX = "This is a mock response from the LLM service"
+ERROR_RESPONSE_PREFIX = "Error generating response: "
+
+def is_fallback_response(response: str) -> bool:
+    """Check whether a response is mock or error text rather than generated content."""
+    return response.startswith((MOCK_RESPONSE_PREFIX, ERROR_RESPONSE_PREFIX))
+
 class LLMService:
     """Service for interacting with LLM models using Groq API."""
     
@@ -18,7 +26,7 @@ class LLMService:
         self.model = settings.LLM_MODEL
         self.provider = "groq"
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
-        logger.info(f"LLMService initialized with model: {self.model} provider: {self.provider}")
+        logger.info("LLMService initialized with model: %s provider: %s", self.model, self.provider)
     
     async def generate_response(self, prompt: str, 
                               max_tokens: int = 500) -> str:
@@ -32,12 +40,12 @@ class LLMService:
         Returns:
             Generated text response
         """
-        logger.info(f"Generating LLM response with {len(prompt)} chars prompt")
+        logger.info("Generating LLM response with %s chars prompt", len(prompt))
         
         # Check if API key is available
         if not self.api_key:
             logger.warning("No Groq API key found. Using mock response.")
-            return f"This is a mock response from the LLM service using {self.model}"
+            return f"{MOCK_RESPONSE_PREFIX} using {self.model}"
         
         try:
             # Prepare request
@@ -67,12 +75,12 @@ class LLMService:
                 response_data = response.json()
                 return response_data["choices"][0]["message"]["content"]
             else:
-                logger.error(f"Error from Groq API: {response.status_code}, {response.text}")
-                return f"Error generating response: {response.status_code}"
+                logger.error("Error from Groq API: %s, %s", response.status_code, response.text)
+                return f"{ERROR_RESPONSE_PREFIX}{response.status_code}"
                 
         except Exception as e:
-            logger.exception(f"Exception when calling Groq API: {str(e)}")
-            return f"Error generating response: {str(e)}"
+            logger.exception("Exception when calling Groq API: %s", str(e))
+            return f"{ERROR_RESPONSE_PREFIX}{str(e)}"
     
     async def generate_personalized_content(self, 
                                          customer_data: Dict[str, Any], 
@@ -89,7 +97,7 @@ class LLMService:
         Returns:
             Generated personalized content
         """
-        logger.info(f"Generating personalized {content_type} content")
+        logger.info("Generating personalized %s content", content_type)
         
         # Construct a detailed prompt
         prompt = f"""Generate personalized {content_type} content for a customer with the following attributes:
@@ -28,7 +28,7 @@ class StorageService:
         Returns:
             Stored data with ID
         """
-        logger.info(f"Storing data in collection {collection}")
+        logger.info("Storing data in collection %s", collection)
         
         # In a real implementation, would store in database
         
@@ -53,7 +53,7 @@ class StorageService:
         Returns:
             Retrieved data or None if not found
         """
-        logger.info(f"Retrieving data from collection {collection} with key {key}")
+        logger.info("Retrieving data from collection %s with key %s", collection, key)
         
         # In a real implementation, would query database
         
@@ -76,7 +76,7 @@ class StorageService:
         Returns:
             List of matching data items
         """
-        logger.info(f"Querying data from collection {collection} with query {query}")
+        logger.info("Querying data from collection %s with query %s", collection, query)
         
         # In a real implementation, would query database
         
@@ -97,7 +97,7 @@ class StorageService:
         Returns:
             Updated data or None if not found
         """
-        logger.info(f"Updating data in collection {collection} with key {key}")
+        logger.info("Updating data in collection %s with key %s", collection, key)
         
         # In a real implementation, would update in database
         
@@ -116,7 +116,7 @@ class StorageService:
         Returns:
             True if deleted, False if not found
         """
-        logger.info(f"Deleting data from collection {collection} with key {key}")
+        logger.info("Deleting data from collection %s with key %s", collection, key)
         
         # In a real implementation, would delete from database
         
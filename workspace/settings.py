@@ -12,6 +12,12 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: str = Field(default="", env="DATABASE_URL")
+    EVENTS_PATH: str = Field(default="data/events.json", description="Engagement events file (JSON or Parquet)")
+    MODEL_DIR: str = Field(default="data/models", description="Directory for versioned model artifacts")
+    ROLLUPS_DIR: str = Field(default="data/processed/rollups", description="Directory for daily analytics rollup cubes")
+    ROLLUP_LIVE_DAYS: int = Field(default=7, description="Most recently updated days whose rollups merge new events without a rebuild")
+    FEATURE_STORE_PATH: str = Field(default="data/processed/features.npz", description="Snapshot file for the online customer feature store")
+    FEATURE_SNAPSHOT_INTERVAL: float = Field(default=300.0, description="Seconds between online feature store snapshots (0 = only on demand)")
     
     # LLM Configuration
     GROQ_API_KEY: str = Field(default="", env="GROQ_API_KEY")
@@ -19,11 +25,40 @@ class Settings(BaseSettings):
     
     # Email Service
     EMAIL_API_KEY: str = Field(default="", env="EMAIL_API_KEY")
+    EMAIL_BULK_BATCH_SIZE: int = Field(default=500, description="Emails per provider request for bulk sends")
+    EMAIL_HOURLY_SEND_CAPACITY: int = Field(default=50000, description="Maximum emails scheduled per hour by the send-time planner")
+    EMAIL_CONTENT_SLOTS: int = Field(default=3, description="Content blocks per email chosen by the content selector")
+    EMAIL_FRAGMENT_CACHE_SIZE: int = Field(default=10000, description="Maximum cached partially rendered email templates")
+    CONTENT_BLOCK_CACHE_SIZE: int = Field(default=10000, description="Maximum cached LLM-rendered content blocks")
     
     # Reward Personalization Settings
     DEFAULT_EMAIL_FREQUENCY: int = Field(default=7, description="Default email frequency in days")
     MIN_ENGAGEMENT_THRESHOLD: float = Field(default=0.1, description="Minimum engagement rate to continue journey")
     MAX_EMAILS_BEFORE_DOWNGRADE: int = Field(default=5, description="Max number of emails before reducing frequency")
+
+    # API Limits
+    RECOMMENDATION_BATCH_MAX_CUSTOMERS: int = Field(default=100000, description="Maximum customer IDs per batch recommendation request")
+    RECOMMENDATION_BATCH_CHUNK_SIZE: int = Field(default=2000, description="Customers scored per chunk of a streamed batch recommendation response")
+    EXPORT_PAGE_SIZE: int = Field(default=1000, description="Rows read per page when streaming list endpoints as NDJSON")
+    RESPONSE_CACHE_MAX_ENTRIES: int = Field(default=100000, description="Maximum cached recommendation responses")
+    INGEST_MAX_REQUEST_EVENTS: int = Field(default=10000, description="Maximum events per POST /api/events request")
+    FAST_JSON_RESPONSES: bool = Field(default=False, description="Opt in to serializing hot endpoint responses with orjson, projecting rows onto the response model instead of re-validating them")
+    
+    # Event Ingestion
+    INGEST_BATCH_SIZE: int = Field(default=5000, description="Events written to the event store per ingestion batch")
+    INGEST_FLUSH_INTERVAL: float = Field(default=0.2, description="Maximum seconds an ingested event waits before its batch is written")
+    INGEST_MAX_PENDING: int = Field(default=500000, description="Maximum buffered ingested events before requests are rejected")
+    INGEST_WRITE_RETRIES: int = Field(default=2, description="Retries of a failed ingestion batch write before the batch is dropped")
+    
+    # CPU Offloading
+    CPU_THREAD_WORKERS: int = Field(default=0, description="Thread pool size for NumPy-heavy work (0 = one per CPU)")
+    CPU_PROCESS_WORKERS: int = Field(default=0, description="Process pool size for pure-Python work (0 = one per CPU, -1 = use threads)")
+    LOOP_LAG_INTERVAL: float = Field(default=0.1, description="Event loop lag sampling interval in seconds")
+    TIMESTAMP_PARSE_CACHE_SIZE: int = Field(default=65536, description="Maximum memoized ISO timestamp strings per parser")
+    
+    # Logging
+    LOG_ASYNC: bool = Field(default=True, description="Write log records from a background listener thread instead of the calling thread")
+    LOG_SAMPLE_EVERY: int = Field(default=1000, description="Per-item messages logged through SampledLogger are written once per this many calls (1 = all)")
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,118 @@
+"""
+Executor pools for running CPU-bound work off the asyncio event loop.
+
+NumPy-heavy calls release the GIL for most of their runtime, so they go to a
+shared thread pool. Pure-Python calls (per-event dict walking, timestamp
+parsing) hold the GIL and only scale on a process pool; anything sent there
+must be picklable.
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+from workspace.settings import settings
+from workspace.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def _worker_count(configured: int) -> int:
+    """Resolve a configured worker count, where 0 means one per CPU."""
+    return configured if configured > 0 else (os.cpu_count() or 1)
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """
+    Get the shared thread pool used for NumPy-heavy work.
+
+    Returns:
+        The process-wide thread pool, created on first use
+    """
+    global _thread_pool
+    if _thread_pool is None:
+        workers = _worker_count(settings.CPU_THREAD_WORKERS)
+        _thread_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cpu")
+        logger.info("Thread pool started with %s workers", workers)
+    return _thread_pool
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared process pool used for pure-Python CPU-bound work.
+
+    Returns:
+        The process-wide process pool, created on first use
+    """
+    global _process_pool
+    if _process_pool is None:
+        workers = _worker_count(settings.CPU_PROCESS_WORKERS)
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+        logger.info("Process pool started with %s workers", workers)
+    return _process_pool
+
+async def _run(executor: Executor, func: Callable[..., Any], *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the shared thread pool.
+
+    Args:
+        func: Callable to run
+        *args: Positional arguments for the callable
+        **kwargs: Keyword arguments for the callable
+
+    Returns:
+        The callable's return value
+    """
+    return await _run(get_thread_pool(), func, *args, **kwargs)
+
+async def run_in_process(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking call on the shared process pool.
+
+    The callable and its arguments are pickled into a worker process. When
+    offloading is disabled, or the pool has died, the call falls back to the
+    thread pool so callers never block the event loop.
+
+    Args:
+        func: Picklable callable to run
+        *args: Picklable positional arguments
+        **kwargs: Picklable keyword arguments
+
+    Returns:
+        The callable's return value
+    """
+    global _process_pool
+    if settings.CPU_PROCESS_WORKERS < 0:
+        return await run_in_thread(func, *args, **kwargs)
+    pool = get_process_pool()
+    try:
+        return await _run(pool, func, *args, **kwargs)
+    except BrokenProcessPool:
+        logger.error("Process pool is broken, restarting it and retrying on the thread pool")
+        # Release the dead pool's management thread and queues; concurrent
+        # callers may already have replaced it
+        pool.shutdown(wait=False, cancel_futures=True)
+        if _process_pool is pool:
+            _process_pool = None
+        return await run_in_thread(func, *args, **kwargs)
+
+def shutdown_executors(wait: bool = True) -> None:
+    """
+    Shut down the shared pools.
+
+    Args:
+        wait: Whether to wait for pending work to finish
+    """
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=wait)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=wait)
+        _process_pool = None
+    logger.info("Executor pools shut down")
@@ -1,40 +1,131 @@
 """
 Logging configuration.
 """
+import atexit
 import logging
+import os
+import queue
 import sys
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+from workspace.settings import settings
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the listener thread.
+    
+    The standard QueueHandler merges the message with its arguments before
+    enqueueing; here the calling thread only enqueues the record, so a
+    %-style call costs the same whether or not the message is ever written.
+    Arguments are formatted later, so they should not be mutated after the
+    call. Records go to the current process's listener, which is started on
+    first use (also in forked worker processes).
+    """
+    
+    def __init__(self):
+        super().__init__(None)
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        _listener_queue().put_nowait(record)
+
+def _listener_queue() -> queue.SimpleQueue:
+    """Get the queue of this process's listener, starting the listener if needed."""
+    global _listener, _listener_pid
+    pid = os.getpid()
+    if _listener_pid != pid:
+        with _listener_lock:
+            if _listener_pid != pid:
+                handler = logging.StreamHandler(sys.stdout)
+                handler.setFormatter(logging.Formatter(LOG_FORMAT))
+                _listener = QueueListener(queue.SimpleQueue(), handler, respect_handler_level=True)
+                _listener.start()
+                _listener_pid = pid
+    return _listener.queue
+
+def stop_logging() -> None:
+    """Write every queued record and stop this process's listener thread."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+        _listener_pid = None
+
+def _reset_after_fork() -> None:
+    global _listener_lock
+    _listener_lock = threading.Lock()
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_reset_after_fork)
 
 def setup_logger(name: str, level: Optional[int] = None) -> logging.Logger:
     """
     Set up a logger with the specified name and level.
     
+    With LOG_ASYNC enabled (the default) the logger enqueues records for a
+    background listener that formats them and writes to stdout, so callers
+    never block on I/O. Log with %-style arguments rather than f-strings so
+    formatting is also deferred.
+    
     Args:
         name: Logger name, typically __name__
         level: Logging level, defaults to INFO if not specified
-        
+    
     Returns:
         Configured logger instance
     """
     if level is None:
         level = logging.INFO
-        
+    
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     # Check if handlers already exist to avoid duplicates
     if not logger.handlers:
-        # Create console handler
-        handler = logging.StreamHandler(sys.stdout)
+        if settings.LOG_ASYNC:
+            handler = DeferredQueueHandler()
+        else:
+            # Create console handler
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
         handler.setLevel(level)
         
-        # Create formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        handler.setFormatter(formatter)
-        
         # Add handler to logger
         logger.addHandler(handler)
     
     return logger
+
+class SampledLogger(logging.LoggerAdapter):
+    """
+    Logger for per-item messages that writes one in every `every` calls.
+    
+    Calls are counted per message template, so each distinct %-style message
+    is sampled on its own; written messages note the sampling rate. Counts
+    are not locked, so under concurrency the rate is approximate.
+    """
+    
+    def __init__(self, logger: logging.Logger, every: Optional[int] = None):
+        super().__init__(logger, {})
+        self.every = settings.LOG_SAMPLE_EVERY if every is None else every
+        self._counts: Dict[str, int] = {}
+    
+    def log(self, level: int, msg: str, *args: Any, **kwargs: Any) -> None:
+        if not self.isEnabledFor(level):
+            return
+        if self.every > 1:
+            count = self._counts.get(msg, 0)
+            self._counts[msg] = count + 1
+            if count % self.every:
+                return
+            msg = f"{msg} (sampled 1 in {self.every})"
+        self.logger.log(level, msg, *args, **kwargs)
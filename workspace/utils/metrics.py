@@ -1,7 +1,11 @@
 """
 Utilities for tracking and reporting metrics.
 """
+import asyncio
+from collections import deque
 from typing import Dict, Any, List, Optional
+import numpy as np
+from workspace.settings import settings
 from workspace.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -26,7 +30,7 @@ class MetricsTracker:
         if tags is None:
             tags = {}
             
-        logger.debug(f"Tracking metric {metric_name}: {value} with tags {tags}")
+        logger.debug("Tracking metric %s: %s with tags %s", metric_name, value, tags)
         
         # In a real implementation, would send to a metrics service
         
@@ -53,7 +57,7 @@ class MetricsTracker:
         Returns:
             Dictionary with metric reports
         """
-        logger.info(f"Generating metrics report for {metric_names}")
+        logger.info("Generating metrics report for %s", metric_names)
         
         # Filter metrics by name if specified
         if metric_names is None:
@@ -97,3 +101,67 @@ class MetricsTracker:
                 }
                 
         return report
+
+class LoopLagMonitor:
+    """
+    Measure asyncio event loop lag.
+
+    A background task sleeps for a fixed interval and records how late it
+    wakes up. Sustained lag means something is running synchronously on the
+    loop and holding up every other request behind it.
+    """
+    
+    def __init__(self, interval: Optional[float] = None, 
+                 window: int = 6000, 
+                 tracker: Optional[MetricsTracker] = None):
+        self.interval = interval if interval is not None else settings.LOOP_LAG_INTERVAL
+        self.samples = deque(maxlen=window)
+        self.tracker = tracker
+        self._task: Optional[asyncio.Task] = None
+        logger.info("LoopLagMonitor initialized with interval %ss", self.interval)
+    
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000.0)
+            self.samples.append(lag_ms)
+            if self.tracker is not None:
+                self.tracker.track("event_loop_lag_ms", lag_ms)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Summarize the recorded lag samples.
+        
+        Returns:
+            Dictionary with sample count and lag percentiles in milliseconds
+        """
+        if not self.samples:
+            return {"count": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+            
+        values = np.fromiter(self.samples, dtype=np.float64)
+        p50, p99 = np.percentile(values, [50, 99])
+        return {
+            "count": int(values.size),
+            "p50_ms": float(p50),
+            "p99_ms": float(p99),
+            "max_ms": float(values.max())
+        }
+
+loop_lag_monitor = LoopLagMonitor()
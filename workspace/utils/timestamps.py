@@ -0,0 +1,107 @@
+"""
+Shared ISO timestamp parsing.
+
+Every parser here returns timezone-aware UTC values and treats naive inputs
+as UTC, so results can always be compared with each other and with
+utc_now().
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Iterable, Optional, Union
+import pandas as pd
+from workspace.settings import settings
+
+TimeBound = Union[str, datetime, pd.Timestamp, None]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def utc_now() -> datetime:
+    """Get the current time as an aware UTC datetime."""
+    return datetime.now(timezone.utc)
+
+@lru_cache(maxsize=settings.TIMESTAMP_PARSE_CACHE_SIZE)
+def _parse_iso_timestamp(value: str) -> pd.Timestamp:
+    ts = pd.Timestamp(value.replace("Z", "+00:00"))
+    return ts.tz_localize(timezone.utc) if ts.tzinfo is None else ts.tz_convert(timezone.utc)
+
+@lru_cache(maxsize=settings.TIMESTAMP_PARSE_CACHE_SIZE)
+def parse_timestamp(value: Union[str, datetime, None]) -> Optional[datetime]:
+    """
+    Parse one ISO timestamp, memoized.
+    
+    Event histories repeat the same timestamps across requests, so results
+    are kept in an LRU cache of TIMESTAMP_PARSE_CACHE_SIZE entries and a
+    repeated timestamp costs one dictionary lookup.
+    
+    Args:
+        value: ISO string or datetime
+    
+    Returns:
+        Aware UTC datetime, or None if value is None
+    
+    Raises:
+        ValueError: If the value is not a valid ISO timestamp
+        TypeError: If the value is not hashable
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    raise ValueError(f"Invalid timestamp: {value!r}")
+
+def parse_timestamps(values: Iterable[Any]) -> pd.DatetimeIndex:
+    """
+    Parse a batch of ISO timestamps in one vectorized call.
+    
+    Use for whole batches that become frame columns; for a single
+    customer's history, looping over parse_timestamp is cheaper.
+    
+    Args:
+        values: ISO strings, datetimes or None
+    
+    Returns:
+        UTC DatetimeIndex, with NaT for missing or invalid values
+    """
+    return pd.DatetimeIndex(pd.to_datetime(
+        pd.Series(list(values), dtype=object), utc=True, errors="coerce", format="ISO8601"
+    ))
+
+def to_utc_timestamp(value: TimeBound) -> Optional[pd.Timestamp]:
+    """
+    Convert a time bound to a UTC timestamp, treating naive values as UTC.
+    
+    Args:
+        value: ISO string, datetime or timestamp
+    
+    Returns:
+        UTC timestamp, or None if value is None
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _parse_iso_timestamp(value)
+    ts = pd.Timestamp(value)
+    return ts.tz_localize(timezone.utc) if ts.tzinfo is None else ts.tz_convert(timezone.utc)
+
+def to_epoch_ns(value: TimeBound) -> int:
+    """
+    Convert an ISO string, datetime or timestamp to UTC epoch nanoseconds.
+    
+    Args:
+        value: ISO string, datetime or timestamp
+    
+    Returns:
+        Nanoseconds since the Unix epoch
+    
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if isinstance(value, pd.Timestamp):
+        return to_utc_timestamp(value).as_unit("ns").value
+    value = parse_timestamp(value)
+    if value is None:
+        raise ValueError("Missing timestamp")
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
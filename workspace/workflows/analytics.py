@@ -1,19 +1,40 @@
 """
 Workflow for analytics and reporting.
 """
+import asyncio
+import os
 from typing import Dict, Any, List, Optional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+import pandas as pd
 from workspace.utils.logger import setup_logger
 from workspace.utils.metrics import MetricsTracker
+from workspace.utils.executors import run_in_thread, run_in_process
 from workspace.agents.engagement_analysis_agent import EngagementAnalysisAgent
 from workspace.data.loaders import CustomerDataLoader, RewardDataLoader
+from workspace.data.processors import CustomerDataProcessor, EngagementEventProcessor
+from workspace.data.event_store import EventStore, get_event_store, to_utc_timestamp
+from workspace.data.rollups import RollupStore, get_rollup_store
+from workspace.data.opportunities import build_partitions, count_cells, rank_opportunities
 
 logger = setup_logger(__name__)
 
+def _is_date_only(value: str) -> bool:
+    """Check whether an ISO bound names a whole day rather than an instant."""
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
 class AnalyticsWorkflow:
     """Workflow for generating analytics and reports."""
     
-    def __init__(self):
+    def __init__(self, event_store: Optional[EventStore] = None,
+                 rollup_store: Optional[RollupStore] = None):
+        self.event_store = event_store if event_store is not None else get_event_store()
+        self.rollup_store = rollup_store if rollup_store is not None else get_rollup_store()
+        self.event_processor = EngagementEventProcessor()
+        self.customer_processor = CustomerDataProcessor()
         self.engagement_agent = EngagementAnalysisAgent()
         self.customer_loader = CustomerDataLoader()
         self.reward_loader = RewardDataLoader()
@@ -21,148 +42,198 @@ class AnalyticsWorkflow:
         logger.info("AnalyticsWorkflow initialized")
     
     async def execute(self, start_date: Optional[str] = None, 
-                   end_date: Optional[str] = None) -> Dict[str, Any]:
+                   end_date: Optional[str] = None,
+                   use_rollups: Optional[bool] = None) -> Dict[str, Any]:
         """
         Execute the analytics workflow to generate reports.
         
         Args:
             start_date: Optional start date for analysis (ISO format)
-            end_date: Optional end date for analysis (ISO format)
+            end_date: Optional end date for analysis (ISO format, date-only
+                values include the whole day)
+            use_rollups: Answer from the daily cubes (whole days) instead of
+                raw events; defaults to True when rollups are available
             
         Returns:
             Generated analytics and reports
         """
-        logger.info(f"Executing analytics workflow from {start_date} to {end_date}")
+        logger.info("Executing analytics workflow from %s to %s", start_date, end_date)
         
         # Set default dates if not provided
         if end_date is None:
-            end_date = datetime.now().isoformat()
+            end_date = datetime.now(timezone.utc).isoformat()
+            
+        end_ts = to_utc_timestamp(end_date)
+        if _is_date_only(end_date):
+            # Date-only end bound covers the whole day
+            end_ts = end_ts + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
             
         if start_date is None:
             # Default to 30 days before end date
-            start_dt = datetime.fromisoformat(end_date.replace("Z", "+00:00")) - timedelta(days=30)
-            start_date = start_dt.isoformat()
+            start_date = (end_ts - timedelta(days=30)).isoformat()
+        start_ts = to_utc_timestamp(start_date)
+        
+        if use_rollups is None:
+            use_rollups = self.rollup_store is not None
+        if use_rollups and self.rollup_store is None:
+            raise ValueError("Rollups have not been built; run scripts/backfill_rollups.py")
             
-        # In a real implementation:
-        # 1. Query data for the specified date range
-        # 2. Calculate engagement metrics
-        # 3. Generate reward effectiveness metrics
-        # 4. Identify trends and insights
-        
-        # Mock implementation with example metrics
-        engagement_metrics = {
-            "overall_engagement_rate": 0.42,
-            "email_open_rate": 0.38,
-            "email_click_rate": 0.12,
-            "reward_claim_rate": 0.08,
-            "engagement_by_content_type": {
-                "question": 0.35,
-                "game": 0.48,
-                "voucher": 0.65,
-                "newsletter": 0.25
-            },
-            "engagement_trends": [
-                {"date": "2023-05-15", "rate": 0.40},
-                {"date": "2023-05-22", "rate": 0.39},
-                {"date": "2023-05-29", "rate": 0.41},
-                {"date": "2023-06-05", "rate": 0.43},
-                {"date": "2023-06-12", "rate": 0.42}
-            ]
-        }
+        compute = self._compute_rollup_report if use_rollups else self._compute_report
+        report = await run_in_thread(compute, start_ts, end_ts)
         
-        reward_metrics = {
-            "top_performing_rewards": [
-                {"id": "reward1", "name": "10% Discount", "claim_rate": 0.12, "conversion_rate": 0.08},
-                {"id": "reward2", "name": "Free Shipping", "claim_rate": 0.18, "conversion_rate": 0.09},
-                {"id": "reward3", "name": "50 Bonus Points", "claim_rate": 0.09, "conversion_rate": 0.05}
-            ],
-            "reward_performance_by_segment": {
-                "VIP": {"claim_rate": 0.22, "conversion_rate": 0.15},
-                "Active": {"claim_rate": 0.18, "conversion_rate": 0.11},
-                "Recent": {"claim_rate": 0.14, "conversion_rate": 0.07},
-                "At Risk": {"claim_rate": 0.09, "conversion_rate": 0.04},
-                "Standard": {"claim_rate": 0.07, "conversion_rate": 0.03}
-            }
+        return {
+            "report_id": f"analytics_{hash(start_date + end_date) % 10000}",
+            "start_date": start_date,
+            "end_date": end_date,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "source": "rollups" if use_rollups else "events",
+            **report
         }
+    
+    def _compute_report(self, start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, Any]:
+        """Compute all report sections from the events in [start, end]."""
+        # The date range is pushed down to the store, which only slices the window
+        events = self.event_store.scan(start, end)
+        previous_events = self.event_store.scan(
+            start - (end - start) - pd.Timedelta(microseconds=1), 
+            start - pd.Timedelta(microseconds=1), 
+            columns=["customer_id"]
+        )
+        first_seen = self.event_store.first_seen()
+        customer_count = self.event_store.customer_count
         
-        customer_metrics = {
-            "total_customers": 1250,
-            "new_customers": 125,
-            "active_customers": 780,
-            "at_risk_customers": 95,
-            "churn_rate": 0.05,
-            "segment_distribution": {
-                "VIP": 0.12,
-                "Active": 0.35,
-                "Recent": 0.23,
-                "At Risk": 0.08,
-                "Standard": 0.22
-            }
-        }
+        features = self.event_processor.customer_features(events, end, first_seen)
+        segments = self.customer_processor.segment_customers(features)
+        reward_names = {reward["id"]: reward["name"] for reward in self.reward_loader.load_rewards()}
         
-        insights = [
-            "Free shipping offers are outperforming percentage discounts",
-            "Game-based content has the highest engagement for customers under 35",
-            "VIP customers respond best to exclusive rewards rather than higher value discounts",
-            "The optimal email frequency for recent customers is weekly rather than bi-weekly",
-            "At-risk customers respond well to personalized re-engagement campaigns with vouchers"
-        ]
+        engagement_metrics = self.event_processor.engagement_metrics(events, customer_count)
+        reward_metrics = self.event_processor.reward_metrics(events, segments, reward_names)
+        customer_metrics = self.event_processor.customer_metrics(
+            events, previous_events, features, segments, customer_count, start
+        )
         
         return {
-            "report_id": f"analytics_{hash(start_date + end_date) % 10000}",
-            "start_date": start_date,
-            "end_date": end_date,
-            "generated_at": datetime.now().isoformat(),
+            "event_count": len(events),
             "engagement_metrics": engagement_metrics,
             "reward_metrics": reward_metrics,
             "customer_metrics": customer_metrics,
-            "insights": insights,
-            "recommendations": [
-                "Increase the frequency of game-based content for younger segments",
-                "Prioritize free shipping offers over percentage discounts",
-                "Develop more exclusive rewards for VIP customers",
-                "Implement a dedicated re-engagement campaign for at-risk customers"
-            ]
+            "insights": self._insights(engagement_metrics, reward_metrics, customer_metrics),
+            "recommendations": self._recommendations(engagement_metrics, reward_metrics, customer_metrics)
         }
     
-    async def identify_optimization_opportunities(self) -> List[Dict[str, Any]]:
+    def _compute_rollup_report(self, start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, Any]:
+        """Compute the report by merging the daily cubes for the days in [start, end]."""
+        reward_names = {reward["id"]: reward["name"] for reward in self.reward_loader.load_rewards()}
+        report = self.rollup_store.report_metrics(start, end, reward_names)
+        
+        return {
+            **report,
+            "insights": self._insights(
+                report["engagement_metrics"], report["reward_metrics"], report["customer_metrics"]),
+            "recommendations": self._recommendations(
+                report["engagement_metrics"], report["reward_metrics"], report["customer_metrics"])
+        }
+    
+    def _insights(self, engagement_metrics: Dict[str, Any], 
+                  reward_metrics: Dict[str, Any], 
+                  customer_metrics: Dict[str, Any]) -> List[str]:
+        """Summarize the notable findings of a report as sentences."""
+        insights = []
+        
+        top_rewards = reward_metrics["top_performing_rewards"]
+        if top_rewards:
+            top = top_rewards[0]
+            insights.append(f"{top['name']} is the most claimed reward with {top['claims']} claims "
+                            f"and a {top['conversion_rate']:.0%} conversion rate")
+            
+        by_segment = reward_metrics["reward_performance_by_segment"]
+        if by_segment:
+            best = max(by_segment, key=lambda segment: by_segment[segment]["claim_rate"])
+            insights.append(f"{best} customers have the highest reward claim rate "
+                            f"({by_segment[best]['claim_rate']:.0%})")
+            
+        by_content_type = engagement_metrics["engagement_by_content_type"]
+        if by_content_type:
+            best = max(by_content_type, key=by_content_type.get)
+            insights.append(f"{best.title()} content has the highest interaction rate "
+                            f"({by_content_type[best]:.0%})")
+            
+        trends = engagement_metrics["engagement_trends"]
+        if len(trends) >= 2:
+            direction = "up" if trends[-1]["rate"] >= trends[0]["rate"] else "down"
+            insights.append(f"Weekly engagement is {direction} from {trends[0]['rate']:.0%} "
+                            f"to {trends[-1]['rate']:.0%} over the period")
+            
+        if customer_metrics["churn_rate"]:
+            insights.append(f"{customer_metrics['churn_rate']:.0%} of customers active in the previous "
+                            f"period were not seen in this one")
+            
+        return insights
+    
+    def _recommendations(self, engagement_metrics: Dict[str, Any], 
+                         reward_metrics: Dict[str, Any], 
+                         customer_metrics: Dict[str, Any]) -> List[str]:
+        """Turn report metrics into suggested actions."""
+        recommendations = []
+        
+        by_segment = reward_metrics["reward_performance_by_segment"]
+        if by_segment:
+            worst = min(by_segment, key=lambda segment: by_segment[segment]["claim_rate"])
+            recommendations.append(f"Test higher-value or different reward types for {worst} customers")
+            
+        by_content_type = engagement_metrics["engagement_by_content_type"]
+        if by_content_type:
+            best = max(by_content_type, key=by_content_type.get)
+            recommendations.append(f"Increase the share of {best} content in upcoming campaigns")
+            
+        if customer_metrics["segment_distribution"].get("At Risk", 0) > 0.1:
+            recommendations.append("Implement a dedicated re-engagement campaign for at-risk customers")
+            
+        top_rewards = reward_metrics["top_performing_rewards"]
+        if top_rewards:
+            recommendations.append(f"Prioritize {top_rewards[0]['name']} in reward recommendations")
+            
+        return recommendations
+    
+    async def identify_optimization_opportunities(self, start_date: Optional[str] = None,
+                                                  end_date: Optional[str] = None,
+                                                  min_claims: int = 30,
+                                                  top_n: int = 10) -> List[Dict[str, Any]]:
         """
         Identify opportunities for optimization in the reward system.
         
+        Compares reward conversion across segment x content type x reward type
+        x send hour cells, with cells counted per customer partition on the
+        process pool.
+        
+        Args:
+            start_date: Optional start date for analysis (ISO format),
+                defaults to 90 days before end date
+            end_date: Optional end date for analysis (ISO format), defaults to now
+            min_claims: Minimum claims for a cell to be considered
+            top_n: Number of opportunities to return
+        
         Returns:
-            List of identified optimization opportunities
+            List of identified optimization opportunities, best first
         """
         logger.info("Identifying optimization opportunities")
         
-        # In a real implementation:
-        # 1. Analyze performance data across segments
-        # 2. Identify underperforming areas
-        # 3. Generate suggestions for improvement
-        
-        # Mock implementation
-        return [
-            {
-                "id": "opt1",
-                "area": "content_mix",
-                "segment": "Recent",
-                "current_performance": 0.32,
-                "potential_improvement": 0.12,
-                "suggestion": "Increase the ratio of games and interactive content for recently acquired customers"
-            },
-            {
-                "id": "opt2",
-                "area": "reward_type",
-                "segment": "At Risk",
-                "current_performance": 0.19,
-                "potential_improvement": 0.08,
-                "suggestion": "Switch from percentage discounts to free shipping offers for at-risk customers"
-            },
-            {
-                "id": "opt3",
-                "area": "timing",
-                "segment": "VIP",
-                "current_performance": 0.56,
-                "potential_improvement": 0.05,
-                "suggestion": "Send communications in the evening (6-8pm) rather than morning for VIP customers"
-            }
-        ]
+        end = to_utc_timestamp(end_date) if end_date else pd.Timestamp.now(tz="UTC")
+        start = to_utc_timestamp(start_date) if start_date else end - timedelta(days=90)
+        
+        partitions, content_types, reward_types = await run_in_thread(
+            self._opportunity_partitions, start, end)
+        counts = await asyncio.gather(*(run_in_process(count_cells, partition) for partition in partitions))
+        
+        trials = sum(count[0] for count in counts)
+        successes = sum(count[1] for count in counts)
+        return rank_opportunities(trials, successes, content_types, reward_types, min_claims, top_n)
+    
+    def _opportunity_partitions(self, start: pd.Timestamp, end: pd.Timestamp):
+        """Segment customers and split the window's events into per-customer partitions."""
+        events = self.event_store.scan(start, end)
+        features = self.event_processor.customer_features(events, end, self.event_store.first_seen())
+        segments = self.customer_processor.segment_customers(features)
+        segments.index = segments.index.astype(object)
+        reward_types = {reward["id"]: reward["type"] for reward in self.reward_loader.load_rewards()}
+        return build_partitions(events, segments, reward_types, os.cpu_count() or 1)
@@ -1,11 +1,13 @@
 """
 Workflow for onboarding new customers.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
 from workspace.utils.logger import setup_logger
+from workspace.utils.executors import run_in_thread
 from workspace.agents.reward_matching_agent import RewardMatchingAgent
 from workspace.agents.content_selection_agent import ContentSelectionAgent
 from workspace.services.email_service import EmailService
+from workspace.data.rollups import NEW_CUSTOMER_SEGMENT
 
 logger = setup_logger(__name__)
 
@@ -28,29 +30,19 @@ class CustomerOnboardingWorkflow:
         Returns:
             Results of the workflow execution
         """
-        logger.info(f"Executing onboarding workflow for customer {customer_id}")
+        logger.info("Executing onboarding workflow for customer %s", customer_id)
         
         # Step 1: Get initial reward recommendations
-        rewards = self.reward_agent.get_recommendations(customer_id, limit=3)
+        rewards = await self.reward_agent.get_recommendations_async(customer_id, limit=3)
         
         # Step 2: Select content for welcome email
         content_plan = self.content_agent.select_content(
             customer_id, 
-            context={
-                "journey_stage": "onboarding",
-                "profile_completion": 0.2,  # New customer has minimal profile
-                "days_since_signup": 0,
-                "recommended_rewards": rewards
-            }
+            context=self._onboarding_context(rewards)
         )
         
         # Step 3: Send welcome email
-        email_data = {
-            "subject": "Welcome to Our Rewards Program",
-            "campaign_id": "welcome_series",
-            "content": "Welcome email content would be generated here",
-            "rewards": rewards
-        }
+        email_data = self._welcome_email(customer_id, rewards, content_plan)
         
         email_result = await self.email_service.send_personalized_campaign(
             customer_id, email_data
@@ -59,6 +51,83 @@ class CustomerOnboardingWorkflow:
         # Step 4: Schedule follow-up engagement
         # In a real implementation, would create entries in a task queue/scheduler
         
+        return self._result(customer_id, email_result)
+    
+    async def execute_bulk(self, customer_ids: List[str]) -> Dict[str, Any]:
+        """
+        Execute the onboarding workflow for a batch of new customers.
+        
+        Rewards are scored for the whole batch in one pass, content is planned
+        once per distinct customer profile, and the welcome emails go out
+        through the bulk sender.
+        
+        Args:
+            customer_ids: IDs of the customers to onboard
+            
+        Returns:
+            Summary of the batch with per-customer results
+        """
+        logger.info("Executing bulk onboarding workflow for %s customers", len(customer_ids))
+        
+        # Step 1: Get initial reward recommendations for the whole batch
+        rewards_by_customer = await run_in_thread(
+            self.reward_agent.get_recommendations_batch, customer_ids, 3
+        )
+        
+        # Step 2: Select content, deduplicated across identical profiles
+        content_plans = await self.content_agent.select_content_batch_async({
+            customer_id: self._onboarding_context(rewards_by_customer[customer_id])
+            for customer_id in customer_ids
+        })
+        
+        # Step 3: Hand all welcome emails to the bulk sender
+        emails = [
+            self._welcome_email(customer_id, rewards_by_customer[customer_id], content_plans[customer_id])
+            for customer_id in customer_ids
+        ]
+        email_results = await self.email_service.send_bulk_campaign(emails)
+        
+        # Step 4: Schedule follow-up engagement
+        # In a real implementation, would create entries in a task queue/scheduler
+        
+        results = [
+            self._result(customer_id, email_result)
+            for customer_id, email_result in zip(customer_ids, email_results)
+        ]
+        
+        return {
+            "workflow_id": f"onboarding_bulk_{hash(tuple(customer_ids)) % 10000}",
+            "status": "completed",
+            "customer_count": len(customer_ids),
+            "emails_sent": sum(1 for r in email_results if r.get("status") == "sent"),
+            "results": results
+        }
+    
+    def _onboarding_context(self, rewards: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the content selection context for a newly signed-up customer."""
+        return {
+            "journey_stage": "onboarding",
+            "segment": NEW_CUSTOMER_SEGMENT,
+            "profile_completion": 0.2,  # New customer has minimal profile
+            "days_since_signup": 0,
+            "recommended_rewards": rewards
+        }
+    
+    def _welcome_email(self, customer_id: str, 
+                       rewards: List[Dict[str, Any]], 
+                       content_plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the welcome email payload for a customer, rendered by the email service."""
+        return {
+            "customer_id": customer_id,
+            "subject": "Welcome to Our Rewards Program",
+            "campaign_id": "welcome_series",
+            "template": "welcome",
+            "content_plan": content_plan,
+            "rewards": rewards
+        }
+    
+    def _result(self, customer_id: str, email_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the per-customer workflow result."""
         return {
             "workflow_id": f"onboarding_{customer_id}",
             "customer_id": customer_id,
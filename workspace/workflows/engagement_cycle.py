@@ -3,6 +3,7 @@ Workflow for ongoing customer engagement cycles.
 """
 from typing import Dict, Any
 from workspace.utils.logger import setup_logger
+from workspace.utils.executors import run_in_thread
 from workspace.agents.reward_matching_agent import RewardMatchingAgent
 from workspace.agents.content_selection_agent import ContentSelectionAgent
 from workspace.agents.timing_optimization_agent import TimingOptimizationAgent
@@ -34,20 +35,17 @@ class EngagementCycleWorkflow:
         Returns:
             Results of the workflow execution
         """
-        logger.info(f"Executing engagement cycle for customer {customer_id}")
+        logger.info("Executing engagement cycle for customer %s", customer_id)
         
-        # Step 1: Load customer data and engagement history
+        # Step 1: Load customer data
         customer_data = self.customer_loader.load_customer(customer_id)
-        engagement_history = self.customer_loader.load_customer_engagement(customer_id)
         
-        # Step 2: Analyze engagement to determine if we should continue
-        engagement_analysis = self.engagement_agent.analyze_engagement(
-            customer_id, engagement_history
-        )
+        # Step 2: Analyze engagement from the online features to determine if we should continue
+        engagement_analysis = await self.engagement_agent.analyze_engagement_async(customer_id)
         
         # Check if customer is too disengaged to continue
         if engagement_analysis.get("churn_risk", 0) > 0.9:
-            logger.info(f"Customer {customer_id} has high churn risk, pausing engagement")
+            logger.info("Customer %s has high churn risk, pausing engagement", customer_id)
             return {
                 "workflow_id": f"engagement_{customer_id}",
                 "customer_id": customer_id,
@@ -57,10 +55,10 @@ class EngagementCycleWorkflow:
             }
         
         # Step 3: Get reward recommendations
-        rewards = self.reward_agent.get_recommendations(customer_id, limit=2)
+        rewards = await self.reward_agent.get_recommendations_async(customer_id, limit=2)
         
-        # Step 4: Determine optimal timing
-        timing = self.timing_agent.get_optimal_time(customer_id)
+        # Step 4: Determine optimal timing (the first call builds the histograms)
+        timing = await run_in_thread(self.timing_agent.get_optimal_time, customer_id)
         
         # Step 5: Select content based on engagement history
         content_plan = self.content_agent.select_content(
@@ -78,7 +76,8 @@ class EngagementCycleWorkflow:
         email_data = {
             "subject": "Your Personalized Rewards This Week",
             "campaign_id": "engagement_series",
-            "content": "Engagement email content would be generated here",
+            "template": "engagement",
+            "content_plan": content_plan,
             "rewards": rewards,
             "scheduled_time": timing.get("optimal_datetime")
         }
@@ -88,7 +87,8 @@ class EngagementCycleWorkflow:
         )
         
         # Step 7: Schedule next engagement based on optimal frequency
-        frequency = self.timing_agent.get_optimal_frequency(
+        frequency = await run_in_thread(
+            self.timing_agent.get_optimal_frequency,
             customer_id,
             engagement_metrics=engagement_analysis.get("engagement_metrics", {})
         )